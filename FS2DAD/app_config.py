@@ -10,6 +10,7 @@ from _modules.logging.logging import create_logger
 logger = create_logger(__name__)
 
 from _modules.config.config_handler import Config
+from _modules.file_utils import compression_suffix
 from pathlib import Path
 
 class AppConfig():
@@ -25,8 +26,26 @@ class AppConfig():
     INDENT_CONTENT = "indent_content"
     INCLUDE_FILES = "include_files"
     SANITIZE = "sanitize"
-    SPLIT_SIZE = "spli_size"
+    SPLIT_SIZE = "split_size"
+    SPLIT_SIZE_LEGACY = "spli_size"
     REMOVE_XML_COMMENTS = "remove_xml_comments"
+    STREAM = "stream"
+    WORKERS = "workers"
+    INCREMENTAL = "incremental"
+    LARGE_FILE_MAX_BYTES = "large_file_max_bytes"
+    LARGE_FILE_MODE = "large_file_mode"
+    DEDUP = "dedup"
+    COMPRESS_LEVEL = "compress_level"
+    CDATA = "cdata"
+    STRIP_COMMENTS = "strip_comments"
+    COLLAPSE_BLANK_LINES = "collapse_blank_lines"
+    TRIM_TRAILING_WHITESPACE = "trim_trailing_whitespace"
+    INDEX = "index"
+    TOKEN_BUDGET = "token_budget"
+    BINARY_BASE64_MAX_BYTES = "binary_base64_max_bytes"
+    GITIGNORE = "gitignore"
+    OUTPUT_FORMAT = "output_format"
+    DETECTION_CACHE = "detection_cache"
 
     # Campi obbligatori
     REQUIRED_FIELDS = [
@@ -42,6 +61,23 @@ class AppConfig():
         SANITIZE: False,
         SPLIT_SIZE: 0,
         REMOVE_XML_COMMENTS: False,
+        STREAM: False,
+        WORKERS: 0,
+        INCREMENTAL: False,
+        LARGE_FILE_MAX_BYTES: 0,
+        LARGE_FILE_MODE: "truncate",
+        DEDUP: False,
+        COMPRESS_LEVEL: 6,
+        CDATA: False,
+        STRIP_COMMENTS: False,
+        COLLAPSE_BLANK_LINES: False,
+        TRIM_TRAILING_WHITESPACE: False,
+        INDEX: False,
+        TOKEN_BUDGET: 0,
+        BINARY_BASE64_MAX_BYTES: 0,
+        GITIGNORE: False,
+        OUTPUT_FORMAT: "auto",
+        DETECTION_CACHE: "",
         INCLUDE_FOLDERS: ["*"],
         INCLUDE_FILES: [],
         EXCLUDE_FOLDERS: [
@@ -79,6 +115,23 @@ class AppConfig():
         self.sanitize = self.DEFAULT_CONFIG[self.SANITIZE]
         self.split_size = self.DEFAULT_CONFIG[self.SPLIT_SIZE]
         self.remove_xml_comments = self.DEFAULT_CONFIG[self.REMOVE_XML_COMMENTS]
+        self.stream = self.DEFAULT_CONFIG[self.STREAM]
+        self.workers = self.DEFAULT_CONFIG[self.WORKERS]
+        self.incremental = self.DEFAULT_CONFIG[self.INCREMENTAL]
+        self.large_file_max_bytes = self.DEFAULT_CONFIG[self.LARGE_FILE_MAX_BYTES]
+        self.large_file_mode = self.DEFAULT_CONFIG[self.LARGE_FILE_MODE]
+        self.dedup = self.DEFAULT_CONFIG[self.DEDUP]
+        self.compress_level = self.DEFAULT_CONFIG[self.COMPRESS_LEVEL]
+        self.cdata = self.DEFAULT_CONFIG[self.CDATA]
+        self.strip_comments = self.DEFAULT_CONFIG[self.STRIP_COMMENTS]
+        self.collapse_blank_lines = self.DEFAULT_CONFIG[self.COLLAPSE_BLANK_LINES]
+        self.trim_trailing_whitespace = self.DEFAULT_CONFIG[self.TRIM_TRAILING_WHITESPACE]
+        self.index = self.DEFAULT_CONFIG[self.INDEX]
+        self.token_budget = self.DEFAULT_CONFIG[self.TOKEN_BUDGET]
+        self.binary_base64_max_bytes = self.DEFAULT_CONFIG[self.BINARY_BASE64_MAX_BYTES]
+        self.gitignore = self.DEFAULT_CONFIG[self.GITIGNORE]
+        self.output_format = self.DEFAULT_CONFIG[self.OUTPUT_FORMAT]
+        self.detection_cache = self.DEFAULT_CONFIG[self.DETECTION_CACHE]
 
         # Log per segnalare l'inizializzazione
         logger.debug("Configurazione inizializzata con i valori di default.")
@@ -100,8 +153,26 @@ class AppConfig():
         self.indent_content = config_data.get(self.INDENT_CONTENT, self.DEFAULT_CONFIG[self.INDENT_CONTENT])
         self.include_files = config_data.get(self.INCLUDE_FILES, self.DEFAULT_CONFIG[self.INCLUDE_FILES])
         self.sanitize = config_data.get(self.SANITIZE, self.DEFAULT_CONFIG[self.SANITIZE])
-        self.split_size = config_data.get(self.SPLIT_SIZE, self.DEFAULT_CONFIG[self.SPLIT_SIZE])
+        # la chiave storica "spli_size" resta accettata per i file di configurazione esistenti
+        self.split_size = config_data.get(self.SPLIT_SIZE, config_data.get(self.SPLIT_SIZE_LEGACY, self.DEFAULT_CONFIG[self.SPLIT_SIZE]))
         self.remove_xml_comments = config_data.get(self.REMOVE_XML_COMMENTS, self.DEFAULT_CONFIG[self.REMOVE_XML_COMMENTS])
+        self.stream = config_data.get(self.STREAM, self.DEFAULT_CONFIG[self.STREAM])
+        self.workers = config_data.get(self.WORKERS, self.DEFAULT_CONFIG[self.WORKERS])
+        self.incremental = config_data.get(self.INCREMENTAL, self.DEFAULT_CONFIG[self.INCREMENTAL])
+        self.large_file_max_bytes = config_data.get(self.LARGE_FILE_MAX_BYTES, self.DEFAULT_CONFIG[self.LARGE_FILE_MAX_BYTES])
+        self.large_file_mode = config_data.get(self.LARGE_FILE_MODE, self.DEFAULT_CONFIG[self.LARGE_FILE_MODE])
+        self.dedup = config_data.get(self.DEDUP, self.DEFAULT_CONFIG[self.DEDUP])
+        self.compress_level = config_data.get(self.COMPRESS_LEVEL, self.DEFAULT_CONFIG[self.COMPRESS_LEVEL])
+        self.cdata = config_data.get(self.CDATA, self.DEFAULT_CONFIG[self.CDATA])
+        self.strip_comments = config_data.get(self.STRIP_COMMENTS, self.DEFAULT_CONFIG[self.STRIP_COMMENTS])
+        self.collapse_blank_lines = config_data.get(self.COLLAPSE_BLANK_LINES, self.DEFAULT_CONFIG[self.COLLAPSE_BLANK_LINES])
+        self.trim_trailing_whitespace = config_data.get(self.TRIM_TRAILING_WHITESPACE, self.DEFAULT_CONFIG[self.TRIM_TRAILING_WHITESPACE])
+        self.index = config_data.get(self.INDEX, self.DEFAULT_CONFIG[self.INDEX])
+        self.token_budget = config_data.get(self.TOKEN_BUDGET, self.DEFAULT_CONFIG[self.TOKEN_BUDGET])
+        self.binary_base64_max_bytes = config_data.get(self.BINARY_BASE64_MAX_BYTES, self.DEFAULT_CONFIG[self.BINARY_BASE64_MAX_BYTES])
+        self.gitignore = config_data.get(self.GITIGNORE, self.DEFAULT_CONFIG[self.GITIGNORE])
+        self.output_format = config_data.get(self.OUTPUT_FORMAT, self.DEFAULT_CONFIG[self.OUTPUT_FORMAT])
+        self.detection_cache = config_data.get(self.DETECTION_CACHE, self.DEFAULT_CONFIG[self.DETECTION_CACHE])
 
     def to_dict(self):
         """
@@ -120,7 +191,60 @@ class AppConfig():
             self.INCLUDE_FILES: self.include_files,
             self.SANITIZE: self.sanitize,
             self.SPLIT_SIZE: self.split_size,
-            self.REMOVE_XML_COMMENTS: self.remove_xml_comments
+            self.REMOVE_XML_COMMENTS: self.remove_xml_comments,
+            self.STREAM: self.stream,
+            self.WORKERS: self.workers,
+            self.INCREMENTAL: self.incremental,
+            self.LARGE_FILE_MAX_BYTES: self.large_file_max_bytes,
+            self.LARGE_FILE_MODE: self.large_file_mode,
+            self.DEDUP: self.dedup,
+            self.COMPRESS_LEVEL: self.compress_level,
+            self.CDATA: self.cdata,
+            self.STRIP_COMMENTS: self.strip_comments,
+            self.COLLAPSE_BLANK_LINES: self.collapse_blank_lines,
+            self.TRIM_TRAILING_WHITESPACE: self.trim_trailing_whitespace,
+            self.INDEX: self.index,
+            self.TOKEN_BUDGET: self.token_budget,
+            self.BINARY_BASE64_MAX_BYTES: self.binary_base64_max_bytes,
+            self.GITIGNORE: self.gitignore,
+            self.OUTPUT_FORMAT: self.output_format,
+            self.DETECTION_CACHE: self.detection_cache
+        }
+
+    def fs_to_dad_arguments(self) -> dict:
+        """
+        Argomenti di fs_to_dad corrispondenti alla configurazione (output già risolto con resolve_output_path).
+
+        :return: Dizionario da passare come fs_to_dad(**argomenti)
+        """
+        return {
+            "target_path_folder": self.target_path_folder,
+            "output_file": self.output_path_file,
+            "indent_chars": "  " if self.indent_content else "",
+            "sanitize": self.sanitize,
+            "split_size": self.split_size,
+            "remove_xml_comments": self.remove_xml_comments,
+            "ignore_folders": self.exclude_folders,
+            "ignore_files": self.exclude_files,
+            "include_folders": self.include_folders,
+            "include_files": self.include_files,
+            "stream": self.stream,
+            "workers": self.workers,
+            "incremental": self.incremental,
+            "large_file_max_bytes": self.large_file_max_bytes,
+            "large_file_mode": self.large_file_mode,
+            "dedup": self.dedup,
+            "compress_level": self.compress_level,
+            "cdata": self.cdata,
+            "strip_comments": self.strip_comments,
+            "collapse_blank_lines": self.collapse_blank_lines,
+            "trim_trailing_whitespace": self.trim_trailing_whitespace,
+            "index": self.index,
+            "token_budget": self.token_budget,
+            "binary_base64_max_bytes": self.binary_base64_max_bytes,
+            "gitignore": self.gitignore,
+            "output_format": self.output_format,
+            "detection_cache": self.detection_cache,
         }
 
     def load(self):
@@ -142,6 +266,10 @@ class AppConfig():
 
         directory, filename = os.path.split(file_path)
         name, ext = os.path.splitext(filename)
+        # nome.xml.gz -> nome{sanitize}.xml.gz
+        if compression_suffix(filename):
+            name, inner_ext = os.path.splitext(name)
+            ext = inner_ext + ext
         
         sanitized_filename = f"{name}{{sanitize}}{ext}"
         return os.path.join(directory, sanitized_filename)
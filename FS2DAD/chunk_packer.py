@@ -0,0 +1,134 @@
+"""
+Suddivisione di un documento DAD in chunk sotto un budget di token (contesto di un LLM).
+
+A differenza di split_size (che taglia in ordine di visita) i file vengono distribuiti
+interi nel minor numero di chunk possibile:
+- una cartella il cui sottoalbero sta nel budget resta un unico elemento, quindi finisce
+  intera in un solo chunk; le cartelle più grandi vengono scomposte nei loro file e
+  nelle sottocartelle (ricorsivamente)
+- gli elementi sono distribuiti con best-fit decreasing: dal più grande, nel chunk con
+  meno spazio libero che lo contiene. Il costo di un elemento in un chunk comprende i tag
+  delle cartelle antenate non ancora aperte in quel chunk
+- un singolo file che con il suo percorso di cartelle supera il budget occupa un chunk da solo
+
+I costi sono in caratteri del documento serializzato; i token sono stimati come
+caratteri / CHARS_PER_TOKEN (stima prudente per codice sorgente e XML).
+"""
+import bisect
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(chars: int) -> int:
+    """Token stimati per un testo di chars caratteri."""
+    return -(-chars // CHARS_PER_TOKEN)
+
+
+class _Item:
+    """Elemento da distribuire: un file oppure un'intera cartella."""
+
+    __slots__ = ("files", "cost", "folder", "whole_folder")
+
+    def __init__(self, files, cost, folder, whole_folder):
+        self.files = files
+        self.cost = cost
+        # cartella del file, oppure la cartella stessa se whole_folder
+        self.folder = folder
+        self.whole_folder = whole_folder
+
+
+class _Chunk:
+    __slots__ = ("files", "used", "open_folders")
+
+    def __init__(self, used):
+        self.files = []
+        self.used = used
+        self.open_folders = set()
+
+
+def pack_files(file_folders: list, file_costs: list, folder_parents: list, folder_costs: list,
+               base_cost: int, capacity: int) -> list:
+    """
+    Distribuisce i file in chunk di al più capacity caratteri.
+
+    :param file_folders: Cartella (indice in folder_parents) di ogni file, in ordine di documento
+    :param file_costs: Caratteri dell'elemento File di ogni file
+    :param folder_parents: Cartella padre di ogni cartella (-1 per le radici); i padri precedono i figli
+    :param folder_costs: Caratteri dei tag di apertura e chiusura di ogni cartella
+    :param base_cost: Caratteri fissi di ogni chunk (header, DataArchitectureDesign, Create, FileSystem)
+    :param capacity: Caratteri massimi per chunk
+    :return: Lista di (indici dei file in ordine di documento, caratteri stimati), chunk in ordine di primo file
+    """
+    folder_count = len(folder_parents)
+    folder_files = [[] for _ in range(folder_count)]
+    folder_children = [[] for _ in range(folder_count)]
+    for index, folder in enumerate(file_folders):
+        folder_files[folder].append(index)
+    roots = []
+    for folder, parent in enumerate(folder_parents):
+        (folder_children[parent] if parent >= 0 else roots).append(folder)
+
+    # costo del sottoalbero di ogni cartella (i figli hanno indice maggiore del padre);
+    # le cartelle senza file non vengono scritte e non costano nulla
+    subtree_cost = [0] * folder_count
+    for folder in range(folder_count - 1, -1, -1):
+        cost = sum(file_costs[index] for index in folder_files[folder])
+        cost += sum(subtree_cost[child] for child in folder_children[folder])
+        subtree_cost[folder] = cost + folder_costs[folder] if cost else 0
+
+    def ancestors(folder):
+        while folder >= 0:
+            yield folder
+            folder = folder_parents[folder]
+
+    # scomposizione: le cartelle che stanno nel budget con i propri antenati restano intere
+    items = []
+    stack = list(reversed(roots))
+    while stack:
+        folder = stack.pop()
+        if not subtree_cost[folder]:
+            continue
+        parent = folder_parents[folder]
+        path_cost = sum(folder_costs[a] for a in ancestors(parent)) if parent >= 0 else 0
+        if base_cost + path_cost + subtree_cost[folder] <= capacity:
+            files = []
+            inner = [folder]
+            while inner:
+                current = inner.pop()
+                files.extend(folder_files[current])
+                inner.extend(folder_children[current])
+            items.append(_Item(files, subtree_cost[folder], folder, True))
+            continue
+        for index in folder_files[folder]:
+            items.append(_Item([index], file_costs[index], folder, False))
+        stack.extend(reversed(folder_children[folder]))
+
+    # best-fit decreasing; free = lista ordinata di (spazio libero, numero del chunk)
+    items.sort(key=lambda item: (-item.cost, min(item.files)))
+    chunks = []
+    free = []
+    for item in items:
+        needed = list(ancestors(folder_parents[item.folder] if item.whole_folder else item.folder))
+        chosen = None
+        for position in range(bisect.bisect_left(free, (item.cost, -1)), len(free)):
+            remaining, number = free[position]
+            chunk = chunks[number]
+            added = item.cost + sum(folder_costs[f] for f in needed if f not in chunk.open_folders)
+            if added <= remaining:
+                chosen = chunk
+                del free[position]
+                break
+        if chosen is None:
+            # nuovo chunk (anche se l'elemento da solo supera il budget)
+            added = item.cost + sum(folder_costs[f] for f in needed)
+            chosen = _Chunk(base_cost)
+            number = len(chunks)
+            chunks.append(chosen)
+        chosen.files.extend(item.files)
+        chosen.used += added
+        chosen.open_folders.update(needed)
+        bisect.insort(free, (capacity - chosen.used, number))
+
+    result = [(sorted(chunk.files), chunk.used) for chunk in chunks]
+    result.sort(key=lambda chunk: chunk[0][0])
+    return result
@@ -0,0 +1,225 @@
+"""
+Trasformazione del contenuto dei file sorgente per fs_to_dad, eseguita una volta per file
+in lettura (anche nei processi worker).
+
+Per ogni linguaggio registrato un'unica regex scandisce il testo in una sola passata,
+riconoscendo nell'ordine: letterali stringa (copiati invariati), commenti, spazi finali
+di riga e sequenze di righe vuote. La regex è provata solo sui caratteri che possono
+iniziare uno di questi token, il resto del testo è saltato dal motore. Così un "//" o un "#"
+dentro una stringa non viene mai scambiato per un commento e le stringhe multiriga
+restano intatte anche quando si compattano le righe vuote.
+
+Operazioni (indipendenti):
+- strip_comments: rimuove i commenti; le righe che contenevano solo un commento spariscono
+- collapse_blank_lines: al più una riga vuota consecutiva, nessuna in testa al file
+- trim_trailing_whitespace: rimuove spazi e tab a fine riga
+
+Linguaggi: C#, Python, JavaScript/TypeScript, XML (per estensione). Altri linguaggi si
+aggiungono con register_language. I file di altri tipi non vengono modificati.
+Limiti noti: i letterali regex di JS e le stringhe interpolate C# con virgolette annidate
+sono riconosciuti in modo approssimato.
+"""
+import os
+import re
+
+# commento /* ... */ fino al primo */
+_C_BLOCK = r"/\*[^*]*\*+(?:[^/*][^*]*\*+)*/"
+
+
+class CommentStripper:
+    """Tokenizzatore a passata singola per un linguaggio."""
+
+    # resto della riga vuoto dopo un commento a blocco (commento su riga intera)
+    _BLANK_REST = re.compile(r"[ \t]*(?:\n|\Z)")
+
+    def __init__(self, literals: list, start_chars: str, line_comment: str = None, block_comment: str = None,
+                 keep: list = None, block_separator: str = " "):
+        """
+        :param literals: Regex dei letterali stringa da copiare invariati (in ordine di priorità)
+        :param start_chars: Caratteri con cui può iniziare un letterale o un commento: la regex viene
+                            provata solo su questi (e sugli spazi), il resto del testo è saltato in C
+        :param line_comment: Regex dell'inizio di un commento fino a fine riga (es. "//", "#")
+        :param block_comment: Regex di un commento a blocco completo (es. /* ... */, <!-- ... -->)
+        :param keep: Altre regex da copiare invariate (es. sezioni CDATA)
+        :param block_separator: Testo che sostituisce un commento a blocco tra due token (" " nel codice,
+                                "" in XML dove il commento non separa il testo)
+        """
+        self.literals = list(literals) + list(keep or [])
+        self.start_chars = start_chars
+        self.line_comment = line_comment
+        self.block_comment = block_comment
+        self.block_separator = block_separator
+        self._regex_cache = {}
+
+    def _regex(self, trim_trailing_whitespace: bool, collapse_blank_lines: bool):
+        key = (trim_trailing_whitespace, collapse_blank_lines)
+        regex = self._regex_cache.get(key)
+        if regex is None:
+            groups = []
+            guard = self.start_chars
+            if self.literals:
+                groups.append(f"(?P<literal>{'|'.join(self.literals)})")
+            if self.line_comment:
+                groups.append(f"(?P<line>(?:{self.line_comment})[^\\n]*)")
+            if self.block_comment:
+                groups.append(f"(?P<block>{self.block_comment})")
+            if trim_trailing_whitespace:
+                groups.append(r"(?P<trailing>[ \t]+(?=\n|\Z))")
+                guard += " \t"
+            if collapse_blank_lines:
+                groups.append(r"(?P<blank_lines>\n(?:[ \t]*\n)+)")
+                guard += "\n"
+            regex = re.compile(f"(?=[{re.escape(guard)}])(?:{'|'.join(groups)})")
+            self._regex_cache[key] = regex
+        return regex
+
+    def transform(self, text: str, strip_comments: bool = True,
+                  collapse_blank_lines: bool = False, trim_trailing_whitespace: bool = False) -> str:
+        """
+        Applica le operazioni richieste in una sola scansione del testo.
+
+        :return: Testo trasformato
+        """
+        if not (strip_comments or collapse_blank_lines or trim_trailing_whitespace):
+            return text
+
+        out = []
+        # newline consecutivi (con soli spazi in mezzo) in fondo all'output: all'inizio
+        # vale come una riga vuota, così collapse_blank_lines rimuove quelle iniziali
+        trailing = 2
+        # dopo un commento su riga intera va scartato il newline che chiudeva la riga
+        drop_newline = False
+        pos = 0
+
+        def emit(piece):
+            nonlocal trailing, drop_newline
+            if drop_newline:
+                drop_newline = False
+                stripped = piece.lstrip(" \t")
+                if stripped.startswith("\n"):
+                    piece = stripped[1:]
+            if not piece:
+                return
+            out.append(piece)
+            content_end = len(piece.rstrip(" \t\n"))
+            if content_end:
+                trailing = piece.count("\n", content_end)
+            else:
+                trailing += piece.count("\n")
+
+        def at_line_start():
+            """Toglie gli spazi in fondo all'output e indica se si è a inizio riga."""
+            while out:
+                last = out[-1].rstrip(" \t")
+                if last:
+                    out[-1] = last
+                    return last.endswith("\n")
+                out.pop()
+            return True
+
+        for match in self._regex(trim_trailing_whitespace, collapse_blank_lines).finditer(text):
+            if match.start() > pos:
+                emit(text[pos:match.start()])
+            pos = match.end()
+            kind = match.lastgroup
+
+            if kind == "literal":
+                emit(match.group())
+            elif kind == "line" or kind == "block":
+                if not strip_comments:
+                    emit(match.group())
+                elif at_line_start() and (kind == "line" or self._BLANK_REST.match(text, pos)):
+                    drop_newline = True
+                elif kind == "block":
+                    # il commento non deve unire i token vicini né le righe
+                    if "\n" in match.group():
+                        emit("\n")
+                    elif pos < len(text) and not text[pos].isspace():
+                        emit(self.block_separator)
+            elif kind == "blank_lines":
+                count = match.group().count("\n")
+                if drop_newline:
+                    drop_newline = False
+                    count -= 1
+                emit("\n" * min(count, max(0, 2 - trailing)))
+            # trailing: spazi a fine riga scartati
+        emit(text[pos:])
+        return "".join(out)
+
+
+# registro dei linguaggi: nome -> CommentStripper, estensione -> nome
+LANGUAGES = {}
+EXTENSIONS = {}
+
+
+def register_language(name: str, extensions: list, stripper: CommentStripper):
+    """Registra (o sostituisce) il tokenizzatore di un linguaggio per le estensioni indicate."""
+    LANGUAGES[name] = stripper
+    for ext in extensions:
+        EXTENSIONS[ext.lower()] = name
+
+
+def language_for(file_name: str):
+    """Nome del linguaggio registrato per il file oppure None."""
+    return EXTENSIONS.get(os.path.splitext(file_name)[1].lower())
+
+
+def transform_content(file_name: str, text: str, strip_comments: bool = False,
+                      collapse_blank_lines: bool = False, trim_trailing_whitespace: bool = False) -> str:
+    """
+    Applica la trasformazione del linguaggio del file; i tipi non registrati restano invariati.
+
+    :param file_name: Nome del file (l'estensione sceglie il linguaggio)
+    :param text: Contenuto testuale già decodificato
+    """
+    language = language_for(file_name)
+    if language is None:
+        return text
+    return LANGUAGES[language].transform(text,
+                                         strip_comments=strip_comments,
+                                         collapse_blank_lines=collapse_blank_lines,
+                                         trim_trailing_whitespace=trim_trailing_whitespace)
+
+
+register_language("csharp", [".cs", ".csx"], CommentStripper(
+    start_chars="\"'@$/",
+    literals=[
+        r'\$*"""[\s\S]*?"""',                 # raw string (C# 11)
+        r'(?:\$@|@\$?)"(?:[^"]|"")*"',        # verbatim, anche interpolata
+        r'\$?"(?:[^"\\\n]|\\.)*"',            # stringa, anche interpolata
+        r"'(?:[^'\\\n]|\\.)+'",               # carattere
+    ],
+    line_comment=r"//",                       # comprende i commenti di documentazione ///
+    block_comment=_C_BLOCK,
+))
+
+register_language("python", [".py", ".pyw", ".pyi"], CommentStripper(
+    start_chars="\"'#",
+    literals=[
+        r'"""(?:[^"\\]|\\[\s\S]|"(?!""))*"""',
+        r"'''(?:[^'\\]|\\[\s\S]|'(?!''))*'''",
+        r'"(?:[^"\\\n]|\\[\s\S])*"',
+        r"'(?:[^'\\\n]|\\[\s\S])*'",
+    ],
+    line_comment=r"#",
+))
+
+register_language("javascript", [".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts"], CommentStripper(
+    start_chars="`\"'/",
+    literals=[
+        r"`(?:[^`\\]|\\[\s\S])*`",            # template literal
+        r'"(?:[^"\\\n]|\\.)*"',
+        r"'(?:[^'\\\n]|\\.)*'",
+    ],
+    line_comment=r"//",
+    block_comment=_C_BLOCK,
+))
+
+register_language("xml", [".xml", ".csproj", ".vbproj", ".fsproj", ".props", ".targets", ".config",
+                          ".xaml", ".resx", ".nuspec", ".xsd", ".xsl", ".xslt", ".svg"], CommentStripper(
+    start_chars="<",
+    literals=[],
+    block_comment=r"<!--[\s\S]*?-->",
+    keep=[r"<!\[CDATA\[[\s\S]*?\]\]>"],
+    block_separator="",
+))
@@ -0,0 +1,52 @@
+"""
+Main script per il ripristino di un documento DAD in un albero di cartelle.
+
+Uso:
+    python dad2fs.py progetto.xml --target ./ripristino
+    python dad2fs.py progetto.part1.xml progetto.part2.xml --target ./ripristino --workers 16
+    python dad2fs.py progetto.xml.gz --target ./ripristino --mode raw
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from _modules.logging.logging import configure_logging, create_logger
+from dad_to_fs import dad_to_fs, MODES, MODE_AUTO
+
+configure_logging(
+    enable_file_logging=False,
+    log_level=logging.INFO,
+    enable_console_logging=True,
+    console_level=logging.INFO,
+    console_format={
+        'default': "%(asctime)s - %(levelname)-8s - %(name)s - %(message)s",
+        'info': "%(asctime)s - %(name)s - %(message)s",
+    },
+    console_style="icon"
+)
+logger = create_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ricrea cartelle e file da un documento DAD generato da fs2dad.py")
+    parser.add_argument("dad", nargs="+", help="Documento DAD o tutte le sue parti (.xml, .xml.gz, .xml.xz, .xml.bz2)")
+    parser.add_argument("--target", required=True, help="Cartella di destinazione")
+    parser.add_argument("--workers", type=int, default=0, help="Thread di scrittura (0 = automatico)")
+    parser.add_argument("--mode", choices=MODES, default=MODE_AUTO,
+                        help="Variante del documento: xml (--sanitize/--cdata), raw (senza sanitize), auto")
+    args = parser.parse_args()
+
+    success, message = dad_to_fs(args.dad, args.target, workers=args.workers, mode=args.mode)
+    if success:
+        logger.success(message)
+    else:
+        logger.error(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Modalità batch di fs2dad: più target in un solo processo.
+
+Rispetto a un ciclo di shell che lancia fs2dad.py per ogni repository, avvio dell'interprete,
+import (charset_normalizer, colorama), configurazione del logging e pool di processi sono
+pagati una volta sola:
+- un unico ProcessPoolExecutor legge i file di tutti i target (i worker restano caldi)
+- fino a jobs target sono visitati e scritti in parallelo da thread del processo principale,
+  tutti alimentano lo stesso pool
+- i target partono dal più grande (dimensione dell'output della run precedente, i target
+  senza output precedente per primi): i più lunghi non restano in coda alla fine
+- le decisioni dei pattern sono condivise tra target con gli stessi pattern (PatternMatcher.shared)
+
+Al termine ogni BatchTarget riporta esito, messaggio, durata e RunStats.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fs_to_dad import fs_to_dad
+from file_ingest import read_files_batch
+from dad_writer import part_file_name
+from run_stats import RunStats
+
+# target visitati contemporaneamente quando la lettura avviene nel pool
+DEFAULT_JOBS = 4
+
+
+class BatchTarget:
+    """Target della modalità batch: argomenti di fs_to_dad, stima per l'ordinamento ed esito."""
+
+    def __init__(self, label: str, arguments: dict):
+        """
+        :param label: Nome del target nel riepilogo (file di configurazione o cartella)
+        :param arguments: Argomenti di fs_to_dad (vedi AppConfig.fs_to_dad_arguments)
+        """
+        self.label = label
+        self.arguments = arguments
+        self.estimated_size = estimate_output_size(arguments["output_file"])
+        self.success = None
+        self.message = None
+        self.seconds = 0.0
+        self.stats = None
+
+
+def estimate_output_size(output_file: str):
+    """
+    Dimensione dell'output della run precedente (file unico, parti o chunk), usata come stima
+    del lavoro del target.
+
+    :return: Byte, None se non esiste un output precedente
+    """
+    if os.path.exists(output_file):
+        return os.path.getsize(output_file)
+    total = 0
+    for kind in ("part", "chunk"):
+        number = 1
+        while os.path.exists(file_name := part_file_name(output_file, number, kind)):
+            total += os.path.getsize(file_name)
+            number += 1
+    return total or None
+
+
+def schedule(targets: list) -> list:
+    """Ordine di esecuzione: prima i target senza stima, poi dal più grande al più piccolo."""
+    return sorted(targets, key=lambda target: (target.estimated_size is not None, -(target.estimated_size or 0)))
+
+
+def run_batch(targets: list, workers: int = 0, jobs: int = 0, timed: bool = False) -> list:
+    """
+    Esegue fs_to_dad per ogni target con un pool di processi condiviso.
+
+    :param targets: Lista di BatchTarget
+    :param workers: Processi del pool condiviso (0 = numero di CPU; 1 = lettura nei thread, senza pool)
+    :param jobs: Target elaborati contemporaneamente (0 = automatico)
+    :param timed: Misura i tempi per fase di ogni target (RunStats)
+    :return: I target nell'ordine di esecuzione, con esito e statistiche
+    """
+    workers = workers or os.cpu_count() or 1
+    # senza pool la lettura avviene nei thread e il GIL la serializza: un target alla volta
+    jobs = jobs or (min(len(targets), DEFAULT_JOBS) if workers > 1 else 1)
+    ordered = schedule(targets)
+    logger.info(f"Batch: {len(targets)} target, pool di {workers if workers > 1 else 0} processi, {jobs} in parallelo")
+
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            # avvia i processi (e i loro import) prima dei thread: con fork i processi vengono
+            # creati tutti alla prima submit, mai da un processo con altri thread attivi
+            executor.submit(read_files_batch, [], {}).result()
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch") as threads:
+            futures = [threads.submit(_run_target, target, executor, workers, timed) for target in ordered]
+            for future in futures:
+                future.result()
+    return ordered
+
+
+def _run_target(target: BatchTarget, executor, workers: int, timed: bool):
+    target.stats = RunStats(timed=timed)
+    arguments = dict(target.arguments, workers=workers)
+    started = time.perf_counter()
+    try:
+        target.success, target.message = fs_to_dad(**arguments, stats=target.stats, executor=executor)
+    except Exception as e:
+        target.success, target.message = False, f"Errore [{e}] - target: {target.label}"
+    target.seconds = time.perf_counter() - started
+    if target.success:
+        logger.success(f"{target.label}: {target.message}")
+    else:
+        logger.error(f"{target.label}: {target.message}")
+
+
+def format_batch_report(targets: list) -> str:
+    """Tabella di riepilogo: una riga per target nell'ordine di esecuzione e il totale."""
+    lines = [f"{'Target':<40}{'Esito':>6}{'File':>9}{'MB letti':>10}{'MB scritti':>11}{'Secondi':>9}"]
+    for target in targets:
+        counters = target.stats.counters if target.stats else {}
+        label = target.label if len(target.label) <= 39 else "…" + target.label[-38:]
+        lines.append(f"{label:<40}{'ok' if target.success else 'ERR':>6}{counters.get('files_included', 0):>9,}"
+                     f"{counters.get('bytes_read', 0) / 1e6:>10.1f}{counters.get('bytes_written', 0) / 1e6:>11.1f}"
+                     f"{target.seconds:>9.2f}")
+    failed = sum(1 for target in targets if not target.success)
+    lines.append(f"{len(targets)} target, {failed} falliti")
+    return "\n".join(lines)
+
+
+def batch_report_dict(targets: list) -> list:
+    """Riepilogo serializzabile in JSON, con le statistiche complete di ogni target."""
+    return [{
+        "target": target.label,
+        "output": target.arguments["output_file"],
+        "success": target.success,
+        "message": target.message,
+        "seconds": round(target.seconds, 3),
+        "stats": target.stats.to_dict() if target.stats else None,
+    } for target in targets]
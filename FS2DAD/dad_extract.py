@@ -0,0 +1,55 @@
+"""
+Estrae singoli file da un documento DAD usando l'indice nome.xml.dadidx (fs2dad.py --index),
+con un seek sul file di output invece dell'analisi dell'intero XML.
+
+Uso:
+    python dad_extract.py progetto.xml.dadidx --list
+    python dad_extract.py progetto.xml.dadidx src/Program.cs [altri percorsi...]
+    python dad_extract.py progetto.xml.dadidx src/Program.cs --output Program.cs
+    python dad_extract.py progetto.xml.dadidx src/Program.cs --element
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from _modules.logging.logging import create_logger
+from dad_index import DadIndex
+
+logger = create_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estrae file da un documento DAD tramite l'indice .dadidx")
+    parser.add_argument("index", help="File indice (nome.xml.dadidx)")
+    parser.add_argument("paths", nargs="*", help="Percorsi relativi dei file da estrarre (separatore /)")
+    parser.add_argument("--list", action='store_true', help="Elenca i file indicizzati")
+    parser.add_argument("--element", action='store_true', help="Stampa l'elemento <File> invece del contenuto")
+    parser.add_argument("--output", help="Scrive il contenuto nel file indicato (un solo percorso)")
+    args = parser.parse_args()
+
+    if args.output and len(args.paths) != 1:
+        parser.error("--output richiede un solo percorso")
+
+    with DadIndex(args.index) as index:
+        if args.list:
+            for rel_path in index.paths():
+                print(rel_path)
+
+        for rel_path in args.paths:
+            if rel_path not in index:
+                logger.error(f"File non presente nell'indice: {rel_path}")
+                return 1
+            text = index.read_element(rel_path) if args.element else index.read_content(rel_path)
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    f.write(text)
+            else:
+                sys.stdout.write(text if text.endswith("\n") or not text else text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Indice per l'accesso diretto ai file di un documento DAD (nome.xml.dadidx).
+
+fs_to_dad con index=True scrive accanto all'output un indice JSON che associa a ogni
+percorso relativo (rispetto alla cartella target, separatore "/") la posizione in byte
+del suo elemento File e del suo contenuto. Con l'indice un file si estrae con un seek e
+una read, senza analizzare il documento:
+
+    with DadIndex("progetto.xml.dadidx") as index:
+        text = index.read_content("src/Program.cs")
+
+Formato di ogni voce (lista, per contenere la dimensione dell'indice):
+    [parte, offset, lunghezza, parte_contenuto, offset_contenuto, lunghezza_contenuto, livello_contenuto]
+- parte: posizione in "parts" del file che contiene l'elemento (più parti con split_size)
+- offset/lunghezza: byte dell'elemento <File ...>...</File> nella parte
+- *_contenuto: byte del contenuto (testo o CDATA, indentato come nel documento); con la
+  deduplicazione un file Ref punta al contenuto del primo esemplare, anche in un'altra parte
+- livello_contenuto: ripetizioni di indent_chars davanti a ogni riga del contenuto
+
+Gli offset si riferiscono ai byte non compressi: con output .gz/.xz/.bz2 la lettura funziona
+ma il seek decomprime il file fino alla posizione (accesso non più O(1)).
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import json
+from xml.sax import saxutils
+from _modules.file_utils import open_input
+
+INDEX_SUFFIX = ".dadidx"
+INDEX_VERSION = 1
+
+# posizione dei campi di una voce
+(ENTRY_PART, ENTRY_OFFSET, ENTRY_LENGTH,
+ ENTRY_CONTENT_PART, ENTRY_CONTENT_OFFSET, ENTRY_CONTENT_LENGTH, ENTRY_CONTENT_LEVEL) = range(7)
+
+CDATA_START = "<![CDATA["
+CDATA_END = "]]>"
+
+
+def save_index(index_path: str, part_files: list, entries: dict, settings: dict):
+    """
+    Scrive l'indice JSON.
+
+    :param part_files: File di output in ordine di parte (uno solo senza split_size)
+    :param entries: {percorso relativo: voce}
+    :param settings: Opzioni di scrittura necessarie a decodificare il contenuto
+                     (encoding, newline, indent_chars, sanitize, cdata)
+    """
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    data = {
+        "version": INDEX_VERSION,
+        # percorsi relativi all'indice: output e indice possono essere spostati insieme
+        "parts": [os.path.relpath(os.path.abspath(part), index_dir) for part in part_files],
+        **settings,
+        "files": entries,
+    }
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    logger.debug(f"Indice scritto: {index_path} ({len(entries)} file)")
+
+
+class DadIndex:
+    """Lettore dell'indice: estrae elementi e contenuti dei file con seek sui file di output."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.parts = []
+        self.files = {}
+        self.settings = {}
+        self._handles = {}
+
+    def open(self):
+        with open(self.index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Versione dell'indice non supportata: {data.get('version')} ({self.index_path})")
+        index_dir = os.path.dirname(os.path.abspath(self.index_path))
+        self.parts = [os.path.join(index_dir, part) for part in data.pop("parts")]
+        self.files = data.pop("files")
+        self.settings = data
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __contains__(self, rel_path):
+        return rel_path in self.files
+
+    def paths(self) -> list:
+        """Percorsi relativi dei file indicizzati, in ordine di documento."""
+        return list(self.files)
+
+    def _read(self, part: int, offset: int, length: int) -> bytes:
+        handle = self._handles.get(part)
+        if handle is None:
+            handle = self._handles[part] = open_input(self.parts[part])
+        handle.seek(offset)
+        return handle.read(length)
+
+    def _decode(self, data: bytes) -> str:
+        text = data.decode(self.settings["encoding"])
+        newline = self.settings["newline"]
+        return text.replace(newline, "\n") if newline != "\n" else text
+
+    def read_element(self, rel_path: str) -> str:
+        """
+        Elemento <File ...>...</File> del file così come compare nel documento.
+
+        :raises KeyError: se il percorso non è nell'indice
+        """
+        entry = self.files[rel_path]
+        return self._decode(self._read(entry[ENTRY_PART], entry[ENTRY_OFFSET], entry[ENTRY_LENGTH]))
+
+    def read_content(self, rel_path: str) -> str:
+        """
+        Contenuto del file: senza l'indentazione del documento, senza escape (sanitize)
+        e senza involucro CDATA. Le righe sono separate da "\n".
+
+        :raises KeyError: se il percorso non è nell'indice
+        """
+        entry = self.files[rel_path]
+        if not entry[ENTRY_CONTENT_LENGTH]:
+            return ""
+        text = self._decode(self._read(entry[ENTRY_CONTENT_PART],
+                                       entry[ENTRY_CONTENT_OFFSET],
+                                       entry[ENTRY_CONTENT_LENGTH]))
+        indent_chars = self.settings["indent_chars"]
+        if indent_chars:
+            prefix = indent_chars * entry[ENTRY_CONTENT_LEVEL]
+            text = "\n".join(line[len(prefix):] if line.startswith(prefix) else line
+                             for line in text.split("\n"))
+        if self.settings["cdata"]:
+            if text.startswith(CDATA_START) and text.endswith(CDATA_END):
+                text = text[len(CDATA_START):-len(CDATA_END)]
+            # sequenze "]]>" spezzate da XMLNode.sanitize_cdata
+            return text.replace("]]]]><![CDATA[>", "]]>")
+        if self.settings["sanitize"]:
+            return saxutils.unescape(text)
+        return text
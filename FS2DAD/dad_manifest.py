@@ -0,0 +1,114 @@
+"""
+Manifest persistente per la rigenerazione incrementale di fs_to_dad.
+
+Il manifest è un database SQLite accanto all'output (nome.xml.manifest) con una riga
+per file: percorso relativo, size, mtime_ns, inode, encoding, hash del contenuto,
+contenuto già elaborato e flag binario. Alla run successiva i file con size/mtime_ns/inode invariati
+riusano il contenuto salvato senza aprire il file né rilevarne l'encoding.
+
+Le opzioni che cambiano il contenuto elaborato (es. remove_xml_comments) sono salvate
+nel manifest: se differiscono, la cache viene svuotata.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import json
+import sqlite3
+from file_ingest import FileRecord
+
+MANIFEST_SUFFIX = ".manifest"
+MANIFEST_VERSION = 3
+
+
+class DadManifest:
+    """Cache dei file letti, indicizzata per percorso relativo alla cartella target."""
+
+    def __init__(self, manifest_path: str, options: dict):
+        """
+        :param manifest_path: Percorso del database del manifest
+        :param options: Opzioni che influenzano il contenuto elaborato dei file
+        """
+        self.manifest_path = manifest_path
+        self.options = json.dumps({"version": MANIFEST_VERSION, **options}, sort_keys=True)
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._run = 0
+
+    def open(self):
+        self._conn = sqlite3.connect(self.manifest_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS options (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM options WHERE key = 'options'").fetchone()
+        if not row or row[0] != self.options:
+            if row:
+                logger.info(f"Opzioni o versione cambiate, manifest azzerato: {self.manifest_path}")
+            # la tabella viene ricreata: una versione precedente può avere colonne diverse
+            self._conn.execute("DROP TABLE IF EXISTS files")
+            self._conn.execute("INSERT OR REPLACE INTO options VALUES ('options', ?)", (self.options,))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, "
+            "encoding TEXT, hash TEXT, name TEXT, content TEXT, binary INTEGER, run INTEGER)"
+        )
+        row = self._conn.execute("SELECT value FROM options WHERE key = 'run'").fetchone()
+        self._run = int(row[0]) + 1 if row else 1
+        self._conn.execute("INSERT OR REPLACE INTO options VALUES ('run', ?)", (str(self._run),))
+
+    def lookup(self, rel_path: str, stat_result):
+        """
+        Restituisce il FileRecord salvato se il file non è cambiato, altrimenti None.
+
+        :param rel_path: Percorso relativo del file
+        :param stat_result: os.stat_result del file
+        """
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, encoding, hash, name, content, binary FROM files WHERE path = ?",
+            (rel_path,)
+        ).fetchone()
+        if row and row[0] == stat_result.st_size and row[1] == stat_result.st_mtime_ns and row[2] == stat_result.st_ino:
+            self._conn.execute("UPDATE files SET run = ? WHERE path = ?", (self._run, rel_path))
+            self.hits += 1
+            return FileRecord(row[5], row[6], size=row[0], encoding=row[3], hash=row[4], binary=bool(row[7]))
+        self.misses += 1
+        return None
+
+    def keep_folder(self, rel_path: str):
+        """
+        Conserva le righe dei file sotto rel_path senza lookup: il sottoalbero è riusato
+        dalla run precedente (modalità watch) e i suoi file restano validi.
+        """
+        # "/" precede "0": l'intervallo contiene esattamente i percorsi che iniziano con rel_path + "/"
+        self._conn.execute("UPDATE files SET run = ? WHERE path >= ? AND path < ?",
+                           (self._run, rel_path + "/", rel_path + "0"))
+
+    def store(self, rel_path: str, stat_result, record: FileRecord):
+        """Salva il file letto; gli errori di lettura non vengono salvati, così la run successiva riprova."""
+        if record.error:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel_path, stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino,
+             record.encoding, record.hash, record.name, record.content, int(record.binary), self._run)
+        )
+
+    def close(self):
+        """Rimuove i file non più presenti e salva il manifest."""
+        self._conn.execute("DELETE FROM files WHERE run IS NOT ?", (self._run,))
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        logger.debug(f"Manifest {self.manifest_path}: riusati {self.hits}, letti {self.misses}")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._conn:
+            # run interrotta: il manifest precedente resta valido
+            self._conn.rollback()
+            self._conn.close()
+            self._conn = None
+        return False
@@ -0,0 +1,347 @@
+"""
+Ripristino di un documento DAD in un albero di cartelle (inverso di fs_to_dad).
+
+Il documento viene letto in streaming e trasformato negli stessi eventi della visita di
+fs_to_dad (EVENT_FOLDER, EVENT_FILE, EVENT_FOLDER_END); le scritture dei file sono affidate
+a un pool di thread con un numero limitato di file in attesa, così la memoria resta
+limitata al file più grande anche per documenti di diversi GB.
+
+Varianti del documento:
+- xml: output con sanitize o cdata, XML valido. Letto con ElementTree.iterparse, ogni
+  elemento viene svuotato e staccato dal padre appena elaborato.
+- raw: output senza sanitize, il contenuto dei file non è escapato e in genere non è XML
+  valido. Letto con uno scanner dei soli tag strutturali: con indentazione la chiusura
+  di un File è la riga "</File>" al suo livello (le righe del contenuto hanno un livello
+  in più), senza indentazione è il primo "</File>" seguito da un tag strutturale.
+- auto: usa le opzioni dell'indice .dadidx se presente, altrimenti prova xml e in caso
+  di errore di parsing ricomincia come raw. Un documento raw che per caso è XML valido
+  verrebbe letto come xml (le entità come &amp; nel contenuto sarebbero convertite):
+  per questi documenti conviene indicare la variante.
+
+La prima cartella del documento è la cartella target di fs_to_dad: il suo contenuto viene
+scritto direttamente nella cartella di destinazione. Con più parti (split_size) si passano
+tutti i file nome.partN.xml; i riferimenti Ref della deduplicazione diventano copie del
+primo esemplare, anche tra parti diverse.
+
+I file con Encoding="base64" (binari, binary_base64_max_bytes) vengono decodificati e
+scritti byte per byte.
+
+Limiti: l'indentazione del documento non conserva il newline finale dei file di testo;
+i file binari senza contenuto nel documento vengono ripristinati vuoti.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import io
+import os
+import re
+import json
+import base64
+import shutil
+import threading
+import concurrent.futures
+import xml.etree.ElementTree as ET
+from xml.sax import saxutils
+from _modules.file_utils import open_input
+from file_ingest import EVENT_FOLDER, EVENT_FILE, EVENT_FOLDER_END
+from dad_writer import FILE_HASH_ATTRIBUTE, FILE_REF_ATTRIBUTE, FILE_ENCODING_ATTRIBUTE
+from dad_index import INDEX_SUFFIX
+
+MODE_AUTO = "auto"
+MODE_XML = "xml"
+MODE_RAW = "raw"
+MODES = [MODE_AUTO, MODE_XML, MODE_RAW]
+
+# caratteri letti per volta dallo scanner raw
+READ_CHUNK = 1 << 20
+# file inviati al pool e non ancora scritti, per thread
+PENDING_PER_WORKER = 8
+
+# tag strutturale del documento (header, DataArchitectureDesign, Create, FileSystem, Folder, File)
+_TAG = re.compile(r'\s*<(?P<closing>/?)(?P<tag>[?\w]+)(?P<attributes>[^>]*?)(?P<empty>/?)>')
+_ATTRIBUTE = re.compile(r'(\w+)="([^"]*)"')
+# senza indentazione: chiusura di un File seguita da un altro tag strutturale o dalla fine
+_COMPACT_FILE_END = re.compile(r'</File>(?=\s*(?:<File[\s/>]|<Folder[\s>]|</Folder>|</FileSystem>|\Z))')
+# la riga del nodo Create (livello 1) rivela i caratteri di indentazione
+_CREATE_LINE = re.compile(r'\n([ \t]*)<Create[\s/>]')
+
+
+def detect_indent(dad_file: str) -> str:
+    """Caratteri di indentazione usati da fs_to_dad ("" = documento senza indentazione)."""
+    with open_input(dad_file) as f:
+        head = f.read(4096).decode("utf-8", errors="replace")
+    match = _CREATE_LINE.search(head)
+    return match.group(1) if match else ""
+
+
+def _strip_indent(text: str, indent_chars: str, level: int) -> str:
+    """Toglie separatori e indentazione dal testo di un File di livello level."""
+    if not indent_chars:
+        return text
+    if text.startswith("\n"):
+        text = text[1:]
+    closing = "\n" + indent_chars * level
+    if text.endswith(closing):
+        text = text[:-len(closing)]
+    prefix = indent_chars * (level + 1)
+    return "\n".join(line[len(prefix):] if line.startswith(prefix) else line for line in text.split("\n"))
+
+
+def iter_dad_xml(dad_file: str, indent_chars: str = ""):
+    """
+    Eventi di un documento XML valido (sanitize o cdata) letto con iterparse.
+
+    :return: Generatore di (EVENT_FOLDER, nome), (EVENT_FILE, (nome, contenuto, attributi)), (EVENT_FOLDER_END, None)
+    """
+    elements = []
+    with open_input(dad_file) as f:
+        for event, element in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                # un tag dentro un File è contenuto non escapato: il documento è raw
+                if elements and elements[-1].tag == "File":
+                    raise ET.ParseError(f"tag <{element.tag}> nel contenuto di un File")
+                elements.append(element)
+                if element.tag == "Folder":
+                    yield EVENT_FOLDER, element.get("Name")
+                continue
+
+            elements.pop()
+            if element.tag == "File":
+                # livello del File = numero di elementi aperti (DataArchitectureDesign è il livello 0)
+                content = _strip_indent(element.text, indent_chars, len(elements)) if element.text else None
+                yield EVENT_FILE, (element.get("Name"), content, dict(element.attrib))
+            elif element.tag == "Folder":
+                yield EVENT_FOLDER_END, None
+            else:
+                continue
+            # memoria costante: l'elemento elaborato viene svuotato e staccato dal padre
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
+
+def iter_dad_raw(dad_file: str, indent_chars: str = ""):
+    """
+    Eventi di un documento senza sanitize (contenuto non escapato), letto a blocchi.
+    Stessi eventi di iter_dad_xml.
+
+    :raises ValueError: se il documento non ha la struttura prodotta da fs_to_dad
+    """
+    with io.TextIOWrapper(open_input(dad_file), encoding="utf-8", newline="") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            """Scarta il testo già elaborato e legge il blocco successivo."""
+            nonlocal buffer, pos, eof
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        depth = 0
+        while True:
+            if not eof and len(buffer) - pos < READ_CHUNK // 2:
+                fill()
+            match = _TAG.match(buffer, pos)
+            if match is None:
+                if eof and not buffer[pos:].strip():
+                    return
+                raise ValueError(f"Tag non riconosciuto in {dad_file}: {buffer[pos:pos + 80]!r}")
+            pos = match.end()
+            tag = match.group("tag")
+            if tag.startswith("?"):
+                continue
+            if match.group("closing"):
+                depth -= 1
+                if tag == "Folder":
+                    yield EVENT_FOLDER_END, None
+                continue
+
+            attributes = {name: saxutils.unescape(value, {"&quot;": '"'})
+                          for name, value in _ATTRIBUTE.findall(match.group("attributes"))}
+            empty = bool(match.group("empty"))
+            if tag == "Folder":
+                yield EVENT_FOLDER, attributes.get("Name")
+                if empty:
+                    yield EVENT_FOLDER_END, None
+            if tag != "File":
+                if not empty:
+                    depth += 1
+                continue
+            if empty:
+                yield EVENT_FILE, (attributes.get("Name"), None, attributes)
+                continue
+
+            # contenuto fino alla chiusura del File; il buffer cresce fino a contenerla
+            marker = "\n" + indent_chars * depth + "</File>"
+            search_from = pos
+            while True:
+                if indent_chars:
+                    end = buffer.find(marker, search_from)
+                    closing_end = end + len(marker)
+                else:
+                    found = _COMPACT_FILE_END.search(buffer, search_from)
+                    # la chiusura vale solo se il tag successivo è già nel buffer
+                    end = found.start() if found and (eof or found.end() + 64 < len(buffer)) else -1
+                    closing_end = end + len("</File>")
+                if end >= 0:
+                    break
+                if eof:
+                    raise ValueError(f"Chiusura di File mancante in {dad_file}: {attributes.get('Name')}")
+                search_from = max(pos, len(buffer) - len(marker) - 64) - pos
+                fill()
+            content = _strip_indent(buffer[pos:end], indent_chars, depth)
+            pos = closing_end
+            yield EVENT_FILE, (attributes.get("Name"), content, attributes)
+
+
+def _index_settings(dad_file: str):
+    """Opzioni di scrittura dall'indice .dadidx del documento (anche per le parti), oppure None."""
+    base = re.sub(r"\.part\d+(?=\.)", "", dad_file)
+    for index_file in (dad_file + INDEX_SUFFIX, base + INDEX_SUFFIX):
+        if os.path.exists(index_file):
+            with open(index_file, encoding="utf-8") as f:
+                data = json.load(f)
+            return data
+    return None
+
+
+def _safe_name(name):
+    """Nome di file o cartella utilizzabile come singolo componente di percorso."""
+    if not name or name in (".", "..") or "/" in name or (os.sep in name) or (os.altsep and os.altsep in name):
+        raise ValueError(f"Nome non valido nel documento: {name!r}")
+    return name
+
+
+class _WriterPool:
+    """Pool di thread per le scritture con un limite ai file in attesa (memoria costante)."""
+
+    def __init__(self, workers: int):
+        # 0 = stesso default di ThreadPoolExecutor
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.limit = workers * PENDING_PER_WORKER
+        self.errors = []
+        self._slots = threading.Semaphore(self.limit)
+
+    def submit(self, function, *args):
+        self._slots.acquire()
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        if future.exception():
+            self.errors.append(future.exception())
+        self._slots.release()
+
+    def drain(self):
+        """Attende la fine di tutte le scritture inviate."""
+        for _ in range(self.limit):
+            self._slots.acquire()
+        for _ in range(self.limit):
+            self._slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def _write_file(path, content, content_encoding=None):
+    if content_encoding == "base64":
+        # b64decode ignora newline e indentazione tra le righe
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(content or ""))
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(content or "")
+
+
+def _copy_file(path, source_path, source_future):
+    # il primo esemplare è stato inviato prima: è già in esecuzione o completato
+    source_future.result()
+    shutil.copyfile(source_path, path)
+
+
+def _restore(events, target_folder, pool, first_by_hash, counters):
+    """Consuma gli eventi di un documento creando cartelle e inviando le scritture al pool."""
+    folders = []
+    for event, value in events:
+        if event == EVENT_FOLDER:
+            folders.append(_safe_name(value))
+            # la prima cartella è la cartella target di fs_to_dad
+            os.makedirs(os.path.join(target_folder, *folders[1:]), exist_ok=True)
+        elif event == EVENT_FOLDER_END:
+            folders.pop()
+        else:
+            name, content, attributes = value
+            path = os.path.join(target_folder, *folders[1:], _safe_name(name))
+            ref = attributes.get(FILE_REF_ATTRIBUTE)
+            if ref and ref in first_by_hash:
+                pool.submit(_copy_file, path, *first_by_hash[ref])
+                counters["refs"] += 1
+            else:
+                future = pool.submit(_write_file, path, content, attributes.get(FILE_ENCODING_ATTRIBUTE))
+                if FILE_HASH_ATTRIBUTE in attributes:
+                    first_by_hash[attributes[FILE_HASH_ATTRIBUTE]] = (path, future)
+            counters["files"] += 1
+
+
+def dad_to_fs(dad_files, target_folder: str, workers: int = 0, mode: str = MODE_AUTO) -> tuple:
+    """
+    Ricrea cartelle e file descritti da uno o più documenti DAD.
+
+    :param dad_files: Documento DAD o lista delle parti (.xml, .xml.gz, .xml.xz, .xml.bz2)
+    :param target_folder: Cartella di destinazione (creata se non esiste)
+    :param workers: Thread di scrittura (0 = default di ThreadPoolExecutor)
+    :param mode: "auto", "xml" (sanitize/cdata) o "raw" (senza sanitize)
+    :return: Tupla (successo: bool, messaggio: str)
+    """
+    if isinstance(dad_files, str):
+        dad_files = [dad_files]
+    if mode not in MODES:
+        return False, f"mode non valido: {mode} (ammessi: {', '.join(MODES)})"
+    for dad_file in dad_files:
+        if not os.path.exists(dad_file):
+            return False, f"File {dad_file} non trovato"
+
+    os.makedirs(target_folder, exist_ok=True)
+    pool = _WriterPool(workers)
+    first_by_hash = {}
+    counters = {"files": 0, "refs": 0}
+    try:
+        for dad_file in dad_files:
+            file_mode = mode
+            indent_chars = detect_indent(dad_file)
+            if file_mode == MODE_AUTO:
+                settings = _index_settings(dad_file)
+                if settings:
+                    file_mode = MODE_XML if settings["sanitize"] or settings["cdata"] else MODE_RAW
+                    indent_chars = settings["indent_chars"]
+            logger.debug(f"Ripristino {dad_file}: variante {file_mode}, indentazione {indent_chars!r}")
+
+            if file_mode == MODE_RAW:
+                _restore(iter_dad_raw(dad_file, indent_chars), target_folder, pool, first_by_hash, counters)
+                continue
+            restored = dict(counters)
+            try:
+                _restore(iter_dad_xml(dad_file, indent_chars), target_folder, pool, first_by_hash, counters)
+            except ET.ParseError as e:
+                if file_mode != MODE_AUTO:
+                    raise
+                # documento senza sanitize: si ricomincia con lo scanner, sovrascrivendo i file già scritti
+                logger.info(f"{dad_file} non è XML valido ({e}): ripristino come raw")
+                pool.drain()
+                counters.update(restored)
+                _restore(iter_dad_raw(dad_file, indent_chars), target_folder, pool, first_by_hash, counters)
+    except (ValueError, ET.ParseError, OSError) as e:
+        pool.shutdown()
+        return False, f"Ripristino interrotto: {e}"
+    pool.shutdown()
+
+    if pool.errors:
+        for error in pool.errors[:10]:
+            logger.error(f"Scrittura fallita: {error}")
+        return False, f"Ripristinati {counters['files'] - len(pool.errors)} file in {target_folder}, {len(pool.errors)} errori"
+    return True, f"Ripristinati {counters['files']} file ({counters['refs']} da riferimento) in {target_folder}"
@@ -0,0 +1,443 @@
+"""
+Modalità watch di fs2dad: rigenera l'output quando cambia la cartella target.
+
+- su Linux le modifiche arrivano da inotify (via ctypes, una watch per cartella); altrove,
+  o se inotify non è disponibile (limite max_user_watches), si confrontano a intervalli
+  size e mtime_ns dei file letti con os.scandir
+- le cartelle che la visita di fs_to_dad salterebbe (EXCLUDE_FOLDERS: bin, obj, .git, ...)
+  non sono osservate, né con inotify né con il polling; le modifiche ai file esclusi sono ignorate
+- con l'opzione gitignore anche le cartelle ignorate dai .gitignore non sono osservate; la
+  modifica di un .gitignore cambia le regole dell'intero sottoalbero e comporta una
+  rigenerazione completa
+- le modifiche ravvicinate sono raccolte finché la cartella resta ferma per debounce secondi
+  (al più MAX_DEBOUNCE_WAIT secondi dopo la prima)
+- i file generati dalla run (output, parti, chunk, manifest, indice) non riattivano la rigenerazione
+- a ogni rigenerazione sono visitate solo le cartelle modificate e i loro antenati: i sottoalberi
+  invariati sono riemessi dalla run precedente (SubtreeCache) senza scandir né lettura dei file.
+  Con --incremental anche i file invariati delle cartelle modificate non vengono riletti.
+
+La SubtreeCache tiene in memoria gli eventi dell'ultima run con il contenuto dei file, come
+l'albero di DadTreeWriter.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import sys
+import time
+import errno
+import ctypes
+import select
+import struct
+from fs_to_dad import fs_to_dad
+from file_ingest import FileRecord, EVENT_FOLDER, EVENT_FILE, EVENT_FOLDER_END, EVENT_SUBTREE
+from _modules.file_utils import compression_suffix
+from pattern_matcher import PatternMatcher
+from gitignore_rules import GitignoreRules, GITIGNORE_FILE
+from run_stats import RunStats
+
+# secondi senza modifiche prima di rigenerare
+DEFAULT_DEBOUNCE = 0.5
+# attesa massima dalla prima modifica: una scrittura continua non rinvia la rigenerazione all'infinito
+MAX_DEBOUNCE_WAIT = 10.0
+# intervallo del polling in secondi
+POLL_INTERVAL = 1.0
+
+# costanti di <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+# struct inotify_event: wd, mask, cookie, len, seguito dal nome (len byte)
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+
+class SubtreeCache:
+    """
+    Eventi dell'ultima run con l'intervallo occupato da ogni cartella: una cartella non
+    invalidata viene riemessa copiando il suo intervallo.
+    """
+
+    def __init__(self):
+        self.replayed = 0
+        self._events = []
+        self._spans = {}
+        self._affected = set()
+
+    def invalidate(self, rel_paths):
+        """
+        Segna le cartelle modificate: loro e i loro antenati saranno visitati di nuovo.
+
+        :param rel_paths: Percorsi relativi con separatore "/" ("." per la radice)
+        """
+        for rel_path in rel_paths:
+            while rel_path not in self._affected:
+                self._affected.add(rel_path)
+                if rel_path == ".":
+                    break
+                rel_path = rel_path.rpartition("/")[0] or "."
+
+    def clear(self):
+        """Nessuna cartella riusabile: la prossima run visita tutto l'albero."""
+        self._events = []
+        self._spans = {}
+        self._affected.clear()
+
+    def reusable(self, rel_path: str) -> bool:
+        """Indica se la cartella può essere riemessa dalla run precedente."""
+        return rel_path not in self._affected and rel_path in self._spans
+
+    def track(self, events):
+        """
+        Espande gli EVENT_SUBTREE con gli eventi della run precedente e registra la run corrente.
+        La cache è aggiornata solo se la run arriva alla fine.
+
+        :param events: Eventi di iter_file_contents
+        :return: Generatore di eventi per il writer
+        """
+        self.replayed = 0
+        recorded = []
+        spans = {}
+        open_folders = []
+        for event, value in events:
+            if event == EVENT_SUBTREE:
+                start, end = self._spans[value]
+                replay = self._events[start:end]
+                self.replayed += sum(1 for replay_event, record in replay if replay_event == EVENT_FILE and record)
+            else:
+                replay = [(event, value)]
+            for event, value in replay:
+                if event == EVENT_FOLDER:
+                    parent = open_folders[-1][0] if open_folders else None
+                    rel_path = "." if parent is None else (value if parent == "." else f"{parent}/{value}")
+                    open_folders.append((rel_path, len(recorded)))
+                    recorded.append((event, value))
+                elif event == EVENT_FOLDER_END:
+                    recorded.append((event, value))
+                    rel_path, start = open_folders.pop()
+                    spans[rel_path] = (start, len(recorded))
+                elif event == EVENT_FILE and value is not None and (value.bytes_read or value.read_time is not None):
+                    # copia senza le statistiche di lettura: alla prossima run il file risulta riusato
+                    recorded.append((event, FileRecord(value.name, value.content, size=value.size,
+                                                       encoding=value.encoding, hash=value.hash,
+                                                       error=value.error, binary=value.binary)))
+                else:
+                    recorded.append((event, value))
+                yield event, value
+        self._events = recorded
+        self._spans = spans
+        self._affected.clear()
+
+
+def is_generated_file(path: str, output_file: str) -> bool:
+    """
+    File scritti dalla run: output, parti e chunk (nome.partN.xml), manifest, indice,
+    journal di SQLite e profilo condividono il prefisso "nome." nella cartella dell'output.
+    """
+    root = os.path.splitext(os.path.abspath(output_file))[0]
+    if compression_suffix(output_file):
+        root = os.path.splitext(root)[0]
+    return os.path.abspath(path).startswith(root + ".")
+
+
+def iter_watched_folders(root: str, matcher: PatternMatcher, rel_path: str = ".", parent_included: bool = False,
+                         parent_rules: GitignoreRules = None):
+    """
+    Cartelle che la visita di fs_to_dad attraversa sotto root (compresa), con le voci già lette.
+
+    :param root: Percorso della cartella da cui partire
+    :param rel_path: Percorso relativo di root rispetto alla cartella target
+    :param parent_included: La cartella padre di root è inclusa
+    :param parent_rules: GitignoreRules della cartella padre di root (None senza gitignore)
+    :return: Generatore di tuple (percorso, percorso_rel, inclusa, GitignoreRules, lista di DirEntry)
+    """
+    stack = [(root, rel_path, parent_included, parent_rules)]
+    while stack:
+        path, rel_path, parent_included, rules = stack.pop()
+        included, excluded, skipped = matcher.folder_visit(rel_path, parent_included)
+        if excluded or skipped:
+            continue
+        try:
+            with os.scandir(path) as scan:
+                entries = list(scan)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        if rules is not None and any(entry.name == GITIGNORE_FILE for entry in entries):
+            rules = rules.child(path, rel_path)
+        yield path, rel_path, included, rules, entries
+        for entry in entries:
+            if entry.is_dir():
+                child_rel_path = entry.name if rel_path == "." else f"{rel_path}/{entry.name}"
+                if rules is None or not rules.ignored(child_rel_path, True):
+                    stack.append((entry.path, child_rel_path, included, rules))
+
+
+def is_watched_file(matcher: PatternMatcher, name: str, rel_path: str, folder_included: bool,
+                    rules: GitignoreRules) -> bool:
+    """Stessa regola della visita di fs_to_dad per i file (rel_path: percorso relativo del file)."""
+    is_file_included, is_file_excluded = matcher.file_decision(name)
+    if is_file_excluded or not (folder_included or is_file_included):
+        return False
+    return rules is None or not rules.ignored(rel_path, False)
+
+
+def target_rules(root: str, gitignore: bool):
+    """Catena di regole iniziale per la cartella target, None senza gitignore."""
+    return GitignoreRules.for_target(root) if gitignore else None
+
+
+class InotifyWatcher:
+    """Modifiche dalla coda inotify del kernel: una watch per ogni cartella visitata."""
+
+    def __init__(self, root: str, matcher: PatternMatcher, output_file: str, gitignore: bool = False):
+        """
+        :param gitignore: Applica i .gitignore come la visita di fs_to_dad
+        :raise OSError: inotify non disponibile o limite di watch raggiunto
+        """
+        self.root = root
+        self.matcher = matcher
+        self.output_file = output_file
+        self.gitignore = gitignore
+        # wd -> (percorso, percorso_rel, inclusa, GitignoreRules)
+        self._watches = {}
+        # eventi persi o regole .gitignore cambiate: rigenerazione completa
+        self._reset = False
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+        try:
+            self._add_tree(root, ".", False, target_rules(root, gitignore))
+        except OSError:
+            self.close()
+            raise
+        logger.info(f"Watch inotify su {len(self._watches)} cartelle: {root}")
+
+    def _add_tree(self, path: str, rel_path: str, parent_included: bool, parent_rules: GitignoreRules):
+        for folder, folder_rel_path, included, rules, _ in iter_watched_folders(path, self.matcher, rel_path,
+                                                                                parent_included, parent_rules):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue
+                raise OSError(error, f"inotify_add_watch {folder}: {os.strerror(error)}")
+            self._watches[wd] = (folder, folder_rel_path, included, rules)
+
+    def wait(self, debounce: float):
+        """
+        Attende una o più modifiche, poi debounce secondi senza modifiche.
+
+        :return: Percorsi relativi delle cartelle modificate, None se va rigenerato tutto l'albero
+        """
+        changed = set()
+        first_change = None
+        while True:
+            timeout = None
+            if changed or self._reset:
+                timeout = min(debounce, max(0.0, first_change + MAX_DEBOUNCE_WAIT - time.monotonic()))
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                break
+            changed |= self._read_events()
+            if (changed or self._reset) and first_change is None:
+                first_change = time.monotonic()
+        if not self._reset:
+            return changed
+        # nuove watch per le cartelle non più ignorate (quelle già osservate restano)
+        self._reset = False
+        self._add_tree(self.root, ".", False, target_rules(self.root, self.gitignore))
+        return None
+
+    def _read_events(self) -> set:
+        try:
+            data = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+            offset += INOTIFY_EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("Coda inotify piena: rigenerazione completa")
+                self._reset = True
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            folder, rel_path, included, rules = watch
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & IN_MOVE_SELF:
+                # la watch seguirebbe la cartella nella nuova posizione: la aggiunge il MOVED_TO del padre
+                self._libc.inotify_rm_watch(self._fd, wd)
+                continue
+            if not name or mask & IN_DELETE_SELF:
+                continue
+            path = os.path.join(folder, name)
+            if is_generated_file(path, self.output_file):
+                continue
+            child_rel_path = name if rel_path == "." else f"{rel_path}/{name}"
+            if mask & IN_ISDIR:
+                _, excluded, skipped = self.matcher.folder_visit(child_rel_path, included)
+                if excluded or skipped or (rules is not None and rules.ignored(child_rel_path, True)):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path, child_rel_path, included, rules)
+            elif self.gitignore and name == GITIGNORE_FILE:
+                logger.info(f"Regole cambiate: {path}")
+                self._reset = True
+                continue
+            elif not is_watched_file(self.matcher, name, child_rel_path, included, rules):
+                continue
+            changed.add(rel_path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Modifiche dal confronto periodico di size e mtime_ns dei file nelle cartelle visitate."""
+
+    def __init__(self, root: str, matcher: PatternMatcher, output_file: str, gitignore: bool = False,
+                 interval: float = POLL_INTERVAL):
+        """
+        :param gitignore: Applica i .gitignore come la visita di fs_to_dad
+        :param interval: Secondi tra due controlli
+        """
+        self.root = root
+        self.matcher = matcher
+        self.output_file = output_file
+        self.gitignore = gitignore
+        self.interval = interval
+        self._reset = False
+        self._snapshot = self._take_snapshot()
+        logger.info(f"Watch con polling ogni {interval} s su {len(self._snapshot)} cartelle: {root}")
+
+    def _take_snapshot(self) -> dict:
+        """:return: Dizionario percorso_rel -> {nome: (size, mtime_ns)} dei file visitati (None per le cartelle)"""
+        snapshot = {}
+        for _, rel_path, included, rules, entries in iter_watched_folders(self.root, self.matcher,
+                                                                          parent_rules=target_rules(self.root, self.gitignore)):
+            files = {}
+            for entry in entries:
+                entry_rel_path = entry.name if rel_path == "." else f"{rel_path}/{entry.name}"
+                try:
+                    if entry.is_dir():
+                        files[entry.name] = None
+                    elif (self.gitignore and entry.name == GITIGNORE_FILE) or (
+                            is_watched_file(self.matcher, entry.name, entry_rel_path, included, rules)
+                            and not is_generated_file(entry.path, self.output_file)):
+                        stat_result = entry.stat()
+                        files[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+            snapshot[rel_path] = files
+        return snapshot
+
+    def _changes(self) -> set:
+        snapshot = self._take_snapshot()
+        changed = {rel_path for rel_path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(rel_path) != self._snapshot.get(rel_path)}
+        if self.gitignore and any((snapshot.get(rel_path) or {}).get(GITIGNORE_FILE)
+                                  != (self._snapshot.get(rel_path) or {}).get(GITIGNORE_FILE) for rel_path in changed):
+            logger.info("Regole .gitignore cambiate")
+            self._reset = True
+        self._snapshot = snapshot
+        return changed
+
+    def wait(self, debounce: float):
+        """
+        Attende una o più modifiche, poi un controllo senza modifiche dopo debounce secondi.
+
+        :return: Percorsi relativi delle cartelle modificate, None se va rigenerato tutto l'albero
+        """
+        self._reset = False
+        changed = set()
+        while not changed:
+            time.sleep(self.interval)
+            changed = self._changes()
+        first_change = time.monotonic()
+        while time.monotonic() - first_change < MAX_DEBOUNCE_WAIT:
+            time.sleep(debounce)
+            more = self._changes()
+            if not more:
+                break
+            changed |= more
+        return None if self._reset else changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(root: str, matcher: PatternMatcher, output_file: str, poll: bool = False, gitignore: bool = False):
+    """
+    InotifyWatcher su Linux, PollingWatcher altrove, con poll=True o se inotify non è utilizzabile.
+    """
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, matcher, output_file, gitignore)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify non disponibile ({e}): uso il polling")
+    return PollingWatcher(root, matcher, output_file, gitignore)
+
+
+def watch(arguments: dict, debounce: float = DEFAULT_DEBOUNCE, poll: bool = False, timed: bool = False,
+          on_run=None) -> tuple:
+    """
+    Genera l'output e lo rigenera a ogni modifica della cartella target, fino a KeyboardInterrupt.
+
+    :param arguments: Argomenti di fs_to_dad (vedi AppConfig.fs_to_dad_arguments)
+    :param debounce: Secondi senza modifiche prima di rigenerare
+    :param poll: Usa il polling anche dove inotify è disponibile
+    :param timed: Misura i tempi per fase di ogni rigenerazione (RunStats)
+    :param on_run: Funzione chiamata dopo ogni run con (successo, messaggio, RunStats)
+    :return: Tupla (False, messaggio) se la cartella target non esiste; altrimenti non ritorna
+    """
+    root = arguments["target_path_folder"]
+    if not os.path.isdir(root):
+        return False, f"Cartella {root} non trovata"
+    matcher = PatternMatcher.shared(include_folders=arguments["include_folders"],
+                                    exclude_folders=arguments["ignore_folders"],
+                                    include_files=arguments["include_files"],
+                                    exclude_files=arguments["ignore_files"])
+    subtrees = SubtreeCache()
+    # il watcher parte prima della prima run: le modifiche durante la generazione non vanno perse
+    watcher = create_watcher(root, matcher, arguments["output_file"], poll, arguments.get("gitignore", False))
+    try:
+        while True:
+            stats = RunStats(timed=timed)
+            try:
+                success, message = fs_to_dad(**arguments, stats=stats, subtrees=subtrees)
+            except Exception as e:
+                success, message = False, f"Errore [{e}] - target: {root}"
+            if on_run:
+                on_run(success, message, stats)
+            changed = watcher.wait(debounce)
+            if changed is None:
+                logger.info("Rigenerazione completa")
+                subtrees.clear()
+            else:
+                logger.info(f"Modifiche in {len(changed)} cartelle: rigenerazione")
+                subtrees.invalidate(changed)
+    finally:
+        watcher.close()
@@ -0,0 +1,588 @@
+"""
+Writer del documento DAD (DataArchitectureDesign).
+
+Tutti i writer espongono la stessa interfaccia usata dalla visita di fs_to_dad:
+- open(): apre il documento (DataArchitectureDesign, Create, FileSystem)
+- enter_folder(name) / leave_folder(): apertura e chiusura di una cartella
+- add_file(name, content, attributes, metadata): aggiunge un file alla cartella corrente (contenuto già
+  elaborato, attributi opzionali oltre a Name, metadati del file letto: size, encoding, binary)
+- close(): chiude il documento e il file di output
+- part_files: file scritti (dopo close)
+
+Le cartelle senza file inclusi non vengono emesse, come nella generazione originale.
+
+DadTreeWriter  -> costruisce l'albero XMLNode in memoria e lo scrive alla chiusura
+DadStreamWriter -> scrive cartelle e file durante la visita, la memoria resta
+                   limitata al file più grande. L'output è identico byte per byte.
+                   Supporta la suddivisione in più parti (split_size).
+DadChunkWriter  -> raccoglie i file e alla chiusura li distribuisce interi nel minor numero
+                   di documenti nome.chunkN.xml sotto un budget di token (vedi chunk_packer),
+                   con il manifest comune nome.xml.chunks.json.
+DadJsonlWriter  -> backend alternativo all'XML: un oggetto JSON per riga e per file (percorso,
+                   size, encoding, contenuto), scritto durante la visita. Le righe sono
+                   indipendenti: chi legge può dividere il file per righe ed elaborarle in parallelo.
+
+Con output .gz, .xz o .bz2 i byte passano dal compressore man mano che vengono scritti.
+Con index_file DadStreamWriter registra la posizione in byte di ogni File e scrive l'indice
+per l'accesso diretto (vedi dad_index).
+Con cdata=True il contenuto dei file è racchiuso in <![CDATA[...]]> invece di essere escapato.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import json
+import datetime
+from _modules.xmlnode import XMLNode
+from _modules.file_utils import open_output, compression_suffix
+from dad_index import save_index, INDEX_SUFFIX
+from chunk_packer import pack_files, estimate_tokens, CHARS_PER_TOKEN
+
+# attributi del nodo File con la deduplicazione: Hash sul contenuto emesso, Ref sui duplicati
+FILE_HASH_ATTRIBUTE = "Hash"
+FILE_REF_ATTRIBUTE = "Ref"
+# codifica del contenuto quando non è il testo del file (Encoding="base64" per i binari)
+FILE_ENCODING_ATTRIBUTE = "Encoding"
+
+# formato dell'output: auto = jsonl per nome.jsonl (anche .jsonl.gz, .jsonl.xz, .jsonl.bz2), altrimenti xml
+OUTPUT_FORMAT_AUTO = "auto"
+OUTPUT_FORMAT_XML = "xml"
+OUTPUT_FORMAT_JSONL = "jsonl"
+OUTPUT_FORMATS = [OUTPUT_FORMAT_AUTO, OUTPUT_FORMAT_XML, OUTPUT_FORMAT_JSONL]
+
+
+def resolve_output_format(output_format, output_file) -> str:
+    """
+    Formato effettivo dell'output.
+
+    :param output_format: "auto", "xml" o "jsonl" (None = "auto")
+    :return: "xml" o "jsonl"
+    """
+    if output_format and output_format != OUTPUT_FORMAT_AUTO:
+        return output_format
+    name = output_file
+    if compression_suffix(name):
+        name = os.path.splitext(name)[0]
+    return OUTPUT_FORMAT_JSONL if name.lower().endswith("." + OUTPUT_FORMAT_JSONL) else OUTPUT_FORMAT_XML
+
+
+def create_dad_node() -> XMLNode:
+    """Nodo radice DataArchitectureDesign."""
+    return XMLNode("DataArchitectureDesign", {"Author": "Davide"})
+
+
+def create_creation_node() -> XMLNode:
+    """Nodo Create con data e ora di generazione."""
+    return XMLNode("Create", {
+        "Date": datetime.datetime.now().strftime("%d-%m-%Y"),
+        "Hour": datetime.datetime.now().strftime("%H:%M:%S")
+    })
+
+
+def create_file_node(name, content, attributes=None, cdata=False) -> XMLNode:
+    """
+    Nodo File con il contenuto del file.
+
+    :param attributes: Attributi oltre a Name (es. Hash/Ref della deduplicazione)
+    :param cdata: Se True il contenuto è emesso come CDATA (stessa indentazione del testo)
+    """
+    # attributi in tupla: il nodo non viene più modificato
+    node_file = XMLNode("File", (("Name", name),) + tuple((attributes or {}).items()))
+    if cdata:
+        node_file.set_cdata(content, indent_content=True)
+    else:
+        node_file.set_text(content)
+    return node_file
+
+
+class DadTreeWriter:
+    """Costruisce l'albero XMLNode completo e lo scrive con XMLNode.write_file."""
+
+    def __init__(self, output_file, indent_chars="", sanitize=False, compress_level=None, cdata=False):
+        self.output_file = output_file
+        self.indent_chars = indent_chars
+        self.sanitize = sanitize
+        self.cdata = cdata
+        self.compress_level = compress_level
+        self.node_dad = None
+        self.part_files = [output_file]
+        self._stack = []
+
+    def open(self):
+        self.node_dad = create_dad_node()
+        self.node_dad.add_child(create_creation_node())
+        node_filesystem = XMLNode("FileSystem")
+        self.node_dad.add_child(node_filesystem)
+        self._stack = [node_filesystem]
+
+    def enter_folder(self, name):
+        # attributi in tupla: i nodi dell'albero non vengono più modificati
+        self._stack.append(XMLNode("Folder", (("Name", name),)))
+
+    def leave_folder(self):
+        folder_node = self._stack.pop()
+        # la cartella viene aggiunta solo se contiene almeno un file incluso
+        if folder_node.children:
+            self._stack[-1].add_child(folder_node)
+
+    def add_file(self, name, content, attributes=None, metadata=None):
+        self._stack[-1].add_child(create_file_node(name, content, attributes, self.cdata))
+
+    def close(self):
+        self.node_dad.write_file(file_name=self.output_file,
+                                 indent_chars=self.indent_chars,
+                                 sanitize=self.sanitize,
+                                 compress_level=self.compress_level)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+CHUNKS_SUFFIX = ".chunks.json"
+
+
+class DadChunkWriter:
+    """
+    Raccoglie cartelle e file (con il contenuto, come DadTreeWriter) e alla chiusura li
+    distribuisce in chunk: ogni chunk è un documento DataArchitectureDesign completo,
+    scritto con DadStreamWriter, con i file in ordine di documento e il percorso di Folder
+    necessario. Il manifest comune elenca per ogni chunk file, token stimati e percorsi.
+
+    Con la deduplicazione un Ref resta tale solo se il primo esemplare è nello stesso chunk,
+    altrimenti il contenuto viene ripetuto: ogni chunk resta autonomo. Il costo di un Ref è
+    stimato con il contenuto completo, così il budget è rispettato in ogni caso.
+    """
+
+    def __init__(self, output_file, token_budget, indent_chars="", sanitize=False, compress_level=None,
+                 cdata=False, index=False):
+        self.output_file = output_file
+        self.token_budget = token_budget
+        self.indent_chars = indent_chars
+        self.sanitize = sanitize
+        self.compress_level = compress_level
+        self.cdata = cdata
+        self.index = index
+        self.separator = "" if not indent_chars else "\n"
+        self.manifest_file = output_file + CHUNKS_SUFFIX
+        self.part_files = []
+        self._stack = []
+        # cartelle: padre, nome, caratteri dei tag; file: cartella, nome, contenuto, hash, altri attributi, caratteri
+        self._folder_parents = []
+        self._folder_names = []
+        self._folder_costs = []
+        self._files = []
+        self._content_by_hash = {}
+
+    def open(self):
+        self._stack = []
+
+    def enter_folder(self, name):
+        # livello come in DadStreamWriter: FileSystem è il livello 1
+        level = len(self._stack) + 2
+        node = XMLNode("Folder", (("Name", name),))
+        cost = len(self.separator + node.opening_tag(self.indent_chars, level)
+                   + self.separator + node.closing_tag(self.indent_chars, level))
+        self._folder_parents.append(self._stack[-1] if self._stack else -1)
+        self._folder_names.append(name)
+        self._folder_costs.append(cost)
+        self._stack.append(len(self._folder_parents) - 1)
+
+    def leave_folder(self):
+        self._stack.pop()
+
+    def add_file(self, name, content, attributes=None, metadata=None):
+        attributes = attributes or {}
+        content_hash = attributes.get(FILE_HASH_ATTRIBUTE) or attributes.get(FILE_REF_ATTRIBUTE)
+        # altri attributi (es. Encoding): per un Ref sono quelli del primo esemplare
+        extra = {key: value for key, value in attributes.items() if key not in (FILE_HASH_ATTRIBUTE, FILE_REF_ATTRIBUTE)}
+        if FILE_REF_ATTRIBUTE in attributes:
+            content, extra = self._content_by_hash[content_hash]
+        elif content_hash:
+            self._content_by_hash[content_hash] = (content, extra)
+        estimate_attributes = {FILE_HASH_ATTRIBUTE: content_hash, **extra} if content_hash else extra
+        node_file = create_file_node(name, content, estimate_attributes, self.cdata)
+        cost = len(self.separator + node_file.to_xml(indent_chars=self.indent_chars,
+                                                     indent_level=len(self._stack) + 2,
+                                                     sanitize=self.sanitize))
+        self._files.append((self._stack[-1], name, content, content_hash, extra, cost))
+
+    def _base_cost(self):
+        """Caratteri fissi di un chunk: header, DataArchitectureDesign, Create, FileSystem."""
+        node_dad = create_dad_node()
+        node_filesystem = XMLNode("FileSystem")
+        return len(XMLNode.HEADER + self.separator.join([
+            "",
+            node_dad.opening_tag(self.indent_chars, 0),
+            create_creation_node().to_xml(indent_chars=self.indent_chars, indent_level=1),
+            node_filesystem.opening_tag(self.indent_chars, 1),
+            node_filesystem.closing_tag(self.indent_chars, 1),
+            node_dad.closing_tag(self.indent_chars, 0),
+        ]))
+
+    def _folder_path(self, folder):
+        """Cartelle dalla radice a folder (indici)."""
+        path = []
+        while folder >= 0:
+            path.append(folder)
+            folder = self._folder_parents[folder]
+        path.reverse()
+        return path
+
+    def _write_chunk(self, file_name, file_indexes):
+        """Scrive un chunk e restituisce i percorsi relativi dei suoi file."""
+        writer = DadStreamWriter(file_name,
+                                 indent_chars=self.indent_chars,
+                                 sanitize=self.sanitize,
+                                 compress_level=self.compress_level,
+                                 cdata=self.cdata,
+                                 index_file=file_name + INDEX_SUFFIX if self.index else None)
+        paths = []
+        emitted_hashes = set()
+        current = []
+        with writer:
+            for index in file_indexes:
+                folder, name, content, content_hash, extra, _ = self._files[index]
+                path = self._folder_path(folder)
+                common = 0
+                while common < min(len(current), len(path)) and current[common] == path[common]:
+                    common += 1
+                for _ in range(len(current) - common):
+                    writer.leave_folder()
+                for folder_index in path[common:]:
+                    writer.enter_folder(self._folder_names[folder_index])
+                current = path
+
+                if content_hash and content_hash in emitted_hashes:
+                    writer.add_file(name, None, {FILE_REF_ATTRIBUTE: content_hash})
+                elif content_hash:
+                    emitted_hashes.add(content_hash)
+                    writer.add_file(name, content, {FILE_HASH_ATTRIBUTE: content_hash, **extra})
+                else:
+                    writer.add_file(name, content, extra)
+                # percorso relativo alla cartella target (la prima cartella)
+                paths.append("/".join([self._folder_names[f] for f in path[1:]] + [name]))
+            for _ in current:
+                writer.leave_folder()
+        return paths
+
+    def close(self):
+        capacity = self.token_budget * CHARS_PER_TOKEN
+        chunks = pack_files(file_folders=[item[0] for item in self._files],
+                            file_costs=[item[5] for item in self._files],
+                            folder_parents=self._folder_parents,
+                            folder_costs=self._folder_costs,
+                            base_cost=self._base_cost(),
+                            capacity=capacity)
+        manifest_chunks = []
+        for number, (file_indexes, chars) in enumerate(chunks, start=1):
+            file_name = part_file_name(self.output_file, number, kind="chunk")
+            paths = self._write_chunk(file_name, file_indexes)
+            self.part_files.append(file_name)
+            if chars > capacity:
+                # un file (con il suo percorso di cartelle) che da solo non sta nel budget
+                logger.warning(f"{file_name}: supera il budget ({estimate_tokens(chars)} token stimati)")
+            manifest_chunks.append({
+                "file": os.path.basename(file_name),
+                "tokens": estimate_tokens(chars),
+                "files": paths,
+            })
+
+        with open(self.manifest_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "token_budget": self.token_budget,
+                "chars_per_token": CHARS_PER_TOKEN,
+                "files": len(self._files),
+                "chunks": manifest_chunks,
+            }, f, ensure_ascii=False, indent=2)
+        logger.debug(f"{len(self._files)} file in {len(chunks)} chunk, manifest: {self.manifest_file}")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class DadStreamWriter:
+    """
+    Scrive il documento DAD durante la visita.
+
+    Le cartelle vengono tenute in uno stack di nodi "in attesa": il tag di apertura
+    viene scritto solo al primo file incluso, così le cartelle vuote non compaiono.
+    Ogni token dopo l'header è preceduto dal separatore, come in XMLNode.to_xml.
+
+    Con split_size > 0 l'output viene diviso in parti nome.partN.xml: prima di un file
+    che farebbe superare la soglia la parte corrente viene chiusa e la successiva
+    riapre il percorso di Folder in cui si trovava. Ogni parte è un documento
+    DataArchitectureDesign valido; supera split_size solo se contiene un unico file più grande.
+    Con output compresso split_size si riferisce ai byte non compressi di ciascuna parte.
+
+    Con index_file ogni add_file registra parte, offset e lunghezza dell'elemento File e
+    del suo contenuto (byte non compressi); l'indice viene scritto alla chiusura.
+    """
+
+    def __init__(self, output_file, indent_chars="", sanitize=False, encoding="utf-8", split_size=0,
+                 compress_level=None, cdata=False, index_file=None):
+        self.output_file = output_file
+        self.indent_chars = indent_chars
+        self.sanitize = sanitize
+        self.cdata = cdata
+        self.encoding = encoding
+        self.split_size = split_size or 0
+        self.compress_level = compress_level
+        self.separator = "" if not indent_chars else "\n"
+        self.index_file = index_file
+        # percorso relativo -> voce dell'indice; hash -> (parte, offset, lunghezza, livello) del contenuto
+        self.index_entries = {}
+        self._content_by_hash = {}
+        self.part_files = []
+        self._file = None
+        self._part_size = 0
+        self._files_in_part = 0
+        # stack di [XMLNode, aperto: bool]; l'elemento 0 è FileSystem (livello 1)
+        self._stack = []
+        # con split_size: byte (apertura, chiusura) dei tag di ogni livello dello stack e byte
+        # della chiusura dell'intera parte (tag di tutti i livelli e DataArchitectureDesign)
+        self._tag_sizes = []
+        self._suffix_size = 0
+
+    def _encode(self, text):
+        # stessa traduzione dei newline della scrittura in modalità testo
+        if os.linesep != "\n":
+            text = text.replace("\n", os.linesep)
+        return text.encode(self.encoding)
+
+    def _write_bytes(self, data):
+        self._file.write(data)
+        self._part_size += len(data)
+
+    def _write(self, text):
+        self._write_bytes(self._encode(self.separator + text))
+
+    def _open_part(self):
+        """Apre un nuovo file di output con header, DataArchitectureDesign e Create."""
+        if self.split_size:
+            file_name = part_file_name(self.output_file, len(self.part_files) + 1)
+        else:
+            file_name = self.output_file
+        self.part_files.append(file_name)
+        self._file = open_output(file_name, self.compress_level)
+        self._part_size = 0
+        self._files_in_part = 0
+        self._write_bytes(self._encode(XMLNode.HEADER))
+        node_dad = create_dad_node()
+        if self.split_size:
+            node_dad.set_attribute("Part", str(len(self.part_files)))
+        self._write(node_dad.opening_tag(self.indent_chars, 0))
+        self._write(create_creation_node().to_xml(indent_chars=self.indent_chars, indent_level=1))
+
+    def _close_part(self):
+        """Chiude gli elementi aperti della parte corrente e il file."""
+        for level in range(len(self._stack), 0, -1):
+            node, opened = self._stack[level - 1]
+            if opened:
+                self._write(node.closing_tag(self.indent_chars, level))
+            elif level == 1:
+                self._write(node.opening_tag(self.indent_chars, level, self_closing=True))
+        self._write(create_dad_node().closing_tag(self.indent_chars, 0))
+        self._file.close()
+        self._file = None
+        logger.debug(f"Parte scritta: {self.part_files[-1]}")
+
+    def _roll_over(self):
+        """Passa alla parte successiva: il percorso di Folder verrà riaperto al prossimo file."""
+        self._close_part()
+        for item in self._stack:
+            item[1] = False
+        self._open_part()
+
+    def open(self):
+        self._stack = []
+        self._tag_sizes = []
+        if self.split_size:
+            self._suffix_size = len(self._encode(self.separator + create_dad_node().closing_tag(self.indent_chars, 0)))
+        self._push(XMLNode("FileSystem"))
+        self._open_part()
+
+    def _push(self, node):
+        self._stack.append([node, False])
+        if self.split_size:
+            level = len(self._stack)
+            sizes = (len(self._encode(self.separator + node.opening_tag(self.indent_chars, level))),
+                     len(self._encode(self.separator + node.closing_tag(self.indent_chars, level))))
+            self._tag_sizes.append(sizes)
+            self._suffix_size += sizes[1]
+
+    def _part_size_with(self, data) -> int:
+        """Byte della parte corrente, chiusa, dopo aver scritto data e le cartelle in attesa."""
+        pending = sum(sizes[0] for item, sizes in zip(self._stack, self._tag_sizes) if not item[1])
+        return self._part_size + pending + len(data) + self._suffix_size
+
+    def _open_pending(self):
+        """Scrive i tag di apertura delle cartelle non ancora emesse."""
+        for level, item in enumerate(self._stack, start=1):
+            if not item[1]:
+                self._write(item[0].opening_tag(self.indent_chars, level))
+                item[1] = True
+
+    def enter_folder(self, name):
+        self._push(XMLNode("Folder", {"Name": name}))
+
+    def leave_folder(self):
+        level = len(self._stack)
+        node, opened = self._stack.pop()
+        if self.split_size:
+            self._suffix_size -= self._tag_sizes.pop()[1]
+        if opened:
+            self._write(node.closing_tag(self.indent_chars, level))
+
+    def add_file(self, name, content, attributes=None, metadata=None):
+        node_file = create_file_node(name, content, attributes, self.cdata)
+        level = len(self._stack) + 1
+        data = self._encode(self.separator + node_file.to_xml(indent_chars=self.indent_chars,
+                                                              indent_level=level,
+                                                              sanitize=self.sanitize))
+        if self.split_size and self._files_in_part and self._part_size_with(data) > self.split_size:
+            self._roll_over()
+        self._open_pending()
+        if self.index_file:
+            self._index_file(name, node_file, level, data, attributes or {})
+        self._write_bytes(data)
+        self._files_in_part += 1
+
+    def _index_file(self, name, node_file, level, data, attributes):
+        """Registra la posizione del File che sta per essere scritto (data comprende il separatore iniziale)."""
+        part = len(self.part_files) - 1
+        offset = self._part_size + len(self._encode(self.separator))
+        length = len(data) - (offset - self._part_size)
+        if node_file.content.text:
+            # to_xml = apertura, separatore, contenuto, separatore, chiusura
+            head = len(self._encode(node_file.opening_tag(self.indent_chars, level) + self.separator))
+            tail = len(self._encode(self.separator + node_file.closing_tag(self.indent_chars, level)))
+            content = (part, offset + head, length - head - tail, level + 1)
+        else:
+            content = self._content_by_hash.get(attributes.get(FILE_REF_ATTRIBUTE), (part, offset + length, 0, 0))
+        if FILE_HASH_ATTRIBUTE in attributes:
+            self._content_by_hash[attributes[FILE_HASH_ATTRIBUTE]] = content
+        # percorso relativo alla cartella target: _stack[0] è FileSystem, _stack[1] la cartella target
+        rel_path = "/".join([item[0].get_attribute("Name") for item in self._stack[2:]] + [name])
+        self.index_entries[rel_path] = [part, offset, length, *content]
+
+    def close(self):
+        self._close_part()
+        self._stack = []
+        if self.index_file:
+            save_index(self.index_file, self.part_files, self.index_entries, {
+                "encoding": self.encoding,
+                "newline": os.linesep,
+                "indent_chars": self.indent_chars,
+                "sanitize": self.sanitize,
+                "cdata": self.cdata,
+            })
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._file:
+            # documento incompleto: si chiude solo il file
+            self._file.close()
+            self._file = None
+        return False
+
+
+# json.dumps con argomenti non di default crea un encoder a ogni chiamata
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+class DadJsonlWriter:
+    """
+    Scrive un oggetto JSON per riga (JSON Lines, UTF-8, "\n" come fine riga) per ogni file:
+    {"path": "cartella/file.cs", "size": 1234, "encoding": "utf-8", "content": "..."}
+
+    - path: percorso relativo alla cartella target con separatore "/"
+    - size: byte del file
+    - encoding: encoding rilevato del file, "base64" se content è il file binario in base64
+    - content: contenuto elaborato (None per i duplicati con dedup)
+    - binary: true per i file binari (content è il messaggio "file binario" o il base64)
+    - hash / ref: con dedup, hash del contenuto sul primo esemplare e riferimento sui duplicati
+
+    Le cartelle non producono righe: sono nel percorso dei file. Opzioni di formattazione
+    dell'XML (indentazione, sanitize, CDATA) non si applicano.
+    """
+
+    def __init__(self, output_file, compress_level=None):
+        self.output_file = output_file
+        self.compress_level = compress_level
+        self.part_files = [output_file]
+        self._file = None
+        # cartelle aperte; la prima è la cartella target, esclusa dai percorsi
+        self._folders = []
+
+    def open(self):
+        self._file = open_output(self.output_file, self.compress_level)
+        self._folders = []
+
+    def enter_folder(self, name):
+        self._folders.append(name)
+
+    def leave_folder(self):
+        self._folders.pop()
+
+    def add_file(self, name, content, attributes=None, metadata=None):
+        attributes = attributes or {}
+        metadata = metadata or {}
+        line = {
+            "path": "/".join(self._folders[1:] + [name]),
+            "size": metadata.get("size"),
+            "encoding": attributes.get(FILE_ENCODING_ATTRIBUTE, metadata.get("encoding")),
+            "content": content,
+        }
+        if metadata.get("binary"):
+            line["binary"] = True
+        if FILE_HASH_ATTRIBUTE in attributes:
+            line["hash"] = attributes[FILE_HASH_ATTRIBUTE]
+        if FILE_REF_ATTRIBUTE in attributes:
+            line["ref"] = attributes[FILE_REF_ATTRIBUTE]
+        self._file.write((_JSON_ENCODER.encode(line) + "\n").encode("utf-8"))
+
+    def close(self):
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._file:
+            self._file.close()
+            self._file = None
+        return False
+
+
+def part_file_name(output_file, part_number, kind="part"):
+    """
+    Nome del file della parte N: nome.xml -> nome.partN.xml, nome.xml.gz -> nome.partN.xml.gz
+
+    :param kind: Etichetta prima del numero ("part" per split_size, "chunk" per il budget di token)
+    """
+    root, ext = os.path.splitext(output_file)
+    if compression_suffix(output_file):
+        root, inner_ext = os.path.splitext(root)
+        ext = inner_ext + ext
+    return f"{root}.{kind}{part_number}{ext}"
@@ -0,0 +1,349 @@
+"""
+Lettura dei file per fs_to_dad.
+
+La visita di fs_to_dad produce una sequenza ordinata di eventi:
+- (EVENT_FOLDER, nome)                    apertura cartella
+- (EVENT_FILE, (DirEntry, percorso_rel))  file incluso da leggere
+- (EVENT_FOLDER_END, None)                chiusura cartella
+- (EVENT_SUBTREE, percorso_rel)           sottoalbero invariato, riemesso dalla run precedente
+                                          (modalità watch, vedi dad_watch.SubtreeCache)
+
+iter_file_contents sostituisce il valore di ogni EVENT_FILE con un FileRecord
+oppure None se il file va saltato. Con workers > 1 la lettura (rilevamento
+encoding, decodifica, rimozione commenti) avviene a lotti in un pool di processi;
+i risultati vengono riemessi nell'ordine originale, quindi l'output resta
+deterministico. Con un manifest i file invariati non vengono riletti.
+
+I file oltre large_file_max_bytes vengono letti via mmap solo in parte (inizio,
+inizio e fine) oppure sostituiti dalla sola dimensione, secondo large_file_mode.
+
+La trasformazione del contenuto (commenti, righe vuote, spazi finali; vedi
+content_transform) avviene qui, una volta per file, anche nei processi worker.
+
+I file binari riconoscibili dai primi FileHandler.SNIFF_SIZE byte (firma, NUL, byte non
+UTF-8) costano una sola read. Con binary_base64_max_bytes i binari fino a quella
+dimensione sono emessi in base64 (FileRecord.encoding = BINARY_BASE64), codificati a
+blocchi durante la lettura.
+
+Ogni FileRecord letto riporta i byte letti e, con timed=True, i tempi di lettura e di
+rilevamento dell'encoding, misurati anche nei processi worker e sommati da fs_to_dad nelle
+statistiche (vedi run_stats).
+
+Con detection_cache (percorso di un database DetectionCache) l'encoding dei file che
+richiederebbero charset_normalizer viene riusato dalle run precedenti: ogni processo apre
+la propria istanza condivisa e i worker la salvano alla fine di ogni lotto.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from _modules.file_utils import FileHandler, DetectionCache
+from _modules.xmlnode import XMLNode
+from content_transform import transform_content, language_for
+from run_stats import clock
+
+EVENT_FOLDER = "folder"
+EVENT_FILE = "file"
+EVENT_FOLDER_END = "folder_end"
+EVENT_SUBTREE = "subtree"
+
+# numero di file per lotto inviato a un processo worker
+BATCH_SIZE = 32
+# lotti in volo per worker: limita la memoria occupata dai contenuti in attesa
+BATCHES_PER_WORKER = 4
+
+# politiche per i file oltre large_file_max_bytes
+LARGE_FILE_TRUNCATE = "truncate"
+LARGE_FILE_HEAD_TAIL = "head_tail"
+LARGE_FILE_METADATA = "metadata"
+LARGE_FILE_MODES = [LARGE_FILE_TRUNCATE, LARGE_FILE_HEAD_TAIL, LARGE_FILE_METADATA]
+
+# encoding dei FileRecord con il contenuto binario in base64
+BINARY_BASE64 = "base64"
+
+
+class FileRecord:
+    """Risultato della lettura di un file, passato ai writer."""
+
+    __slots__ = ("name", "content", "size", "encoding", "hash", "error",
+                 "binary", "bytes_read", "read_time", "detect_time", "detection_cached")
+
+    def __init__(self, name, content, size=None, encoding=None, hash=None, error=None, binary=False):
+        self.name = name
+        self.content = content
+        self.size = size
+        self.encoding = encoding
+        self.hash = hash
+        self.error = error
+        self.binary = binary
+        # statistiche della lettura (None per i record riusati dal manifest)
+        self.bytes_read = 0
+        self.read_time = None
+        self.detect_time = None
+        self.detection_cached = False
+
+
+def _with_read_stats(record: FileRecord, fh: FileHandler, started: tuple) -> FileRecord:
+    """Completa il FileRecord con i byte letti e, se started non è None, i tempi (wall, CPU) di lettura e rilevamento."""
+    record.bytes_read = fh.bytes_read
+    record.detection_cached = fh.detection_cached
+    if started is not None:
+        now = clock()
+        record.read_time = (now[0] - started[0], now[1] - started[1])
+        record.detect_time = fh.detect_time
+    return record
+
+
+def read_file_content(file_path: str,
+                      stat_result=None,
+                      remove_xml_comments: bool = False,
+                      large_file_max_bytes: int = 0,
+                      large_file_mode: str = LARGE_FILE_TRUNCATE,
+                      strip_comments: bool = False,
+                      collapse_blank_lines: bool = False,
+                      trim_trailing_whitespace: bool = False,
+                      binary_base64_max_bytes: int = 0,
+                      detection_cache: str = "",
+                      timed: bool = False):
+    """
+    Legge un file e restituisce il contenuto da scrivere nel nodo File.
+    Funzione di modulo perché viene eseguita anche nei processi worker.
+
+    :param file_path: Percorso del file
+    :param stat_result: os.stat_result della visita (DirEntry.stat()), evita di rileggere esistenza e dimensione
+    :param remove_xml_comments: Rimuove i commenti /// dal contenuto testuale
+    :param large_file_max_bytes: Limite in byte oltre il quale si applica large_file_mode (0 = nessun limite)
+    :param large_file_mode: "truncate" (primi N byte), "head_tail" (inizio e fine) o "metadata" (solo dimensione)
+    :param strip_comments: Rimuove i commenti dei linguaggi riconosciuti (C#, Python, JS/TS, XML)
+    :param collapse_blank_lines: Al più una riga vuota consecutiva (linguaggi riconosciuti)
+    :param trim_trailing_whitespace: Rimuove gli spazi a fine riga (linguaggi riconosciuti)
+    :param binary_base64_max_bytes: I file binari fino a questa dimensione sono emessi in base64 (0 = mai)
+    :param detection_cache: Percorso della cache persistente degli encoding ("" = nessuna cache)
+    :param timed: Se True il FileRecord riporta i tempi di lettura e di rilevamento dell'encoding
+    :return: FileRecord oppure None se il file non esiste più
+    """
+    started = clock() if timed else None
+    fh = FileHandler(file_path, compute_hash=True, stat_result=stat_result, sniff_binary=True,
+                     detection_cache=DetectionCache.shared(detection_cache) if detection_cache else None)
+    if not fh.exists()[0]:
+        return None
+
+    head_bytes, tail_bytes = 0, 0
+    if large_file_max_bytes:
+        if large_file_mode == LARGE_FILE_METADATA:
+            size = stat_result.st_size if stat_result is not None else os.path.getsize(fh.file_path)
+            if size > large_file_max_bytes:
+                msg = f"File di {size} byte non incluso (limite {large_file_max_bytes} byte): {fh.file_path}"
+                logger.info(msg)
+                return _with_read_stats(FileRecord(os.path.basename(fh.file_path), msg, size=size), fh, started)
+        elif large_file_mode == LARGE_FILE_HEAD_TAIL:
+            head_bytes = large_file_max_bytes - large_file_max_bytes // 2
+            tail_bytes = large_file_max_bytes // 2
+        else:
+            head_bytes = large_file_max_bytes
+    try:
+        fh.get_info(head_bytes=head_bytes, tail_bytes=tail_bytes)
+    except FileNotFoundError:
+        # rimosso tra la visita e la lettura
+        logger.warning(f"Il file {fh.file_path} non esiste più.")
+        return None
+    if fh.truncated:
+        logger.info(f"File troncato a {large_file_max_bytes} byte su {fh.size}: {fh.file_path}")
+
+    if binary_base64_max_bytes and not fh.truncated and fh.size <= binary_base64_max_bytes and not fh.is_text()[0]:
+        # riletto a blocchi: in memoria resta solo il testo codificato
+        content_file = fh.read_base64()
+        record = FileRecord(fh.name, content_file, size=fh.size, encoding=BINARY_BASE64,
+                            hash=tagged_hash(fh.hash, BINARY_BASE64), binary=True)
+        return _with_read_stats(record, fh, started)
+
+    content_file, msg_err = fh.read()
+    if content_file:
+        is_text, msg_err = fh.is_text()
+        if not is_text:
+            msg = f"File binario: [MIME: {fh.mime}, Encoding: {fh.encoding}] {fh.file_path}"
+            content_file = msg
+            logger.warning(msg)
+        else:
+            if remove_xml_comments:
+                content_file = XMLNode.remove_xml_doc_comments(content_file)
+            content_file = transform_content(fh.name, content_file,
+                                             strip_comments=strip_comments,
+                                             collapse_blank_lines=collapse_blank_lines,
+                                             trim_trailing_whitespace=trim_trailing_whitespace)
+            if fh.hash and (strip_comments or collapse_blank_lines or trim_trailing_whitespace):
+                fh.hash = transformed_hash(fh.hash, fh.name)
+    elif msg_err:
+        msg = f"Errore [{msg_err}] - lettura file: {fh.file_path}"
+        content_file = msg
+        logger.warning(msg)
+
+    record = FileRecord(fh.name, content_file, size=fh.size, encoding=fh.encoding, hash=fh.hash, error=msg_err,
+                        binary=fh.text is False)
+    return _with_read_stats(record, fh, started)
+
+
+def transformed_hash(raw_hash: str, file_name: str) -> str:
+    """
+    Hash del contenuto emesso per un file trasformato da content_transform: stessi byte con
+    linguaggi diversi (es. a.py e b.md) danno contenuti diversi e non devono deduplicarsi.
+    Le opzioni della trasformazione sono le stesse per tutta la run (e nel manifest).
+
+    :return: L'hash dei byte se il linguaggio non è registrato (contenuto invariato), altrimenti
+             l'hash dei byte combinato con il linguaggio
+    """
+    language = language_for(file_name)
+    if language is None:
+        return raw_hash
+    return tagged_hash(raw_hash, language)
+
+
+def tagged_hash(raw_hash: str, tag: str) -> str:
+    """
+    Hash dei byte combinato con la rappresentazione del contenuto emesso (linguaggio della
+    trasformazione, BINARY_BASE64): stessi byte emessi in forme diverse non si deduplicano.
+    """
+    if raw_hash is None:
+        return None
+    return hashlib.blake2b(f"{raw_hash}:{tag}".encode(), digest_size=16).hexdigest()
+
+
+def read_files_batch(files: list, options: dict, timed: bool = False) -> list:
+    """Legge un lotto di file (percorso, stat_result) nel processo worker, mantenendo l'ordine."""
+    records = [read_file_content(file_path, stat_result, timed=timed, **options) for file_path, stat_result in files]
+    if options.get("detection_cache"):
+        # il processo worker non sa quando finisce la run: la cache viene salvata a ogni lotto
+        DetectionCache.shared(options["detection_cache"]).flush()
+    return records
+
+
+def iter_file_contents(events, workers: int = 0, options: dict = None, manifest=None, timed: bool = False,
+                       executor=None):
+    """
+    Risolve gli eventi EVENT_FILE nel contenuto dei file.
+
+    :param events: Iterabile di eventi prodotto dalla visita
+    :param workers: Numero di processi; 0 o 1 = lettura sequenziale
+    :param options: Argomenti di read_file_content (remove_xml_comments, large_file_max_bytes, ...)
+    :param manifest: DadManifest opzionale per riusare i file invariati
+    :param timed: Misura i tempi di lettura di ogni file (statistiche della run)
+    :param executor: Pool di processi già avviato e condiviso con altre run (non viene chiuso)
+    :return: Generatore di eventi con FileRecord al posto di (DirEntry, percorso_rel)
+    """
+    options = options or {}
+    if executor is not None:
+        yield from _iter_file_contents_pool(events, executor, max(workers, 1), options, manifest, timed)
+        return
+    if workers <= 1:
+        for event, value in events:
+            if event == EVENT_FILE:
+                value = _read_entry(value, options, manifest, timed)
+            yield event, value
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from _iter_file_contents_pool(events, executor, workers, options, manifest, timed)
+
+
+def _entry_stat(entry):
+    """
+    Stat della DirEntry (gratuito su Windows, memorizzato nella entry): sostituisce
+    exists/getsize/fstat di FileHandler. None se il file non esiste (link simbolico rotto).
+    """
+    try:
+        return entry.stat()
+    except FileNotFoundError:
+        logger.warning(f"Il file {entry.path} non esiste.")
+        return None
+
+
+def _read_entry(value, options, manifest, timed):
+    entry, rel_path = value
+    stat_result = _entry_stat(entry)
+    if stat_result is None:
+        return None
+    if not manifest:
+        return read_file_content(entry.path, stat_result, timed=timed, **options)
+    record = manifest.lookup(rel_path, stat_result)
+    if record is None:
+        record = read_file_content(entry.path, stat_result, timed=timed, **options)
+        if record:
+            manifest.store(rel_path, stat_result, record)
+    return record
+
+
+def _iter_file_contents_pool(events, executor, workers, options, manifest, timed):
+    # coda ordinata di eventi pronti (tuple) e posti dei file letti nel pool (lotto, indice);
+    # un lotto è [future, file, risultati] e raccoglie file di più cartelle: finché è aperto
+    # (future None) cartelle e file invariati si accodano senza chiuderlo
+    pending = deque()
+    batch = None
+    in_flight = 0
+    max_in_flight = workers * BATCHES_PER_WORKER
+    # eventi accodati dietro il lotto aperto oltre i quali viene inviato incompleto (memoria dei file invariati)
+    max_waiting = max_in_flight * BATCH_SIZE
+    waiting = 0
+
+    def submit_batch():
+        nonlocal batch, in_flight, waiting
+        waiting = 0
+        if batch:
+            batch[0] = executor.submit(read_files_batch,
+                                       [(entry.path, stat_result) for entry, _, stat_result in batch[1]],
+                                       options, timed)
+            batch = None
+            in_flight += 1
+
+    def drain(limit):
+        """Emette dalla testa della coda finché i lotti in volo sono più di limit."""
+        nonlocal in_flight
+        while pending:
+            head = pending[0]
+            if isinstance(head, tuple):
+                yield pending.popleft()
+                continue
+            file_batch, index = head
+            if file_batch[2] is None:
+                if file_batch[0] is None or in_flight <= limit:
+                    return
+                file_batch[2] = file_batch[0].result()
+                in_flight -= 1
+            pending.popleft()
+            _, rel_path, stat_result = file_batch[1][index]
+            record = file_batch[2][index]
+            file_batch[2][index] = None
+            if manifest and record:
+                manifest.store(rel_path, stat_result, record)
+            yield EVENT_FILE, record
+
+    for event, value in events:
+        if event == EVENT_FILE:
+            entry, rel_path = value
+            stat_result = _entry_stat(entry)
+            record = None
+            if stat_result is not None and manifest:
+                record = manifest.lookup(rel_path, stat_result)
+            if stat_result is None or record is not None:
+                # file mancanti e invariati: in coda dopo il lotto aperto, l'ordine resta quello della visita
+                pending.append((EVENT_FILE, record))
+                waiting += 1
+            else:
+                if batch is None:
+                    batch = [None, [], None]
+                    waiting = 0
+                pending.append([batch, len(batch[1])])
+                batch[1].append((entry, rel_path, stat_result))
+                if len(batch[1]) >= BATCH_SIZE:
+                    submit_batch()
+        else:
+            pending.append((event, value))
+            waiting += 1
+        if batch is not None and waiting >= max_waiting:
+            submit_batch()
+        yield from drain(max_in_flight)
+
+    submit_batch()
+    yield from drain(-1)
@@ -5,6 +5,8 @@ Integra configurazione, validazione e sistema di help.
 
 import sys
 import os
+import json
+import cProfile
 import argparse
 import logging
 from pathlib import Path
@@ -14,6 +16,11 @@ sys.path.append(str(Path(__file__).parent.parent))
 from _modules.logging.logging import configure_logging, create_logger
 from app_config import AppConfig
 from fs_to_dad import fs_to_dad
+from run_stats import RunStats, STATS_FORMATS, STATS_FORMAT_TABLE, STATS_FORMAT_JSON
+from dad_batch import BatchTarget, run_batch, format_batch_report, batch_report_dict
+from dad_watch import watch, DEFAULT_DEBOUNCE
+from dad_writer import OUTPUT_FORMATS
+from _modules.file_utils.detection_cache import DEFAULT_CACHE_PATH
 from help import show_full_help
 
 # Configurazione logging
@@ -51,8 +58,158 @@ def apply_cli_overrides(app_config, args):
         app_config.include_files = args.include_files.split(",")
     if args.indent_content:
         app_config.indent_content = True
+    if args.stream:
+        app_config.stream = True
+    if args.split_size is not None:
+        app_config.split_size = args.split_size
+    if args.workers is not None:
+        app_config.workers = args.workers
+    if args.incremental:
+        app_config.incremental = True
+    if args.large_file_max_bytes is not None:
+        app_config.large_file_max_bytes = args.large_file_max_bytes
+    if args.large_file_mode:
+        app_config.large_file_mode = args.large_file_mode
+    if args.dedup:
+        app_config.dedup = True
+    if args.compress_level is not None:
+        app_config.compress_level = args.compress_level
+    if args.cdata:
+        app_config.cdata = True
+    if args.strip_comments:
+        app_config.strip_comments = True
+    if args.collapse_blank_lines:
+        app_config.collapse_blank_lines = True
+    if args.trim_trailing_whitespace:
+        app_config.trim_trailing_whitespace = True
+    if args.index:
+        app_config.index = True
+    if args.token_budget is not None:
+        app_config.token_budget = args.token_budget
+    if args.binary_base64_max_bytes is not None:
+        app_config.binary_base64_max_bytes = args.binary_base64_max_bytes
+    if args.gitignore:
+        app_config.gitignore = True
+    if args.format:
+        app_config.output_format = args.format
+    if args.detection_cache:
+        app_config.detection_cache = args.detection_cache
     
 
+def start_profiler(args):
+    """Avvia cProfile se richiesto con --profile (solo il processo principale, non i worker)."""
+    if args.profile is None:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler, args, default_file):
+    """Ferma cProfile e salva il profilo in --profile FILE o in default_file."""
+    if profiler is None:
+        return
+    profiler.disable()
+    profile_file = args.profile or default_file
+    profiler.dump_stats(profile_file)
+    logger.info(f"Profilo salvato: {profile_file} (python -m pstats {profile_file})")
+
+
+def load_batch_targets(args):
+    """
+    Configurazioni dei target della modalità batch: ogni voce di --batch è un file di
+    configurazione oppure una cartella target (con la configurazione di --config o quella
+    di default). Gli override CLI valgono per tutti i target.
+
+    :return: Tupla (lista di BatchTarget, lista di errori)
+    """
+    base_config = args.config or AppConfig.DEFAULT_FILE_NAME_CONFIG
+    targets, errors = [], []
+    for item in args.batch:
+        if os.path.isdir(item):
+            app_config = AppConfig(base_config)
+            if os.path.exists(base_config):
+                success, msg = app_config.load()
+                if not success:
+                    errors.append(f"{item}: {msg}")
+                    continue
+            app_config.target_path_folder = os.path.normpath(item)
+        elif os.path.isfile(item):
+            app_config = AppConfig(item)
+            success, msg = app_config.load()
+            if not success:
+                errors.append(f"{item}: {msg}")
+                continue
+        else:
+            errors.append(f"{item}: né file di configurazione né cartella")
+            continue
+        apply_cli_overrides(app_config, args)
+        app_config.resolve_output_path()
+        targets.append(BatchTarget(item, app_config.fs_to_dad_arguments()))
+
+    outputs = {}
+    for target in targets:
+        output = os.path.abspath(target.arguments["output_file"])
+        if output in outputs:
+            errors.append(f"{target.label}: stesso output di {outputs[output]} ({output})")
+        outputs.setdefault(output, target.label)
+    return targets, errors
+
+
+def run_batch_mode(args):
+    """Esegue tutti i target di --batch in questo processo e stampa il riepilogo."""
+    if args.target:
+        logger.error("--target non è ammesso con --batch: le cartelle vanno elencate in --batch")
+        return 1
+    if args.watch:
+        logger.error("--watch non è ammesso con --batch")
+        return 1
+    targets, errors = load_batch_targets(args)
+    if errors:
+        for error in errors:
+            logger.error(error)
+        return 1
+
+    profiler = start_profiler(args)
+    results = run_batch(targets, workers=args.workers or 0, jobs=args.batch_jobs or 0, timed=bool(args.stats))
+    stop_profiler(profiler, args, "batch.pstats")
+    if args.stats == STATS_FORMAT_JSON:
+        print(json.dumps(batch_report_dict(results), indent=2))
+    else:
+        print(format_batch_report(results))
+        if args.stats:
+            for target in results:
+                print(f"\n{target.label}\n{target.stats.format_table()}")
+    return 0 if all(target.success for target in results) else 1
+
+
+def run_watch_mode(app_config, args):
+    """Genera l'output e lo rigenera a ogni modifica della cartella target, fino a Ctrl+C."""
+    def report(success, message, stats):
+        if not success:
+            logger.error(message)
+            return
+        logger.success(message)
+        if args.stats:
+            print(stats.format(args.stats))
+
+    profiler = start_profiler(args)
+    result = None
+    try:
+        result = watch(app_config.fs_to_dad_arguments(),
+                       debounce=args.watch_debounce if args.watch_debounce is not None else DEFAULT_DEBOUNCE,
+                       poll=args.watch_poll,
+                       timed=bool(args.stats),
+                       on_run=report)
+    except KeyboardInterrupt:
+        logger.info("Watch terminato")
+    stop_profiler(profiler, args, f"{app_config.output_path_file}.pstats")
+    if result:
+        logger.error(result[1])
+        return 1
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Genera XML da struttura cartelle",
@@ -66,8 +223,38 @@ def main():
     parser.add_argument("--indent-content", action='store_true')
     parser.add_argument("--include-files", help="Pattern inclusione file")
     parser.add_argument("--sanitize", help="valida xml")
-    parser.add_argument("--split_size", help="Dimensione massima (in byte) di ciascun file XML generato. 0 = file intero.")
+    parser.add_argument("--split_size", type=int, help="Dimensione massima (in byte) di ciascun file XML generato (nome.partN.xml). 0 = file intero.")
     parser.add_argument("--remove_xml_comments", help="Rimuove i commenti xml nei file.")
+    parser.add_argument("--stream", action='store_true', help="Scrive l'XML durante la scansione, senza tenere l'albero in memoria")
+    parser.add_argument("--workers", type=int, help="Numero di processi per la lettura dei file (0 = sequenziale)")
+    parser.add_argument("--incremental", action='store_true', help="Riusa il manifest della run precedente per i file invariati")
+    parser.add_argument("--large-file-max-bytes", type=int, help="Byte massimi letti per file (0 = nessun limite)")
+    parser.add_argument("--large-file-mode", choices=["truncate", "head_tail", "metadata"], help="Politica per i file oltre il limite")
+    parser.add_argument("--dedup", action='store_true', help="Emette una sola volta i contenuti identici, i duplicati diventano riferimenti")
+    parser.add_argument("--compress-level", type=int, choices=range(0, 10), metavar="0-9", help="Livello di compressione per output .gz, .xz (0-9) e .bz2 (1-9)")
+    parser.add_argument("--cdata", action='store_true', help="Contenuto dei file in blocchi CDATA, senza escape")
+    parser.add_argument("--strip-comments", action='store_true', help="Rimuove i commenti (C#, Python, JS/TS, XML)")
+    parser.add_argument("--collapse-blank-lines", action='store_true', help="Riduce le righe vuote consecutive a una")
+    parser.add_argument("--trim-trailing-whitespace", action='store_true', help="Rimuove gli spazi a fine riga")
+    parser.add_argument("--index", action='store_true', help="Scrive l'indice nome.xml.dadidx per estrarre i file senza analizzare l'XML")
+    parser.add_argument("--token-budget", type=int, help="Token stimati massimi per documento: file interi distribuiti in nome.chunkN.xml")
+    parser.add_argument("--binary-base64-max-bytes", type=int, help="Emette in base64 i file binari fino a questa dimensione (0 = no)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS,
+                        help="Formato dell'output: xml, jsonl (un oggetto JSON per file) o auto (dall'estensione, default)")
+    parser.add_argument("--gitignore", action='store_true', help="Salta cartelle e file ignorati dai .gitignore (cartelle ignorate non visitate)")
+    parser.add_argument("--detection-cache", nargs="?", const=DEFAULT_CACHE_PATH, metavar="FILE",
+                        help="Riusa tra le run l'encoding dei file invariati (default: _artifacts/detection_cache.sqlite)")
+    parser.add_argument("--stats", nargs="?", const=STATS_FORMAT_TABLE, choices=STATS_FORMATS,
+                        help="Stampa tempi per fase e contatori della run (table o json)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="Esegue la run sotto cProfile e salva FILE.pstats (default: output.pstats)")
+    parser.add_argument("--batch", nargs="+", metavar="CONFIG_O_CARTELLA",
+                        help="Esegue più target in un solo processo con un pool condiviso (file di configurazione o cartelle)")
+    parser.add_argument("--batch-jobs", type=int, help="Target elaborati contemporaneamente in modalità batch (0 = automatico)")
+    parser.add_argument("--watch", action='store_true', help="Rigenera l'output a ogni modifica della cartella target (Ctrl+C per terminare)")
+    parser.add_argument("--watch-debounce", type=float, metavar="SECONDI",
+                        help=f"Secondi senza modifiche prima di rigenerare (default: {DEFAULT_DEBOUNCE})")
+    parser.add_argument("--watch-poll", action='store_true', help="Rileva le modifiche con il polling anche dove inotify è disponibile")
     parser.add_argument("--help", action='store_true')
 
     args = parser.parse_args()
@@ -76,6 +263,9 @@ def main():
         show_full_help()
         return
 
+    if args.batch:
+        return run_batch_mode(args)
+
     # Gestione config iniziale
     default_config = AppConfig.DEFAULT_FILE_NAME_CONFIG
     config_path = args.config or default_config
@@ -98,23 +288,23 @@ def main():
 
     # sostituisce i placeholder 
     app_config.resolve_output_path()
+
+    if args.watch:
+        return run_watch_mode(app_config, args)
     
-    # Generazione XML
-    success, message = fs_to_dad(
-        target_path_folder=app_config.target_path_folder,
-        output_file=app_config.output_path_file,
-        indent_chars="  " if app_config.indent_content else "",
-        sanitize=app_config.sanitize,
-        split_size=app_config.split_size,
-        remove_xml_comments=app_config.remove_xml_comments,
-        ignore_folders=app_config.exclude_folders,
-        ignore_files=app_config.exclude_files,
-        include_folders=app_config.include_folders,
-        include_files=app_config.include_files
-    )
+    # Generazione XML, eventualmente sotto cProfile
+    stats = RunStats()
+    profiler = start_profiler(args)
+    success, message = fs_to_dad(**app_config.fs_to_dad_arguments(), stats=stats)
+    stop_profiler(profiler, args, f"{app_config.output_path_file}.pstats")
+    if args.stats and success:
+        print(stats.format(args.stats))
 
     # print(f"✅ {message}" if success else f"❌ {message}")
-    logger.success(f"{message}")
+    if success:
+        logger.success(f"{message}")
+    else:
+        logger.error(f"{message}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -8,12 +8,19 @@ Generatore XML con supporto a:
 from _modules.logging.logging import create_logger 
 logger = create_logger(__name__) 
 
-import re
 import os
-import datetime
-from _modules.xmlnode import XMLNode
-from _modules.file_utils import FileHandler
-import xml.etree.ElementTree as ET
+import contextlib
+from _modules.file_utils import DetectionCache, compression_suffix, compress_level_error
+from dad_writer import DadTreeWriter, DadStreamWriter, DadChunkWriter, DadJsonlWriter
+from dad_writer import OUTPUT_FORMAT_AUTO, OUTPUT_FORMAT_JSONL, OUTPUT_FORMATS, resolve_output_format
+from dad_writer import FILE_HASH_ATTRIBUTE, FILE_REF_ATTRIBUTE, FILE_ENCODING_ATTRIBUTE
+from file_ingest import iter_file_contents, EVENT_FOLDER, EVENT_FILE, EVENT_FOLDER_END, EVENT_SUBTREE
+from file_ingest import LARGE_FILE_TRUNCATE, LARGE_FILE_MODES, BINARY_BASE64
+from dad_manifest import DadManifest, MANIFEST_SUFFIX
+from dad_index import INDEX_SUFFIX
+from run_stats import RunStats, PHASE_SCAN, PHASE_MATCH, PHASE_SERIALIZE, PHASE_WRITE, PHASE_TOTAL
+from pattern_matcher import PatternMatcher, glob_to_regex  # glob_to_regex riesportata per compatibilità
+from gitignore_rules import GitignoreRules, GITIGNORE_FILE
 
 def cb(value): # color boolean
     if value:
@@ -21,28 +28,17 @@ def cb(value): # color boolean
     return f"\033[31m{value}\033[0m"
 
 
-def glob_to_regex(pattern: str) -> str:
-    """Converte pattern glob in regex, supportando * e **.
-    
-    Args:
-        pattern: Stringa glob da convertire (es. "**/*.py")
-        
-    Returns:
-        Stringa regex con flag case-insensitive (?i)
-    """
-    pattern = pattern.replace("\\", "/")
-    
-    # Caso speciale: pattern "*" deve matchare qualsiasi cartella/file
-    if pattern == "*":
-        return r"(?i)^.*$"  # Aggiunto (?i) per ignorecase
-    
-    pattern = pattern.replace("**", "<GLOB_STAR>")
-    regex = re.escape(pattern)
-    regex = regex.replace("<GLOB_STAR>", ".*")
-    regex = regex.replace(r"\*", "[^/\\\\]*")  # Match qualsiasi carattere tranne / o \
-    regex = regex.replace(r"\/", r"[/\\]")      # Match esplicito per / o \
-    
-    return f"(?i)^{regex}$"  # Aggiunto (?i) all'inizio per ignorecase
+def file_attributes(record) -> dict:
+    """Attributi del File oltre a Name che dipendono dal contenuto letto (Encoding per i binari in base64)."""
+    if record.encoding == BINARY_BASE64:
+        return {FILE_ENCODING_ATTRIBUTE: BINARY_BASE64}
+    return {}
+
+
+def file_metadata(record) -> dict:
+    """Metadati del file letto per i writer che li emettono (DadJsonlWriter)."""
+    return {"size": record.size, "encoding": record.encoding, "binary": record.binary}
+
 
 def fs_to_dad(    
     target_path_folder: str,
@@ -55,7 +51,27 @@ def fs_to_dad(
     ignore_files: list = [],
     include_folders: list = ["*"],
     indent_content: bool = True,
-    include_files: list = []  
+    include_files: list = [],
+    stream: bool = False,
+    workers: int = 0,
+    incremental: bool = False,
+    large_file_max_bytes: int = 0,
+    large_file_mode: str = LARGE_FILE_TRUNCATE,
+    dedup: bool = False,
+    compress_level: int = None,
+    cdata: bool = False,
+    strip_comments: bool = False,
+    collapse_blank_lines: bool = False,
+    trim_trailing_whitespace: bool = False,
+    index: bool = False,
+    token_budget: int = 0,
+    binary_base64_max_bytes: int = 0,
+    gitignore: bool = False,
+    output_format: str = OUTPUT_FORMAT_AUTO,
+    detection_cache: str = "",
+    stats: RunStats = None,
+    executor=None,
+    subtrees=None
 ) -> tuple:
     """
     Genera un XML rappresentante la struttura del filesystem.
@@ -68,186 +84,278 @@ def fs_to_dad(
     :param include_folders: Lista di pattern per includere cartelle
     :param indent_content: Flag per indentare il contenuto
     :param include_files: Lista di pattern per includere file
+    :param split_size: Dimensione massima (in byte) di ciascuna parte nome.partN.xml, 0 = file unico
+    :param stream: Se True scrive cartelle e file durante la visita (memoria limitata al file più grande)
+    :param workers: Numero di processi per la lettura dei file (0 o 1 = sequenziale)
+    :param incremental: Se True usa il manifest nome.xml.manifest per non rileggere i file invariati
+    :param large_file_max_bytes: Byte massimi letti per file (0 = nessun limite)
+    :param large_file_mode: Politica oltre il limite: "truncate", "head_tail" o "metadata"
+    :param dedup: Se True i file con contenuto già emesso diventano <File Name=".." Ref="hash"/>
+                  e il primo esemplare riporta l'attributo Hash
+    :param compress_level: Livello di compressione 0-9 per output .gz/.xz, 1-9 per .bz2 (None = default del compressore)
+    :param cdata: Se True il contenuto dei file è emesso come CDATA, senza escape (sanitize non si applica ai contenuti)
+    :param strip_comments: Rimuove i commenti da C#, Python, JS/TS e XML senza toccare le stringhe
+    :param collapse_blank_lines: Riduce le righe vuote consecutive a una (stessi linguaggi)
+    :param trim_trailing_whitespace: Rimuove gli spazi a fine riga (stessi linguaggi)
+    :param index: Se True scrive l'indice nome.xml.dadidx con la posizione in byte di ogni file (vedi dad_index)
+    :param token_budget: Token stimati massimi per documento: i file interi (e le cartelle quando possibile)
+                         sono distribuiti nel minor numero di chunk nome.chunkN.xml, con il manifest
+                         nome.xml.chunks.json (vedi chunk_packer). 0 = documento unico
+    :param binary_base64_max_bytes: I file binari fino a questa dimensione sono emessi in base64
+                                    (attributo Encoding="base64"); 0 = solo il messaggio "file binario"
+    :param gitignore: Se True applica i file .gitignore della cartella target, delle sottocartelle e delle
+                      cartelle superiori fino alla radice del repository: le cartelle ignorate non sono
+                      visitate (vedi gitignore_rules)
+    :param output_format: "xml" (documento DAD), "jsonl" (un oggetto JSON per file e per riga, vedi
+                          DadJsonlWriter) o "auto" (jsonl per output nome.jsonl, anche compresso)
+    :param detection_cache: Percorso della cache persistente degli encoding condivisa tra run e configurazioni
+                            (vedi DetectionCache); "" = rilevamento a ogni run
+    :param stats: RunStats da riempire con tempi per fase, contatori e byte letti/scritti (vedi run_stats)
+    :param executor: ProcessPoolExecutor condiviso (modalità batch): la lettura usa questo pool invece
+                     di crearne uno; workers indica i processi del pool
+    :param subtrees: SubtreeCache della modalità watch: le cartelle invariate dalla run precedente
+                     sono riemesse senza scandir né lettura dei file (vedi dad_watch)
     :return: Tupla (successo: bool, messaggio: str)
     """
+    if stats is None:
+        stats = RunStats(timed=False)
+    run_started = stats.clock()
 
     if not os.path.exists(target_path_folder):
         return False, f"Cartella {target_path_folder} non trovata"
+    if large_file_mode not in LARGE_FILE_MODES:
+        return False, f"large_file_mode non valido: {large_file_mode} (ammessi: {', '.join(LARGE_FILE_MODES)})"
+    if token_budget and split_size:
+        return False, "split_size e token_budget sono alternativi"
+    if output_format not in OUTPUT_FORMATS:
+        return False, f"output_format non valido: {output_format} (ammessi: {', '.join(OUTPUT_FORMATS)})"
+    output_format = resolve_output_format(output_format, output_file)
+    if output_format == OUTPUT_FORMAT_JSONL and (split_size or token_budget or index):
+        return False, "split_size, token_budget e index sono disponibili solo con output xml"
+    compress_error = compress_level_error(output_file, compress_level)
+    if compress_error:
+        return False, compress_error
 
-    include_folder_regex = [re.compile(glob_to_regex(p)) for p in include_folders]
-    exclude_folder_regex = [re.compile(glob_to_regex(p)) for p in ignore_folders]
-    
-    # include_file_regex = [re.compile(glob_to_regex(p)) for p in include_files]
-    include_file_regex = [re.compile(glob_to_regex(p)) for p in include_files]
-    exclude_file_regex = [re.compile(glob_to_regex(p)) for p in ignore_files]
-
-    def add_element(
-            parent: XMLNode, 
-            current_dir: str, 
-            ignore_folders: list, 
-            ignore_files: list, 
-            include_folder_regex: list, 
-            root_path: str,
-            indent_content: bool,
-            include_file_regex: list,
-            exclude_file_regex:list,
-            is_folder_included:False 
-        ):
-        # # Percorso assoluto normalizzato
-        # abs_path = os.path.abspath(current_dir).replace("\\", "/")  
-                    
-        # # Verifica se la cartella deve essere inclusa (match con almeno un pattern di inclusione)
-        # is_folder_included = any(re.search(rgx, abs_path) for rgx in include_folder_regex)
-        # # Verifica se la cartella deve essere esclusa (match con almeno un pattern di esclusione)
-        # is_folder_excluded = any(re.search(rgx, abs_path) for rgx in exclude_folder_regex)
-
-        # msg = f"incluso:{is_folder_included}, escluso:{is_folder_excluded}, path:{abs_path}, "
-        # logger.debug(msg)
-        # Percorso assoluto 
-        abs_path = os.path.abspath(current_dir)  
-        # Percorso relativo normalizzato
-        rel_path = os.path.relpath(abs_path, root_path).replace("\\", "/")       
-        # Verifica se la cartella deve essere inclusa (match con almeno un pattern di inclusione)
-        if not is_folder_included:
-            is_folder_included = any(re.search(rgx, rel_path) for rgx in include_folder_regex)
-        # Verifica se la cartella deve essere esclusa (match con almeno un pattern di esclusione)
-        is_folder_excluded = any(re.search(rgx, rel_path) for rgx in exclude_folder_regex)
+    matcher = PatternMatcher.shared(include_folders=include_folders,
+                                    exclude_folders=ignore_folders,
+                                    include_files=include_files,
+                                    exclude_files=ignore_files)
+
+    def scan_folder(current_dir: str, rel_path: str, is_folder_included: bool, rules):
+        """
+        Decide se visitare una cartella e ne restituisce le voci, prima file poi cartelle.
+
+        :param rules: GitignoreRules della cartella superiore (None senza gitignore)
+        :return: Tupla (iteratore delle voci, rel_path, inclusa, regole) oppure None se la cartella è saltata
+        """
+        # Verifica inclusione (match con almeno un pattern) ed esclusione della cartella
+        started = stats.clock()
+        # saltata: nessun file o sottocartella può essere incluso, il sottoalbero non viene scansionato
+        is_folder_included, is_folder_excluded, is_subtree_skipped = matcher.folder_visit(rel_path, is_folder_included)
+        started = stats.add_since(PHASE_MATCH, started)
 
         msg = f"incluso:{is_folder_included}, escluso:{is_folder_excluded}, path:{rel_path}, "
         logger.debug(msg)
 
-        # # se non sono inclusi o sono esclusi allora esce
-        # if not is_folder_included or is_folder_excluded:
-        #     return
-        # se non sono inclusi o sono esclusi allora esce
+        # se è esclusa allora esce
         if is_folder_excluded:
-            return
+            stats.count("dirs_excluded")
+            return None
+        if is_subtree_skipped:
+            logger.debug(f"sottoalbero saltato: {rel_path}")
+            stats.count("dirs_excluded")
+            return None
 
-        folder_node = XMLNode("Folder", {"Name": os.path.basename(current_dir)})
-        # parent.add_child(folder_node)
-        founded_file_included = False
-
-        # scansione, prima file poi cartelle
-        entries = sorted(
-            os.scandir(current_dir),
-            key=lambda e: (
-                0 if e.is_file() else 1,  # Prima i file (0), poi le cartelle (1)
-                e.name.lower()            # Ordine alfabetico per nome
-            )
-        )
-        for entry in entries:
-            entry_path = os.path.join(current_dir, entry.name)
-            if entry.is_dir():
-                node = add_element(
-                    folder_node, 
-                    entry_path, 
-                    ignore_folders, 
-                    ignore_files, 
-                    include_folder_regex, 
-                    root_path, 
-                    indent_content,
-                    include_file_regex,
-                    exclude_file_regex,
-                    is_folder_included
+        # scansione, prima file poi cartelle; is_file() usa il tipo già letto da scandir
+        with os.scandir(current_dir) as scan:
+            entries = sorted(
+                scan,
+                key=lambda e: (
+                    0 if e.is_file() else 1,  # Prima i file (0), poi le cartelle (1)
+                    e.name.lower()            # Ordine alfabetico per nome
                 )
-                if node:
-                    folder_node.add_child(node)
-                    founded_file_included = True
-                    logger.debug(f"aggiungo nodo a {rel_path}")
-                else:
-                    logger.debug(f"NON aggiungo nodo a {rel_path}")
+            )
+        if rules is not None and any(entry.name == GITIGNORE_FILE for entry in entries):
+            rules = rules.child(current_dir, rel_path)
+        stats.add_since(PHASE_SCAN, started)
+        stats.count("dirs_visited")
+        return iter(entries), rel_path, is_folder_included, rules
+
+    def walk(root_dir: str):
+        """
+        Visita con stack esplicito (nessun limite di profondità dovuto alla ricorsione):
+        genera gli eventi cartella/file nell'ordine di scrittura.
+        """
+        frame = scan_folder(root_dir, ".", False, GitignoreRules.for_target(root_dir) if gitignore else None)
+        if frame is None:
+            return
+        yield EVENT_FOLDER, os.path.basename(root_dir)
+        stack = [frame]
+
+        while stack:
+            entries, rel_path, is_folder_included, rules = stack[-1]
+            for entry in entries:
+                entry_rel_path = entry.name if rel_path == "." else f"{rel_path}/{entry.name}"
+                if entry.is_dir():
+                    if rules is not None and rules.ignored(entry_rel_path, True):
+                        # ignorata da .gitignore: il sottoalbero non viene scansionato
+                        logger.debug(f"cartella ignorata da .gitignore: {entry_rel_path}")
+                        stats.count("dirs_excluded")
+                        continue
+                    if subtrees is not None and subtrees.reusable(entry_rel_path):
+                        # sottoalbero invariato: eventi e contenuti della run precedente
+                        if manifest:
+                            manifest.keep_folder(entry_rel_path)
+                        yield EVENT_SUBTREE, entry_rel_path
+                        continue
+                    frame = scan_folder(entry.path, entry_rel_path, is_folder_included, rules)
+                    if frame is not None:
+                        # la cartella corrente riprende dalla voce successiva dopo la sottocartella
+                        yield EVENT_FOLDER, entry.name
+                        stack.append(frame)
+                        break
+                    continue
 
-            else:
                 file_name = entry.name
-                # is_file_included = not include_file_regex or any(rgx.match(file_name) for rgx in include_file_regex)
-                # is_file_excluded = any(rgx.search(file_name) for rgx in exclude_file_regex)   
-                # if not is_file_included or is_file_excluded:
-                #     continue
                 # controlla se il file è da escludere o da includere 
-                is_file_included = not include_file_regex or any(rgx.match(file_name) for rgx in include_file_regex)   
-                is_file_excluded = any(rgx.search(file_name) for rgx in exclude_file_regex)   
+                started = stats.clock()
+                is_file_included, is_file_excluded = matcher.file_decision(file_name)
+                stats.add_since(PHASE_MATCH, started)
+                stats.count("files_visited")
 
-                logger.debug(" ")
-                # msg = f"FILE incluso:{cb(is_file_included)}, escluso:{cb(is_file_excluded)}, file:{file_name}, "
                 msg = f"FILE incluso:{is_file_included}, escluso:{is_file_excluded}, file:{file_name}, "
                 logger.debug(msg)
 
-                if is_file_excluded:
+                if is_file_excluded or (not is_folder_included and not is_file_included) \
+                        or (rules is not None and rules.ignored(entry_rel_path, False)):
+                    stats.count("files_excluded")
                     continue
 
-                msg = f"incluso {is_folder_included}, PATH :{rel_path}"
-                logger.debug(msg)
+                logger.debug(f"includo {file_name}, PATH :{rel_path}")
+                stats.count("files_included")
+                yield EVENT_FILE, (entry, entry_rel_path)
+            else:
+                stack.pop()
+                yield EVENT_FOLDER_END, None
 
-                if not is_folder_included and not is_file_included:
-                    continue 
 
-                msg = f"includo {file_name}, "
-                logger.debug(msg)
+    # la suddivisione in parti avviene durante la visita, quindi richiede lo stream;
+    # anche l'output compresso usa lo stream: il compressore riceve i dati durante la visita;
+    # l'indice usa lo stream perché le posizioni in byte sono note solo durante la scrittura
+    index_file = output_file + INDEX_SUFFIX if index else None
+    if output_format == OUTPUT_FORMAT_JSONL:
+        # una riga per file, scritta durante la visita
+        writer = DadJsonlWriter(output_file, compress_level=compress_level)
+    elif token_budget:
+        # la distribuzione in chunk richiede i costi di tutti i file: si raccoglie e si scrive alla chiusura
+        writer = DadChunkWriter(output_file,
+                                token_budget=token_budget,
+                                indent_chars=indent_chars,
+                                sanitize=sanitize,
+                                compress_level=compress_level,
+                                cdata=cdata,
+                                index=index)
+    elif stream or split_size or compression_suffix(output_file) or index:
+        writer = DadStreamWriter(output_file,
+                                 indent_chars=indent_chars,
+                                 sanitize=sanitize,
+                                 split_size=split_size,
+                                 compress_level=compress_level,
+                                 cdata=cdata,
+                                 index_file=index_file)
+    else:
+        writer = DadTreeWriter(output_file,
+                               indent_chars=indent_chars,
+                               sanitize=sanitize,
+                               compress_level=compress_level,
+                               cdata=cdata)
 
+    # manifest accanto all'output: i file invariati riusano il contenuto della run precedente
+    ingest_options = {
+        "remove_xml_comments": remove_xml_comments,
+        "large_file_max_bytes": large_file_max_bytes,
+        "large_file_mode": large_file_mode,
+        "strip_comments": strip_comments,
+        "collapse_blank_lines": collapse_blank_lines,
+        "trim_trailing_whitespace": trim_trailing_whitespace,
+        "binary_base64_max_bytes": binary_base64_max_bytes,
+    }
+    manifest = None
+    if incremental:
+        manifest = DadManifest(output_file + MANIFEST_SUFFIX, ingest_options)
+    # la cache degli encoding non cambia il contenuto elaborato: non fa parte delle opzioni del manifest
+    read_options = dict(ingest_options, detection_cache=detection_cache) if detection_cache else ingest_options
 
-                fh = FileHandler(entry_path)
-                if not fh.exists()[0]:
+    # hash dei contenuti già emessi -> encoding del primo esemplare (deduplicazione)
+    emitted_hashes = {}
+    duplicates = 0
+
+    with contextlib.ExitStack() as stack:
+        if manifest:
+            stack.enter_context(manifest)
+        # la lettura dei file (ed eventuale rimozione commenti) può avvenire in un pool di processi
+        events = iter_file_contents(walk(target_path_folder),
+                                    workers=workers,
+                                    options=read_options,
+                                    manifest=manifest,
+                                    timed=stats.timed,
+                                    executor=executor)
+        if subtrees is not None:
+            events = subtrees.track(events)
+        with writer:
+            for event, value in events:
+                if event == EVENT_FILE and value is not None:
+                    stats.add_record(value)
+                started = stats.clock()
+                if event == EVENT_FOLDER:
+                    writer.enter_folder(value)
+                elif event == EVENT_FOLDER_END:
+                    writer.leave_folder()
+                elif value is None:
                     continue
-                fh.get_info()
-
-                node_file = XMLNode("File", {
-                    "Name": fh.name, 
-                    # "Size": str(fh.size),
-                    # "MIME": fh.mime,
-                    # "Encoding": fh.encoding
-                })
-                # if fh.bom:
-                #     node_file.attributes["BOM"] = "True"
-
-                content_file, msg_err = fh.read()
-                if content_file:
-                    is_text, msg_err = fh.is_text()
-                    if not is_text:
-                        msg = f"File binario: [MIME: {fh.mime}, Encoding: {fh.encoding}] {fh.file_path}"
-                        content_file = msg
-                        logger.warning(msg)
-                elif msg_err:
-                    msg = f"Errore [{msg_err}] - lettura file: {fh.file_path}"
-                    content_file = msg
-                    logger.warning(msg)
-
-                node_file.set_text(content_file)
-                folder_node.add_child(node_file)
-                founded_file_included = True
-
-        return folder_node if founded_file_included else None
-
-
-    node_dad = XMLNode("DataArchitectureDesign", {"Author": "Davide"})
-
-    node_creation = XMLNode("Create", {
-        "Date": datetime.datetime.now().strftime("%d-%m-%Y"),
-        "Hour": datetime.datetime.now().strftime("%H:%M:%S")
-    })
-    node_dad.add_child(node_creation)
-    
-    node_filesystem = XMLNode("FileSystem")
-    node_dad.add_child(node_filesystem)
-
-    node = add_element(
-        node_filesystem, 
-        target_path_folder, 
-        ignore_folders, 
-        ignore_files, 
-        include_folder_regex, 
-        target_path_folder, 
-        indent_content,
-        include_file_regex,
-        exclude_file_regex,
-        False
-    )
-    if node:
-        node_filesystem.add_child(node)
-
-    node_dad.write_file(file_name=output_file, 
-                        indent_chars=indent_chars, 
-                        sanitize=sanitize, 
-                        split_size=split_size, 
-                        remove_xml_comments=remove_xml_comments)
-    
-    return True, f"XML generato: {output_file}"
\ No newline at end of file
+                elif dedup and value.hash and not value.error:
+                    # l'hash è calcolato durante la lettura sui byte del file, combinato con la rappresentazione
+                    # (linguaggio di content_transform, base64): stesso hash => stesso contenuto emesso
+                    # hash -> encoding del primo esemplare: un Ref vale solo verso un contenuto nella stessa
+                    # forma (testo decodificato o base64), anche con hash provenienti da un manifest precedente
+                    emitted_encoding = emitted_hashes.get(value.hash, value.encoding)
+                    if emitted_encoding != value.encoding:
+                        logger.warning(f"Hash già emesso con encoding {emitted_encoding}, file non deduplicato: {value.name}")
+                        writer.add_file(value.name, value.content, file_attributes(value), file_metadata(value))
+                    elif value.hash in emitted_hashes:
+                        writer.add_file(value.name, None, {FILE_REF_ATTRIBUTE: value.hash}, file_metadata(value))
+                        duplicates += 1
+                    else:
+                        emitted_hashes[value.hash] = value.encoding
+                        writer.add_file(value.name, value.content, {FILE_HASH_ATTRIBUTE: value.hash, **file_attributes(value)},
+                                        file_metadata(value))
+                else:
+                    writer.add_file(value.name, value.content, file_attributes(value), file_metadata(value))
+                stats.add_since(PHASE_SERIALIZE, started)
+            close_started = stats.clock()
+        stats.add_since(PHASE_WRITE, close_started)
+    if detection_cache:
+        DetectionCache.shared(detection_cache).flush()
+
+    stats.count("bytes_written", sum(os.path.getsize(file_name) for file_name in writer.part_files))
+    if manifest:
+        stats.count("files_reused", manifest.hits)
+    if subtrees is not None:
+        stats.count("files_reused", subtrees.replayed)
+    stats.add_since(PHASE_TOTAL, run_started)
+
+    if dedup:
+        logger.info(f"Deduplicazione: {duplicates} file sostituiti da riferimento, {len(emitted_hashes)} contenuti unici")
+    if manifest:
+        logger.info(f"Incrementale: {manifest.hits} file riusati, {manifest.misses} letti")
+
+    if output_format == OUTPUT_FORMAT_JSONL:
+        return True, f"JSONL generato: {output_file}"
+    index_msg = f", indice: {index_file}" if index else ""
+    if token_budget:
+        index_msg = ", indice per chunk" if index else ""
+        return True, (f"XML generato in {len(writer.part_files)} chunk da al più {token_budget} token stimati, "
+                      f"manifest: {writer.manifest_file}{index_msg}")
+    if split_size:
+        return True, f"XML generato in {len(writer.part_files)} parti: {', '.join(writer.part_files)}{index_msg}"
+    return True, f"XML generato: {output_file}{index_msg}"
\ No newline at end of file
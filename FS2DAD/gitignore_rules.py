@@ -0,0 +1,230 @@
+"""
+Regole .gitignore per la visita di fs_to_dad (opzione gitignore).
+
+Ogni cartella con un file .gitignore aggiunge un livello a una catena di GitignoreRules:
+il livello più profondo che ha un pattern corrispondente decide, e nello stesso file vince
+l'ultimo pattern corrispondente, come in git. Se la cartella target è dentro un repository,
+la catena parte dai .gitignore delle cartelle superiori fino alla radice del repository.
+
+Semantica dei pattern (gitignore(5)):
+- righe vuote e "#..." ignorate, "\\#" e "\\!" per i caratteri letterali, spazi finali rimossi
+  se non preceduti da "\\"
+- "!" nega il pattern: il percorso torna incluso
+- "/" finale: solo cartelle
+- "/" iniziale o interno: pattern ancorato alla cartella del .gitignore; senza "/" il pattern
+  vale a ogni livello sotto di essa
+- "*" e "?" non attraversano "/", "[...]" classi di caratteri ("!" o "^" per negarle),
+  "**/" iniziale, "/**/" interno (zero o più cartelle) e "/**" finale (tutto il contenuto)
+
+Le cartelle ignorate non vengono visitate: come in git, un pattern "!" non può reincludere
+un file sotto una cartella ignorata. Le cartelle .git sono sempre ignorate.
+
+I pattern di un file sono compilati una volta e riusati finché il file non cambia (size,
+mtime_ns), anche tra run dello stesso processo (modalità batch e watch). I pattern consecutivi
+con la stessa negazione sono uniti in una sola regex, separata per cartelle e per file.
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import re
+
+GITIGNORE_FILE = ".gitignore"
+GIT_FOLDER = ".git"
+
+# percorso assoluto del .gitignore -> ((size, mtime_ns), gruppi compilati)
+_compiled = {}
+
+
+def _translate_segment(segment: str) -> str:
+    """Traduce un segmento di pattern (senza "/") nel corpo della regex."""
+    regex = []
+    index, length = 0, len(segment)
+    while index < length:
+        char = segment[index]
+        index += 1
+        if char == "\\" and index < length:
+            regex.append(re.escape(segment[index]))
+            index += 1
+        elif char == "*":
+            # "**" non isolato tra "/" vale come "*"
+            while index < length and segment[index] == "*":
+                index += 1
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = index
+            if end < length and segment[end] in "!^":
+                end += 1
+            if end < length and segment[end] == "]":
+                end += 1
+            while end < length and segment[end] != "]":
+                end += 1
+            if end >= length:
+                # "[" senza chiusura: carattere letterale
+                regex.append(re.escape(char))
+                continue
+            body = segment[index:end].replace("[", "\\[")
+            index = end + 1
+            if body[:1] in ("!", "^"):
+                regex.append(f"[^/{body[1:]}]")
+            else:
+                regex.append(f"[{body}]")
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
+
+
+def parse_gitignore_line(line: str):
+    """
+    Converte una riga di .gitignore nel corpo di una regex sul percorso relativo alla cartella del file.
+
+    :return: Tupla (regex: str, negato: bool, solo_cartelle: bool) oppure None per righe vuote e commenti
+    """
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line[:-1]
+    if not line:
+        return None
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    segments = line.split("/")
+    regex = "" if anchored else "(?:.*/)?"
+    for number, segment in enumerate(segments):
+        last = number == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:.*/)?"
+        else:
+            regex += _translate_segment(segment) + ("" if last else "/")
+    return regex, negated, dir_only
+
+
+def compile_gitignore(lines) -> list:
+    """
+    Compila le righe di un .gitignore in gruppi di pattern consecutivi con la stessa negazione.
+
+    :return: Lista di tuple (negato, regex per le cartelle, regex per i file o None), dall'ultimo gruppo al primo
+    """
+    groups = []
+    for line in lines:
+        rule = parse_gitignore_line(line)
+        if rule is None:
+            continue
+        regex, negated, dir_only = rule
+        if not groups or groups[-1][0] != negated:
+            groups.append((negated, [], []))
+        groups[-1][1].append(regex)
+        if not dir_only:
+            groups[-1][2].append(regex)
+    return [(negated,
+             re.compile("|".join(f"(?:{regex})" for regex in folder_rules)),
+             re.compile("|".join(f"(?:{regex})" for regex in file_rules)) if file_rules else None)
+            for negated, folder_rules, file_rules in reversed(groups)]
+
+
+def load_gitignore(file_path: str) -> list:
+    """
+    Gruppi compilati di un file .gitignore, riusati finché size e mtime_ns non cambiano.
+
+    :return: Lista di gruppi (vedi compile_gitignore), vuota se il file non è leggibile
+    """
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return []
+    key = (stat_result.st_size, stat_result.st_mtime_ns)
+    cached = _compiled.get(file_path)
+    if cached and cached[0] == key:
+        return cached[1]
+    try:
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            groups = compile_gitignore(f.read().splitlines())
+    except OSError as e:
+        logger.warning(f"Errore [{e}] - lettura file: {file_path}")
+        groups = []
+    _compiled[file_path] = (key, groups)
+    return groups
+
+
+class GitignoreRules:
+    """Livello della catena di regole: i pattern di un .gitignore e il livello della cartella superiore."""
+
+    def __init__(self, groups: list = None, strip: int = 0, prefix: str = "", parent: "GitignoreRules" = None):
+        """
+        :param groups: Gruppi compilati del .gitignore (vedi compile_gitignore); None per la catena vuota
+        :param strip: Caratteri da togliere al percorso relativo alla cartella target (cartella del .gitignore + "/")
+        :param prefix: Percorso da anteporre (cartella target relativa a una cartella superiore, con "/" finale)
+        :param parent: Livello della cartella superiore
+        """
+        self.groups = groups
+        self.strip = strip
+        self.prefix = prefix
+        self.parent = parent
+
+    @classmethod
+    def for_target(cls, target_path: str) -> "GitignoreRules":
+        """
+        Catena iniziale per la cartella target: i .gitignore delle cartelle superiori fino
+        alla radice del repository (la cartella con .git), se la target è dentro un repository.
+        Il .gitignore della target stessa è caricato dalla visita con child.
+        """
+        rules = cls()
+        ancestors = []
+        folder = os.path.abspath(target_path)
+        while not os.path.exists(os.path.join(folder, GIT_FOLDER)):
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                # nessun repository sopra la target
+                return rules
+            folder = parent
+            ancestors.append(folder)
+        target = os.path.abspath(target_path)
+        for ancestor in reversed(ancestors):
+            groups = load_gitignore(os.path.join(ancestor, GITIGNORE_FILE))
+            if groups:
+                prefix = os.path.relpath(target, ancestor).replace(os.sep, "/") + "/"
+                rules = cls(groups, prefix=prefix, parent=rules)
+        return rules
+
+    def child(self, folder_path: str, rel_path: str) -> "GitignoreRules":
+        """
+        Catena per una cartella visitata che contiene un .gitignore.
+
+        :param folder_path: Percorso della cartella
+        :param rel_path: Percorso relativo alla cartella target ("." per la radice)
+        :return: Nuovo livello, oppure questa catena se il .gitignore non ha pattern
+        """
+        groups = load_gitignore(os.path.join(folder_path, GITIGNORE_FILE))
+        if not groups:
+            return self
+        return GitignoreRules(groups, strip=0 if rel_path == "." else len(rel_path) + 1, parent=self)
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        :param rel_path: Percorso relativo alla cartella target con separatore "/"
+        :param is_dir: Il percorso è una cartella (i pattern con "/" finale valgono solo per le cartelle)
+        :return: True se il percorso è ignorato
+        """
+        if is_dir and rel_path.rpartition("/")[2] == GIT_FOLDER:
+            return True
+        rules = self
+        while rules is not None and rules.groups is not None:
+            path = rules.prefix + rel_path[rules.strip:]
+            for negated, folder_regex, file_regex in rules.groups:
+                regex = folder_regex if is_dir else file_regex
+                if regex is not None and regex.fullmatch(path):
+                    return not negated
+            rules = rules.parent
+        return False
@@ -15,8 +15,57 @@ def show_full_help():
     3. Genera con configurazione custom:
        python fs2dad.py --config mio_config.json
 
+    4. Genera più target in un solo processo (file di configurazione o cartelle), pool condiviso:
+       python fs2dad.py --batch repo1.json repo2.json ./repo3 [--workers N] [--batch-jobs J] [--stats]
+
+    5. Rigenera a ogni modifica della cartella (solo le cartelle modificate vengono rilette):
+       python fs2dad.py --target ./mio_progetto --watch [--incremental] [--watch-debounce 0.5]
+
+    6. Ripristina cartelle e file da un documento generato (anche parti o .xml.gz):
+       python dad2fs.py mio_progetto.xml --target ./ripristino [--workers N] [--mode auto|xml|raw]
+
     🔧 Parametri avanzati:
     --indent-content       Indenta il contenuto dei file testuali
     --include-files        Filtra file specifici (es: *.py,*.txt)
+    --stream               Scrive l'XML durante la scansione (memoria limitata al file più grande)
+    --split_size N         Divide l'output in parti nome.partN.xml di al più N byte
+    --workers N            Legge e decodifica i file in N processi paralleli
+    --incremental          Rilegge solo i file cambiati (manifest accanto all'output)
+    --large-file-max-bytes N  Byte massimi letti per file; oltre si applica --large-file-mode
+    --large-file-mode M    truncate (primi N byte), head_tail (inizio e fine), metadata (solo dimensione)
+    --dedup                File identici emessi una volta: i duplicati sono <File Name=".." Ref="hash"/>
+    --compress-level N     Livello 0-9 per output compresso (--output nome.xml.gz / .xml.xz), 1-9 per .xml.bz2
+    --cdata                Contenuto dei file in <![CDATA[...]]> invece del testo escapato (--sanitize)
+    --strip-comments       Rimuove i commenti da C#, Python, JS/TS e XML (stringhe intatte)
+    --collapse-blank-lines Al più una riga vuota consecutiva
+    --trim-trailing-whitespace  Rimuove gli spazi a fine riga
+    --index                Scrive nome.xml.dadidx: posizione in byte di ogni file nell'output
+                           (estrazione diretta: python dad_extract.py nome.xml.dadidx percorso/file.cs)
+    --token-budget N       Chunk nome.chunkN.xml da al più N token stimati (caratteri/4) con file interi,
+                           cartelle intere quando possibile, nel minor numero di chunk (nome.xml.chunks.json)
+    --binary-base64-max-bytes N  File binari fino a N byte emessi in base64 (Encoding="base64"),
+                           ripristinati byte per byte da dad2fs; oltre N solo il messaggio "file binario"
+    --format F             Formato dell'output: xml, jsonl o auto (default: jsonl se --output termina
+                           in .jsonl, anche .jsonl.gz/.xz/.bz2, altrimenti xml). In jsonl ogni riga è un file:
+                           {"path", "size", "encoding", "content"} (+ "binary", "hash"/"ref" con --dedup),
+                           divisibile per righe ed elaborabile in parallelo
+    --gitignore            Applica i .gitignore (target, sottocartelle e cartelle superiori fino alla
+                           radice del repository): cartelle ignorate non visitate, negazioni "!" e
+                           pattern ancorati come in git; si somma a exclude_folders/exclude_files
+    --detection-cache [FILE]  Cache SQLite degli encoding per (device, inode, size, mtime), condivisa
+                           tra run e configurazioni (default: _artifacts/detection_cache.sqlite):
+                           i file invariati non ripassano da charset_normalizer
+    --stats [table|json]   Stampa tempi wall/CPU per fase (scan, match, detect, read, serialize, write),
+                           file e cartelle visitati/inclusi/esclusi/binari, byte letti e scritti
+    --profile [FILE]       Esegue la run sotto cProfile e salva FILE (default: output.pstats)
+    --batch VOCI...        Più target in un processo: ogni voce è un config .json o una cartella
+                           (con --config come base); pool di --workers processi condiviso, target
+                           dal più grande (output precedente), riepilogo finale per target
+    --batch-jobs N         Target visitati contemporaneamente (default: fino a 4 con il pool)
+    --watch                Resta in ascolto e rigenera l'output a ogni modifica (inotify su Linux,
+                           altrimenti polling); cartelle escluse non osservate, sottoalberi invariati
+                           riusati dalla run precedente. Ctrl+C per terminare
+    --watch-debounce S     Secondi senza modifiche prima di rigenerare (default 0.5)
+    --watch-poll           Usa il polling (size/mtime ogni secondo) anche dove inotify è disponibile
     """
     print(help_text)
\ No newline at end of file
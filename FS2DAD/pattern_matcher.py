@@ -0,0 +1,198 @@
+"""
+Matcher compilato per i pattern di inclusione/esclusione di fs_to_dad.
+
+Ogni categoria (cartelle incluse/escluse, file inclusi/esclusi) viene unita in una
+sola alternanza regex compilata una volta, al posto di una lista di regex provate
+una per una. Le decisioni sono memorizzate per percorso relativo (cartelle) e per
+nome (file), che nei repository si ripete molto (AssemblyInfo.cs, __init__.py...).
+
+can_match_below risponde a "sotto questa cartella può ancora essere incluso
+qualcosa?" e permette di saltare un intero sottoalbero prima di os.scandir.
+
+PatternMatcher.shared restituisce un'istanza per insieme di pattern, riusata dalle run
+dello stesso processo (modalità batch e watch): regex compilate e decisioni restano calde.
+La memoria resta limitata anche in un processo watch che dura giorni: ogni cache di decisioni
+viene svuotata oltre MAX_CACHED_DECISIONS voci e sono conservati al più MAX_SHARED_MATCHERS
+matcher (eliminato il meno usato di recente).
+
+folder_visit combina le tre decisioni sulle cartelle nella regola usata da fs_to_dad, così la
+modalità watch non osserva le cartelle che la visita salterebbe.
+"""
+import re
+import threading
+
+# voci massime di ciascuna cache di decisioni (cartelle, file): oltre viene svuotata
+MAX_CACHED_DECISIONS = 65_536
+# insiemi di pattern diversi conservati da PatternMatcher.shared
+MAX_SHARED_MATCHERS = 16
+
+
+def glob_to_regex_body(pattern: str) -> str:
+    """Converte pattern glob nel corpo della regex (senza flag e ancore), supportando * e **.
+
+    Args:
+        pattern: Stringa glob da convertire (es. "**/*.py")
+
+    Returns:
+        Stringa regex
+    """
+    pattern = pattern.replace("\\", "/")
+
+    # Caso speciale: pattern "*" deve matchare qualsiasi cartella/file
+    if pattern == "*":
+        return r".*"
+
+    pattern = pattern.replace("**", "<GLOB_STAR>")
+    regex = re.escape(pattern)
+    regex = regex.replace("<GLOB_STAR>", ".*")
+    regex = regex.replace(r"\*", "[^/\\\\]*")  # Match qualsiasi carattere tranne / o \
+    regex = regex.replace(r"\/", r"[/\\]")      # Match esplicito per / o \
+    return regex
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Converte pattern glob in regex, supportando * e **.
+
+    Args:
+        pattern: Stringa glob da convertire (es. "**/*.py")
+
+    Returns:
+        Stringa regex con flag case-insensitive (?i)
+    """
+    return f"(?i)^{glob_to_regex_body(pattern)}$"  # Aggiunto (?i) all'inizio per ignorecase
+
+
+def compile_patterns(patterns: list):
+    """Unisce i pattern glob in un'unica regex compilata (None se la lista è vuota)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{glob_to_regex_body(p)})" for p in patterns), re.IGNORECASE)
+
+
+class PatternMatcher:
+    """Decisioni di inclusione/esclusione per cartelle (percorso relativo) e file (nome)."""
+
+    # istanze condivise per insieme di pattern (vedi shared)
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, include_folders: list = None, exclude_folders: list = None,
+                 include_files: list = None, exclude_files: list = None):
+        """
+        :param include_folders: Pattern delle cartelle da includere (percorso relativo)
+        :param exclude_folders: Pattern delle cartelle da escludere (percorso relativo)
+        :param include_files: Pattern dei file da includere (nome); vuoto = tutti
+        :param exclude_files: Pattern dei file da escludere (nome)
+        """
+        include_folders = include_folders or []
+        include_files = include_files or []
+        self._include_folder = compile_patterns(include_folders)
+        self._exclude_folder = compile_patterns(exclude_folders)
+        self._include_file = compile_patterns(include_files)
+        self._exclude_file = compile_patterns(exclude_files)
+        self._folder_cache = {}
+        self._file_cache = {}
+
+        # un pattern file con separatore non può mai corrispondere a un nome:
+        # se restano solo questi, nessun file può essere incluso per nome
+        self._files_can_match = not include_files or any("/" not in p.replace("\\", "/") for p in include_files)
+        self._folder_prefixes = [self._split_segments(p) for p in include_folders]
+
+    @classmethod
+    def shared(cls, include_folders: list = None, exclude_folders: list = None,
+               include_files: list = None, exclude_files: list = None) -> "PatternMatcher":
+        """
+        Matcher condiviso per gli stessi pattern: le decisioni dipendono solo dal percorso
+        relativo e dal nome, quindi valgono per ogni cartella target.
+        """
+        key = tuple(tuple(patterns or ()) for patterns in (include_folders, exclude_folders, include_files, exclude_files))
+        with cls._shared_lock:
+            matcher = cls._shared.pop(key, None)
+            if matcher is None:
+                matcher = cls(include_folders, exclude_folders, include_files, exclude_files)
+                if len(cls._shared) >= MAX_SHARED_MATCHERS:
+                    # ordine di inserimento = ordine d'uso: il primo è il meno usato di recente
+                    del cls._shared[next(iter(cls._shared))]
+            cls._shared[key] = matcher
+            return matcher
+
+    @staticmethod
+    def _split_segments(pattern: str):
+        """
+        Scompone un pattern cartella in regex per segmento fino al primo "**".
+
+        :return: Tupla (regex dei segmenti, True se il pattern termina con segmenti fissi)
+        """
+        pattern = pattern.replace("\\", "/")
+        if pattern == "*":
+            return [], False
+        segments = []
+        for segment in pattern.split("/"):
+            if "**" in segment:
+                return segments, False
+            segments.append(re.compile(glob_to_regex_body(segment), re.IGNORECASE))
+        return segments, True
+
+    def folder_decision(self, rel_path: str) -> tuple:
+        """
+        :param rel_path: Percorso relativo con separatore "/" ("." per la radice)
+        :return: Tupla (inclusa: bool, esclusa: bool)
+        """
+        decision = self._folder_cache.get(rel_path)
+        if decision is None:
+            decision = (
+                bool(self._include_folder and self._include_folder.fullmatch(rel_path)),
+                bool(self._exclude_folder and self._exclude_folder.fullmatch(rel_path)),
+            )
+            if len(self._folder_cache) >= MAX_CACHED_DECISIONS:
+                self._folder_cache.clear()
+            self._folder_cache[rel_path] = decision
+        return decision
+
+    def file_decision(self, name: str) -> tuple:
+        """
+        :param name: Nome del file
+        :return: Tupla (incluso: bool, escluso: bool) - senza pattern di inclusione ogni file è incluso
+        """
+        decision = self._file_cache.get(name)
+        if decision is None:
+            decision = (
+                not self._include_file or bool(self._include_file.fullmatch(name)),
+                bool(self._exclude_file and self._exclude_file.fullmatch(name)),
+            )
+            if len(self._file_cache) >= MAX_CACHED_DECISIONS:
+                self._file_cache.clear()
+            self._file_cache[name] = decision
+        return decision
+
+    def folder_visit(self, rel_path: str, parent_included: bool) -> tuple:
+        """
+        Decisione di visita di una cartella: l'inclusione della cartella padre vale per tutto il sottoalbero.
+
+        :param rel_path: Percorso relativo con separatore "/" ("." per la radice)
+        :param parent_included: La cartella padre è inclusa
+        :return: Tupla (inclusa: bool, esclusa: bool, saltata: bool) - saltata se nessun file
+                 o sottocartella può essere incluso
+        """
+        folder_included, excluded = self.folder_decision(rel_path)
+        included = parent_included or folder_included
+        skipped = not excluded and not included and not self.can_match_below(rel_path)
+        return included, excluded, skipped
+
+    def can_match_below(self, rel_path: str) -> bool:
+        """
+        Indica se sotto una cartella non inclusa può ancora essere incluso qualcosa.
+        La risposta è conservativa: False solo quando nessun file e nessuna sottocartella
+        può corrispondere ai pattern di inclusione.
+
+        :param rel_path: Percorso relativo della cartella ("." per la radice)
+        """
+        if self._files_can_match or "\\" in rel_path:
+            return True
+        parts = [] if rel_path == "." else rel_path.split("/")
+        for segments, fixed_length in self._folder_prefixes:
+            if fixed_length and len(parts) >= len(segments):
+                continue
+            if all(segment.fullmatch(part) for segment, part in zip(segments, parts)):
+                return True
+        return False
@@ -0,0 +1,143 @@
+"""
+Statistiche di una run di fs_to_dad: tempi per fase e contatori.
+
+fs_to_dad(..., stats=RunStats()) riempie l'oggetto durante la run; il risultato resta la
+tupla (successo, messaggio). Fasi (tempo wall e CPU):
+- scan:      os.scandir e ordinamento delle voci delle cartelle
+- match:     pattern di inclusione/esclusione di cartelle e file
+- detect:    rilevamento dell'encoding (charset_normalizer)
+- read:      lettura dei file, decodifica e trasformazione del contenuto
+- serialize: passaggio di cartelle e file al writer (con lo stream anche la scrittura dell'output)
+- write:     chiusura del writer (albero in memoria: serializzazione e scrittura del documento;
+             chunk: distribuzione e scrittura dei chunk)
+- total:     intera run
+
+Con workers > 1 detect e read sono misurate nei processi worker e sommate: possono superare
+il tempo totale. I file riusati dal manifest (incremental) non hanno tempi di lettura.
+
+Senza stats fs_to_dad usa RunStats(timed=False): i contatori costano poco, gli orologi
+(process_time è una chiamata di sistema) vengono saltati.
+"""
+import json
+import time
+
+PHASE_SCAN = "scan"
+PHASE_MATCH = "match"
+PHASE_DETECT = "detect"
+PHASE_READ = "read"
+PHASE_SERIALIZE = "serialize"
+PHASE_WRITE = "write"
+PHASE_TOTAL = "total"
+PHASES = [PHASE_SCAN, PHASE_MATCH, PHASE_DETECT, PHASE_READ, PHASE_SERIALIZE, PHASE_WRITE, PHASE_TOTAL]
+
+COUNTERS = [
+    "dirs_visited",     # cartelle scansionate
+    "dirs_excluded",    # cartelle escluse o sottoalberi saltati (non scansionati)
+    "files_visited",    # file esaminati dai pattern
+    "files_included",   # file passati alla lettura
+    "files_excluded",   # file esclusi dai pattern
+    "files_binary",     # file letti e riconosciuti come binari
+    "files_reused",     # file riusati dal manifest senza rileggerli
+    "encodings_cached", # encoding riusati dalla cache persistente invece di charset_normalizer
+    "bytes_read",       # byte letti dai file
+    "bytes_written",    # byte dei documenti scritti (compressi se l'output è compresso)
+]
+
+STATS_FORMAT_TABLE = "table"
+STATS_FORMAT_JSON = "json"
+STATS_FORMATS = [STATS_FORMAT_TABLE, STATS_FORMAT_JSON]
+
+# istante restituito quando i tempi non vengono misurati
+NO_TIME = (0.0, 0.0)
+
+
+def clock() -> tuple:
+    """Istante corrente (wall, CPU del processo) da passare a RunStats.add_since."""
+    return time.perf_counter(), time.process_time()
+
+
+class RunStats:
+    """Tempi per fase (secondi wall e CPU) e contatori di una run."""
+
+    def __init__(self, timed: bool = True):
+        """
+        :param timed: Se False misura solo i contatori (clock e add_since non leggono gli orologi)
+        """
+        self.timed = timed
+        self.wall = dict.fromkeys(PHASES, 0.0)
+        self.cpu = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def add(self, phase: str, wall: float, cpu: float):
+        """Somma un intervallo già misurato alla fase."""
+        self.wall[phase] += wall
+        self.cpu[phase] += cpu
+
+    def clock(self) -> tuple:
+        """Istante corrente, NO_TIME se i tempi non vengono misurati."""
+        return clock() if self.timed else NO_TIME
+
+    def add_since(self, phase: str, started: tuple) -> tuple:
+        """
+        Somma alla fase il tempo trascorso da started (valore di clock()).
+
+        :return: Istante corrente, utilizzabile come inizio dell'intervallo successivo
+        """
+        if not self.timed:
+            return NO_TIME
+        now = clock()
+        self.wall[phase] += now[0] - started[0]
+        self.cpu[phase] += now[1] - started[1]
+        return now
+
+    def count(self, counter: str, value: int = 1):
+        self.counters[counter] += value
+
+    def add_record(self, record):
+        """Somma i tempi di lettura e i byte letti di un FileRecord (vedi file_ingest)."""
+        if record.read_time:
+            detect_wall, detect_cpu = record.detect_time
+            self.add(PHASE_DETECT, detect_wall, detect_cpu)
+            self.add(PHASE_READ, record.read_time[0] - detect_wall, record.read_time[1] - detect_cpu)
+        self.counters["bytes_read"] += record.bytes_read
+        if record.binary:
+            self.counters["files_binary"] += 1
+        if record.detection_cached:
+            self.counters["encodings_cached"] += 1
+
+    def to_dict(self) -> dict:
+        """Statistiche serializzabili in JSON: fasi, contatori e throughput."""
+        total = self.wall[PHASE_TOTAL]
+        return {
+            "phases": {phase: {"wall": round(self.wall[phase], 6), "cpu": round(self.cpu[phase], 6)}
+                       for phase in PHASES},
+            "counters": dict(self.counters),
+            "throughput": {
+                "files_per_second": round(self.counters["files_included"] / total, 1) if total else 0.0,
+                "read_mb_per_second": round(self.counters["bytes_read"] / total / 1e6, 2) if total else 0.0,
+                "written_mb_per_second": round(self.counters["bytes_written"] / total / 1e6, 2) if total else 0.0,
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self) -> str:
+        """Tabella di testo: una riga per fase con la quota del tempo totale, poi contatori e throughput."""
+        data = self.to_dict()
+        total = self.wall[PHASE_TOTAL]
+        lines = [f"{'Fase':<12}{'Wall (s)':>10}{'CPU (s)':>10}{'%':>7}"]
+        for phase in PHASES:
+            share = f"{self.wall[phase] / total * 100:.1f}" if total else "-"
+            lines.append(f"{phase:<12}{self.wall[phase]:>10.3f}{self.cpu[phase]:>10.3f}{share:>7}")
+        lines.append("")
+        for counter, value in data["counters"].items():
+            lines.append(f"{counter:<22}{value:>14,}")
+        lines.append("")
+        for name, value in data["throughput"].items():
+            lines.append(f"{name:<22}{value:>14,}")
+        return "\n".join(lines)
+
+    def format(self, stats_format: str = STATS_FORMAT_TABLE) -> str:
+        """Statistiche come tabella ("table") o JSON ("json")."""
+        return self.to_json() if stats_format == STATS_FORMAT_JSON else self.format_table()
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark: liste di regex da glob_to_regex (percorso storico di fs_to_dad)
+contro PatternMatcher compilato.
+
+Uso:
+    python _benchmarks/bench_pattern_matcher.py [--paths N] [--repeat R]
+"""
+import sys
+import re
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "FS2DAD"))
+
+from pattern_matcher import PatternMatcher, glob_to_regex
+
+FOLDER_NAMES = ["src", "tests", "bin", "obj", "Debug", "Release", "node_modules", "docs",
+                "FlexCore.Core", "FlexCore.Data", "Services", "Models", ".git", "_temp", "packages"]
+FILE_NAMES = ["AssemblyInfo.cs", "Program.cs", "__init__.py", "README.md", "appsettings.json",
+              "index.ts", "package.json", "Directory.Build.props", "app.config", "build.log"]
+EXTENSIONS = [".cs", ".py", ".ts", ".json", ".xml", ".md", ".dll", ".pdb", ".tmp", ".log"]
+
+
+def make_patterns():
+    """60 pattern realistici tra cartelle e file."""
+    include_folders = ["FlexCore.*", "**/FlexCore.*", "src/**", "**Services**", "**Models**"] + \
+                      [f"**/module{i}/**" for i in range(10)]
+    exclude_folders = ["**bin**", "**obj**", "**debug**", "**release**", "**.vs**", ".git", ".nuget",
+                       "**_artifacts**", "**docs**", "**samples**", "**__pycache__**", "**_logs**",
+                       "**node_modules**", "**_temp**", "**temp**"]
+    include_files = ["Directory.Build.props", "Directory.Build.targets", "*appsettings.json", "*.cs", "*.py"] + \
+                    [f"*.ext{i}" for i in range(10)]
+    exclude_files = [".gitignore", ".gitattributes", ".gitkeep", "*.tmp", "*.log", "*.xml", "*.pdb",
+                     "*.dll", "*.exe", "*.cache", "*.suo", "*.user", "**.ico**", "*.lock", "*.min.js"]
+    return include_folders, exclude_folders, include_files, exclude_files
+
+
+def make_samples(count, seed=42):
+    rnd = random.Random(seed)
+    folders, files = [], []
+    for _ in range(count):
+        depth = rnd.randint(1, 6)
+        folders.append("/".join(rnd.choice(FOLDER_NAMES) for _ in range(depth)))
+        if rnd.random() < 0.5:
+            files.append(rnd.choice(FILE_NAMES))
+        else:
+            files.append(f"file{rnd.randint(0, 500)}{rnd.choice(EXTENSIONS)}")
+    return folders, files
+
+
+def run_legacy(patterns, folders, files):
+    include_folders, exclude_folders, include_files, exclude_files = patterns
+    include_folder_regex = [re.compile(glob_to_regex(p)) for p in include_folders]
+    exclude_folder_regex = [re.compile(glob_to_regex(p)) for p in exclude_folders]
+    include_file_regex = [re.compile(glob_to_regex(p)) for p in include_files]
+    exclude_file_regex = [re.compile(glob_to_regex(p)) for p in exclude_files]
+    results = []
+    for rel_path in folders:
+        results.append((any(re.search(rgx, rel_path) for rgx in include_folder_regex),
+                        any(re.search(rgx, rel_path) for rgx in exclude_folder_regex)))
+    for file_name in files:
+        results.append((not include_file_regex or any(rgx.match(file_name) for rgx in include_file_regex),
+                        any(rgx.search(file_name) for rgx in exclude_file_regex)))
+    return results
+
+
+def run_matcher(matcher, folders, files):
+    results = [matcher.folder_decision(rel_path) for rel_path in folders]
+    results += [matcher.file_decision(file_name) for file_name in files]
+    return results
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark glob_to_regex vs PatternMatcher")
+    parser.add_argument("--paths", type=int, default=20000, help="Numero di cartelle e file campione")
+    parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni (si tiene la migliore)")
+    args = parser.parse_args()
+
+    patterns = make_patterns()
+    folders, files = make_samples(args.paths)
+    pattern_count = sum(len(p) for p in patterns)
+
+    legacy_time, legacy = timed(run_legacy, patterns, folders, files, repeat=args.repeat)
+    # matcher nuovo ad ogni ripetizione: misura compilazione e match senza cache calda
+    cold_time, cold = timed(lambda: run_matcher(PatternMatcher(*patterns), folders, files), repeat=args.repeat)
+    warm_matcher = PatternMatcher(*patterns)
+    run_matcher(warm_matcher, folders, files)
+    warm_time, warm = timed(run_matcher, warm_matcher, folders, files, repeat=args.repeat)
+
+    assert legacy == cold == warm, "Le decisioni del matcher differiscono da glob_to_regex"
+
+    decisions = len(folders) + len(files)
+    print(f"pattern: {pattern_count}, decisioni: {decisions}")
+    print(f"{'glob_to_regex (liste)':<28}{legacy_time * 1000:>10.1f} ms")
+    print(f"{'PatternMatcher (a freddo)':<28}{cold_time * 1000:>10.1f} ms  x{legacy_time / cold_time:.1f}")
+    print(f"{'PatternMatcher (cache)':<28}{warm_time * 1000:>10.1f} ms  x{legacy_time / warm_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
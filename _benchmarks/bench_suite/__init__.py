@@ -0,0 +1,17 @@
+"""
+Suite di benchmark riproducibile per FS2DAD e i moduli condivisi.
+
+- synthetic_tree: generatore deterministico di alberi (profondità, fan-out, dimensioni,
+  encoding utf-8/cp1252/utf-16, quota di binari) e preset small/medium/large
+- cases: componenti misurati (fs_to_dad, glob_to_regex, PatternMatcher, FileHandler, XMLNode.to_xml)
+- runner: throughput (file/s, MB/s), picco di memoria, report JSON e confronto con una baseline
+
+Uso:
+    python _benchmarks/bench_suite --preset small medium --output baseline.json
+    python _benchmarks/bench_suite --preset small medium --baseline baseline.json --tolerance 0.1
+    python _benchmarks/bench_suite --preset large --cases fs_to_dad,file_handler --root ./_artifacts/bench_trees
+"""
+from .synthetic_tree import TreeSpec, PRESETS, generate_tree, ensure_tree
+from .runner import run_suite, compare_reports, format_report, main
+
+__all__ = ["TreeSpec", "PRESETS", "generate_tree", "ensure_tree", "run_suite", "compare_reports", "format_report", "main"]
@@ -0,0 +1,12 @@
+"""
+Avvio della suite: python _benchmarks/bench_suite [opzioni] (vedi runner.main).
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from _benchmarks.bench_suite.runner import main
+
+if __name__ == "__main__":
+    sys.exit(main())
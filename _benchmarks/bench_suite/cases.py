@@ -0,0 +1,153 @@
+"""
+Componenti misurati dalla suite: fs_to_dad, glob_to_regex, PatternMatcher, FileHandler
+e XMLNode.to_xml sullo stesso albero sintetico.
+
+Ogni caso ha una fase prepare non cronometrata (elenco dei file, albero XMLNode...) e
+una fase run che restituisce (file elaborati, byte elaborati); byte None se il caso
+non ha un volume di dati significativo (i pattern lavorano sui soli percorsi).
+"""
+import os
+import re
+import sys
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "FS2DAD"))
+
+from _modules.file_utils import FileHandler
+from _modules.xmlnode import XMLNode
+from fs_to_dad import fs_to_dad
+from pattern_matcher import PatternMatcher, glob_to_regex
+from run_stats import RunStats
+from .synthetic_tree import SPEC_FILE_NAME
+
+# i benchmark misurano il codice, non l'output dei logger
+logging.disable(logging.CRITICAL)
+
+# pattern realistici tra cartelle e file (in parte corrispondenti ai nomi dell'albero sintetico)
+INCLUDE_FOLDERS = ["*"]
+EXCLUDE_FOLDERS = ["**bin**", "**obj**", "**debug**", "**release**", "**.vs**", ".git", "**node_modules**",
+                   "**_artifacts**", "**__pycache__**", "**Models2/Utils3**", "**_temp**"]
+INCLUDE_FILES = ["*.cs", "*.py", "*.ts", "*.json", "*.md", "*.txt", "*.png", "*.dll", "*.zip"]
+EXCLUDE_FILES = [SPEC_FILE_NAME, "*.tmp", "*.log", "*.pdb", "*.exe", "*.cache", "*.suo", "*.user", "*.lock"]
+
+
+class TreeListing:
+    """Cartelle e file dell'albero sintetico (percorsi relativi con "/"), senza il marcatore della specifica."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.folders = []
+        self.files = []
+        for current, dirs, files in os.walk(root):
+            dirs.sort()
+            rel_path = os.path.relpath(current, root).replace(os.sep, "/")
+            self.folders.append(rel_path)
+            for name in sorted(files):
+                if name != SPEC_FILE_NAME:
+                    self.files.append(name if rel_path == "." else f"{rel_path}/{name}")
+
+
+class BenchmarkCase:
+    """Componente misurato."""
+
+    def __init__(self, name: str, description: str, run, prepare=None):
+        """
+        :param name: Nome del caso nel report
+        :param description: Descrizione breve
+        :param run: Funzione (stato) -> (file, byte) cronometrata
+        :param prepare: Funzione (listing, cartella di lavoro) -> stato, non cronometrata (default: il listing)
+        """
+        self.name = name
+        self.description = description
+        self.run = run
+        self.prepare = prepare or (lambda listing, work_dir: listing)
+
+
+def _prepare_fs_to_dad(listing, work_dir):
+    return listing.root, os.path.join(work_dir, "bench.xml")
+
+
+def _run_fs_to_dad(state, **options):
+    root, output = state
+    stats = RunStats(timed=False)
+    success, message = fs_to_dad(root, output, include_folders=INCLUDE_FOLDERS, ignore_folders=EXCLUDE_FOLDERS,
+                                 include_files=INCLUDE_FILES, ignore_files=EXCLUDE_FILES, stats=stats, **options)
+    if not success:
+        raise RuntimeError(message)
+    return stats.counters["files_included"], stats.counters["bytes_read"]
+
+
+def _run_glob_to_regex(listing):
+    """Percorso storico: una regex per pattern (glob_to_regex), provate una per una."""
+    folder_regex = [re.compile(glob_to_regex(p)) for p in INCLUDE_FOLDERS + EXCLUDE_FOLDERS]
+    file_regex = [re.compile(glob_to_regex(p)) for p in INCLUDE_FILES + EXCLUDE_FILES]
+    for rel_path in listing.folders:
+        for regex in folder_regex:
+            regex.search(rel_path)
+    for rel_path in listing.files:
+        name = rel_path.rsplit("/", 1)[-1]
+        for regex in file_regex:
+            regex.search(name)
+    return len(listing.files), None
+
+
+def _run_pattern_matcher(listing):
+    """Matcher compilato a freddo: compilazione e decisioni (con la cache per nome) incluse."""
+    matcher = PatternMatcher(include_folders=INCLUDE_FOLDERS, exclude_folders=EXCLUDE_FOLDERS,
+                             include_files=INCLUDE_FILES, exclude_files=EXCLUDE_FILES)
+    for rel_path in listing.folders:
+        matcher.folder_decision(rel_path)
+    for rel_path in listing.files:
+        matcher.file_decision(rel_path.rsplit("/", 1)[-1])
+    return len(listing.files), None
+
+
+def _run_file_handler(listing):
+    """Rilevamento dell'encoding e lettura di ogni file."""
+    total = 0
+    for rel_path in listing.files:
+        fh = FileHandler(os.path.join(listing.root, rel_path))
+        fh.get_info()
+        fh.read()
+        total += fh.size
+    return len(listing.files), total
+
+
+def _prepare_xmlnode(listing, work_dir):
+    """Albero FileSystem/Folder/File con il contenuto dei file di testo (i binari restano vuoti)."""
+    root = XMLNode("FileSystem")
+    folders = {".": root}
+    for rel_path in listing.folders:
+        if rel_path != ".":
+            parent, _, name = rel_path.rpartition("/")
+            folders[rel_path] = XMLNode("Folder", {"Name": name})
+            folders[parent or "."].add_child(folders[rel_path])
+    for rel_path in listing.files:
+        folder, _, name = rel_path.rpartition("/")
+        fh = FileHandler(os.path.join(listing.root, rel_path))
+        content, _ = fh.read()
+        node_file = XMLNode("File", {"Name": name})
+        node_file.set_text(content if isinstance(content, str) else "")
+        folders[folder or "."].add_child(node_file)
+    return root, len(listing.files)
+
+
+def _run_xmlnode(state):
+    """to_xml indentato e con sanitize; i byte sono i caratteri prodotti."""
+    root, file_count = state
+    return file_count, len(root.to_xml(indent_chars="  ", sanitize=True))
+
+
+CASES = [
+    BenchmarkCase("fs_to_dad", "fs_to_dad con albero in memoria (DadTreeWriter)",
+                  _run_fs_to_dad, _prepare_fs_to_dad),
+    BenchmarkCase("fs_to_dad_stream", "fs_to_dad in streaming (DadStreamWriter)",
+                  lambda state: _run_fs_to_dad(state, stream=True), _prepare_fs_to_dad),
+    BenchmarkCase("glob_to_regex", "pattern come liste di regex da glob_to_regex", _run_glob_to_regex),
+    BenchmarkCase("pattern_matcher", "PatternMatcher compilato, a freddo", _run_pattern_matcher),
+    BenchmarkCase("file_handler", "FileHandler.get_info + read su ogni file", _run_file_handler),
+    BenchmarkCase("xmlnode_to_xml", "XMLNode.to_xml dell'albero dei file", _run_xmlnode, _prepare_xmlnode),
+]
+CASES_BY_NAME = {case.name: case for case in CASES}
@@ -0,0 +1,191 @@
+"""
+Esecuzione della suite, report JSON e confronto con una baseline.
+
+Per ogni preset l'albero sintetico viene generato (o riusato con --root) e ogni caso è
+eseguito una volta senza misura (riscaldamento: import, cache del sistema operativo) e poi
+repeat volte: si tiene il tempo migliore. Il picco di memoria è misurato con
+tracemalloc in un'esecuzione separata, così il tracciamento non altera i tempi; conta le
+allocazioni Python del caso (buffer del sistema operativo esclusi). Il tracciamento rallenta
+molto i casi che leggono file (charset_normalizer alloca molto): --no-memory lo salta.
+
+Report:
+    {"version": 1, "created": ..., "python": ..., "platform": ..., "repeat": ...,
+     "presets": {"small": {"tree": {riepilogo e digest dell'albero},
+                           "cases": {"fs_to_dad": {"seconds", "files", "bytes", "files_per_second",
+                                                   "mb_per_second", "peak_memory_bytes"}, ...}}}}
+
+Confronto con la baseline (un report precedente): un caso regredisce se files_per_second o
+mb_per_second scendono sotto baseline x (1 - tolerance) oppure se peak_memory_bytes supera
+baseline x (1 + tolerance). Preset con un albero diverso (digest) non sono confrontabili.
+"""
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from .synthetic_tree import PRESETS, ensure_tree
+from .cases import CASES, CASES_BY_NAME, TreeListing
+
+REPORT_VERSION = 1
+DEFAULT_TOLERANCE = 0.15
+
+# metriche confrontate: (nome, True se un valore più alto è migliore)
+METRICS = [("files_per_second", True), ("mb_per_second", True), ("peak_memory_bytes", False)]
+
+
+def measure_case(case, listing: TreeListing, work_dir: str, repeat: int, memory: bool = True) -> dict:
+    """Tempo migliore su repeat esecuzioni, throughput e (con memory) picco di memoria di un caso."""
+    state = case.prepare(listing, work_dir)
+    # esecuzione non misurata: il primo caso pagherebbe import e letture a freddo
+    case.run(state)
+    best = None
+    files, total_bytes = 0, None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        files, total_bytes = case.run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case.run(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(best, 6),
+        "files": files,
+        "bytes": total_bytes,
+        "files_per_second": round(files / best, 1) if best else None,
+        "mb_per_second": round(total_bytes / best / 1e6, 3) if best and total_bytes is not None else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_preset(name: str, cases: list, repeat: int, root: str = None, memory: bool = True) -> dict:
+    """
+    Genera (o riusa) l'albero del preset ed esegue i casi.
+
+    :param root: Cartella in cui conservare l'albero tra un'esecuzione e l'altra (None = temporanea)
+    :param memory: Misura il picco di memoria (esecuzione aggiuntiva sotto tracemalloc)
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"bench_suite_{name}_")
+    tree_root = str(Path(root) / name) if root else str(Path(work_dir) / "tree")
+    try:
+        tree = ensure_tree(tree_root, PRESETS[name])
+        listing = TreeListing(tree_root)
+        results = {}
+        for case in cases:
+            print(f"[{name}] {case.name}: {case.description}", file=sys.stderr)
+            results[case.name] = measure_case(case, listing, work_dir, repeat, memory)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {"tree": tree, "cases": results}
+
+
+def run_suite(presets: list, cases: list = None, repeat: int = 3, root: str = None, memory: bool = True) -> dict:
+    """Esegue i casi (default: tutti) sui preset indicati e restituisce il report."""
+    cases = cases or CASES
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "presets": {name: run_preset(name, cases, repeat, root, memory) for name in presets},
+    }
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> tuple:
+    """
+    Confronta il report con la baseline.
+
+    :return: Tupla (nessuna regressione: bool, righe del confronto)
+    """
+    ok = True
+    lines = []
+    for preset, current in report["presets"].items():
+        base = baseline.get("presets", {}).get(preset)
+        if base is None:
+            lines.append(f"{preset}: assente nella baseline")
+            continue
+        if base["tree"].get("digest") != current["tree"].get("digest"):
+            lines.append(f"{preset}: albero diverso dalla baseline, confronto saltato")
+            ok = False
+            continue
+        for case_name, result in current["cases"].items():
+            base_result = base["cases"].get(case_name)
+            if base_result is None:
+                lines.append(f"{preset}/{case_name}: assente nella baseline")
+                continue
+            for metric, higher_is_better in METRICS:
+                value, base_value = result.get(metric), base_result.get(metric)
+                if not value or not base_value:
+                    continue
+                change = value / base_value - 1
+                regression = change < -tolerance if higher_is_better else change > tolerance
+                ok = ok and not regression
+                status = "REGRESSIONE" if regression else "ok"
+                lines.append(f"{preset}/{case_name} {metric}: {base_value} -> {value} ({change:+.1%}) {status}")
+    return ok, lines
+
+
+def format_report(report: dict) -> str:
+    """Tabella di testo del report: una riga per preset e caso."""
+    lines = [f"{'preset':<8}{'caso':<20}{'s':>10}{'file/s':>12}{'MB/s':>10}{'picco MB':>10}"]
+    for preset, data in report["presets"].items():
+        for case_name, result in data["cases"].items():
+            mb = "-" if result["mb_per_second"] is None else f"{result['mb_per_second']:.2f}"
+            peak = "-" if result["peak_memory_bytes"] is None else f"{result['peak_memory_bytes'] / 1e6:.1f}"
+            lines.append(f"{preset:<8}{case_name:<20}{result['seconds']:>10.3f}{result['files_per_second']:>12,.0f}"
+                         f"{mb:>10}{peak:>10}")
+    return "\n".join(lines)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite di benchmark di FS2DAD e dei moduli condivisi")
+    parser.add_argument("--preset", nargs="+", choices=list(PRESETS), default=["small"], help="Preset degli alberi sintetici")
+    parser.add_argument("--cases", help=f"Casi separati da virgola (default: tutti; {', '.join(CASES_BY_NAME)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni misurate per caso, dopo una non misurata (si tiene la migliore)")
+    parser.add_argument("--root", help="Cartella in cui generare e riusare gli alberi (default: temporanea)")
+    parser.add_argument("--no-memory", action="store_true", help="Non misura il picco di memoria (run più rapida)")
+    parser.add_argument("--output", help="Report JSON da scrivere (usabile come baseline)")
+    parser.add_argument("--baseline", help="Report JSON di riferimento per il confronto")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Variazione ammessa rispetto alla baseline (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    cases = None
+    if args.cases:
+        unknown = [name for name in args.cases.split(",") if name not in CASES_BY_NAME]
+        if unknown:
+            parser.error(f"casi sconosciuti: {', '.join(unknown)}")
+        cases = [CASES_BY_NAME[name] for name in args.cases.split(",")]
+
+    report = run_suite(args.preset, cases, args.repeat, args.root, memory=not args.no_memory)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        ok, lines = compare_reports(report, baseline, args.tolerance)
+        print(f"\nconfronto con {args.baseline} (tolleranza {args.tolerance:.0%}):")
+        print("\n".join(lines))
+        return 0 if ok else 1
+    return 0
@@ -0,0 +1,193 @@
+"""
+Generatore deterministico di alberi sintetici per i benchmark.
+
+Stesso TreeSpec (e stesso seed) => stessi percorsi e stessi byte su ogni macchina:
+la sequenza di random.Random è stabile tra versioni di Python. Il digest restituito
+da generate_tree identifica l'albero e viene riportato nei report, così il confronto
+con una baseline avviene solo tra alberi identici.
+
+Parametri controllati: profondità, cartelle figlie per cartella (fan-out), file per
+cartella, distribuzione log-normale delle dimensioni, miscela di encoding dei file di
+testo (utf-8, cp1252, utf-16 con BOM) e quota di file binari.
+"""
+import os
+import math
+import json
+import codecs
+import random
+import hashlib
+
+ENCODING_UTF8 = "utf-8"
+ENCODING_CP1252 = "cp1252"
+ENCODING_UTF16 = "utf-16"
+ENCODINGS = [ENCODING_UTF8, ENCODING_CP1252, ENCODING_UTF16]
+
+# marcatore nella radice: permette di riusare un albero già generato con la stessa specifica
+SPEC_FILE_NAME = ".bench_tree.json"
+
+FOLDER_PREFIXES = ["src", "Services", "Models", "Utils", "Data", "Api", "Core", "Tests"]
+TEXT_EXTENSIONS = [".cs", ".py", ".ts", ".json", ".md", ".txt"]
+BINARY_FORMATS = [
+    (".png", b"\x89PNG\r\n\x1a\n"),
+    (".dll", b"MZ\x90\x00\x03\x00\x00\x00"),
+    (".zip", b"PK\x03\x04"),
+]
+
+# righe di codice e commenti; le accentate rendono cp1252 e utf-8 distinguibili da ascii
+CODE_LINES = [
+    "using System.Collections.Generic;",
+    "public class Servizio{n} : IServizio",
+    "{{",
+    "    private readonly Dictionary<string, int> _cache = new();",
+    "    // verifica perché la città è già presente",
+    "    public int Calcola(int valore) => valore * {n} + _cache.Count;",
+    "    /// <summary>Restituisce l'entità più recente</summary>",
+    "    var descrizione = \"qualità e velocità: {n}\";",
+    "}}",
+    "def funzione_{n}(valore):",
+    "    return [x for x in range(valore) if x % {n} == 0]  # è così",
+    "const risultato{n} = elementi.map(e => e.prezzo * 1.22);",
+]
+
+
+class TreeSpec:
+    """Specifica di un albero sintetico."""
+
+    def __init__(self, depth: int = 2, fan_out: int = 3, files_per_folder: int = 8,
+                 median_size: int = 2048, size_sigma: float = 1.0, max_size: int = 256 * 1024,
+                 encoding_mix: dict = None, binary_ratio: float = 0.05, seed: int = 42):
+        """
+        :param depth: Livelli di sottocartelle sotto la radice
+        :param fan_out: Sottocartelle di ogni cartella (fino a depth)
+        :param files_per_folder: File in ogni cartella, radice compresa
+        :param median_size: Dimensione mediana dei file in byte (distribuzione log-normale)
+        :param size_sigma: Deviazione standard del logaritmo della dimensione (0 = tutti uguali)
+        :param max_size: Dimensione massima di un file
+        :param encoding_mix: Pesi degli encoding dei file di testo, es. {"utf-8": 0.85, "cp1252": 0.1, "utf-16": 0.05}
+        :param binary_ratio: Quota di file binari (0-1)
+        :param seed: Seme del generatore
+        """
+        self.depth = depth
+        self.fan_out = fan_out
+        self.files_per_folder = files_per_folder
+        self.median_size = median_size
+        self.size_sigma = size_sigma
+        self.max_size = max_size
+        self.encoding_mix = encoding_mix or {ENCODING_UTF8: 0.85, ENCODING_CP1252: 0.1, ENCODING_UTF16: 0.05}
+        self.binary_ratio = binary_ratio
+        self.seed = seed
+        unknown = set(self.encoding_mix) - set(ENCODINGS)
+        if unknown:
+            raise ValueError(f"Encoding non supportati: {', '.join(sorted(unknown))} (ammessi: {', '.join(ENCODINGS)})")
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TreeSpec":
+        return cls(**data)
+
+
+PRESETS = {
+    # 13 cartelle, 104 file
+    "small": TreeSpec(depth=2, fan_out=3, files_per_folder=8),
+    # 85 cartelle, 1.020 file
+    "medium": TreeSpec(depth=3, fan_out=4, files_per_folder=12),
+    # 781 cartelle, 12.496 file
+    "large": TreeSpec(depth=4, fan_out=5, files_per_folder=16),
+}
+
+
+def _text_content(rng: random.Random, size: int) -> str:
+    """Testo di circa size caratteri composto da righe di CODE_LINES."""
+    lines = []
+    length = 0
+    while length < size:
+        line = rng.choice(CODE_LINES).format(n=rng.randint(0, 999))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def _encode(text: str, encoding: str) -> bytes:
+    if encoding == ENCODING_UTF16:
+        return codecs.BOM_UTF16_LE + text.encode("utf-16-le")
+    return text.encode(encoding)
+
+
+def _file_size(rng: random.Random, spec: TreeSpec) -> int:
+    size = rng.lognormvariate(math.log(spec.median_size), spec.size_sigma) if spec.size_sigma else spec.median_size
+    return max(16, min(spec.max_size, int(size)))
+
+
+def _folders(spec: TreeSpec):
+    """Percorsi relativi delle cartelle in ordine di visita (la radice è "")."""
+    stack = [("", 0)]
+    while stack:
+        rel_path, level = stack.pop()
+        yield rel_path
+        if level < spec.depth:
+            for index in reversed(range(spec.fan_out)):
+                name = f"{FOLDER_PREFIXES[index % len(FOLDER_PREFIXES)]}{index}"
+                stack.append((f"{rel_path}/{name}" if rel_path else name, level + 1))
+
+
+def generate_tree(root: str, spec: TreeSpec) -> dict:
+    """
+    Crea l'albero sotto root (che deve essere vuota o non esistere).
+
+    :return: Riepilogo: cartelle, file, byte, file per encoding, binari e digest dell'albero
+    """
+    os.makedirs(root, exist_ok=True)
+    if os.listdir(root):
+        raise ValueError(f"La cartella {root} non è vuota")
+
+    rng = random.Random(spec.seed)
+    encodings = list(spec.encoding_mix)
+    weights = [spec.encoding_mix[encoding] for encoding in encodings]
+    digest = hashlib.blake2b(digest_size=16)
+    summary = {"folders": 0, "files": 0, "bytes": 0, "binary": 0, "encodings": dict.fromkeys(encodings, 0)}
+
+    for rel_path in _folders(spec):
+        folder = os.path.join(root, rel_path)
+        os.makedirs(folder, exist_ok=True)
+        summary["folders"] += 1
+        for number in range(spec.files_per_folder):
+            size = _file_size(rng, spec)
+            if rng.random() < spec.binary_ratio:
+                extension, signature = rng.choice(BINARY_FORMATS)
+                data = signature + rng.randbytes(max(0, size - len(signature)))
+                summary["binary"] += 1
+            else:
+                extension = rng.choice(TEXT_EXTENSIONS)
+                encoding = rng.choices(encodings, weights)[0]
+                data = _encode(_text_content(rng, size), encoding)
+                summary["encodings"][encoding] += 1
+            name = f"File{number:03d}{extension}"
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(data)
+            digest.update(f"{rel_path}/{name}\0{len(data)}\0".encode())
+            digest.update(data)
+            summary["files"] += 1
+            summary["bytes"] += len(data)
+
+    summary["digest"] = digest.hexdigest()
+    with open(os.path.join(root, SPEC_FILE_NAME), "w", encoding="utf-8") as f:
+        json.dump({"spec": spec.to_dict(), "summary": summary}, f, indent=2)
+    return summary
+
+
+def ensure_tree(root: str, spec: TreeSpec) -> dict:
+    """
+    Riusa l'albero in root se è stato generato con la stessa specifica, altrimenti lo crea.
+
+    :return: Riepilogo dell'albero (vedi generate_tree)
+    """
+    spec_file = os.path.join(root, SPEC_FILE_NAME)
+    if os.path.exists(spec_file):
+        with open(spec_file, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["spec"] == spec.to_dict():
+            return saved["summary"]
+        raise ValueError(f"La cartella {root} contiene un albero generato con un'altra specifica")
+    return generate_tree(root, spec)
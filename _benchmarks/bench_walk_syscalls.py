@@ -0,0 +1,107 @@
+"""
+Benchmark: syscall per file di fs_to_dad (visita + lettura) su un albero sintetico.
+
+Esegue fs_to_dad sotto "strace -f -c" una volta sull'albero sintetico e una volta su
+un albero vuoto (costo fisso di avvio e import), poi divide la differenza per il
+numero di file. Con --repo si misura un'altra copia del repository (es. un worktree
+del commit precedente) per il confronto prima/dopo.
+
+Uso:
+    python _benchmarks/bench_walk_syscalls.py [--files N] [--root DIR] [--repo DIR] [--strace PATH]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+RUNNER = """
+import sys, logging
+sys.path[:0] = [{repo!r}, {fs2dad!r}]
+logging.disable(logging.CRITICAL)
+from fs_to_dad import fs_to_dad
+result = fs_to_dad({target!r}, {output!r})
+if not result[0]:
+    raise SystemExit(result[1])
+"""
+
+
+def make_tree(root: Path, file_count: int, files_per_folder: int = 100):
+    """Crea cartelle annidate su tre livelli con file di testo piccoli."""
+    folders = max(1, file_count // files_per_folder)
+    created = 0
+    for index in range(folders):
+        folder = root / f"a{index // 100:02d}" / f"b{index // 10 % 10}" / f"c{index % 10}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for number in range(min(files_per_folder, file_count - created)):
+            (folder / f"File{number:03d}.cs").write_text(f"// file {index}/{number}\nclass C{number} {{ }}\n")
+            created += 1
+    return created
+
+
+def parse_strace_summary(report: str) -> dict:
+    """Estrae {syscall: chiamate} dalla tabella di strace -c."""
+    counts = {}
+    for line in report.splitlines():
+        parts = line.split()
+        if len(parts) < 5 or parts[-1] == "total":
+            continue
+        try:
+            float(parts[0])
+            calls = int(parts[3])
+        except ValueError:
+            continue
+        counts[parts[-1]] = calls
+    return counts
+
+
+def run_traced(strace: str, repo: Path, target: Path, output: Path, report: Path) -> tuple:
+    code = RUNNER.format(repo=str(repo), fs2dad=str(repo / "FS2DAD"), target=str(target), output=str(output))
+    start = time.perf_counter()
+    subprocess.run([strace, "-f", "-c", "-o", str(report), sys.executable, "-c", code], check=True)
+    elapsed = time.perf_counter() - start
+    return parse_strace_summary(report.read_text()), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syscall per file di fs_to_dad (strace -c)")
+    parser.add_argument("--files", type=int, default=100000, help="Numero di file dell'albero sintetico")
+    parser.add_argument("--root", help="Cartella dell'albero sintetico (default: cartella temporanea)")
+    parser.add_argument("--repo", default=str(Path(__file__).parent.parent), help="Repository da misurare")
+    parser.add_argument("--strace", default="strace", help="Eseguibile strace")
+    args = parser.parse_args()
+
+    strace = shutil.which(args.strace)
+    if not strace:
+        raise SystemExit(f"strace non trovato: {args.strace}")
+
+    work = Path(tempfile.mkdtemp(prefix="bench_walk_"))
+    try:
+        root = Path(args.root) if args.root else work / "tree"
+        if not root.exists():
+            root.mkdir(parents=True)
+            print(f"file creati: {make_tree(root, args.files)}")
+        file_count = sum(len(files) for _, _, files in os.walk(root))
+        empty = work / "empty"
+        empty.mkdir()
+
+        repo = Path(args.repo).resolve()
+        base, _ = run_traced(strace, repo, empty, work / "empty.xml", work / "empty.txt")
+        full, elapsed = run_traced(strace, repo, root, work / "tree.xml", work / "tree.txt")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    delta = {name: full.get(name, 0) - base.get(name, 0) for name in full}
+    delta = {name: calls for name, calls in delta.items() if calls > 0}
+    print(f"repo: {repo}, file: {file_count}, tempo (sotto strace): {elapsed:.1f} s")
+    for name, calls in sorted(delta.items(), key=lambda item: -item[1]):
+        if calls / file_count >= 0.01:
+            print(f"{name:<20}{calls:>12}{calls / file_count:>10.2f} /file")
+    print(f"{'totale':<20}{sum(delta.values()):>12}{sum(delta.values()) / file_count:>10.2f} /file")
+
+
+if __name__ == "__main__":
+    main()
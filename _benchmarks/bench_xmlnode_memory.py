@@ -0,0 +1,110 @@
+"""
+Benchmark di memoria (tracemalloc): byte per nodo di un albero XMLNode stile FS2DAD
+(Folder con File e contenuto) e stile CsprojAnalyzer (nodi senza contenuto),
+rappresentazione storica con __dict__ contro XMLNode compatto (__slots__, sentinelle).
+
+Nomi e testi sono creati prima della misura: si conta solo la struttura dei nodi.
+
+Uso:
+    python _benchmarks/bench_xmlnode_memory.py [--folders N] [--files-per-folder M]
+"""
+import sys
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from _modules.xmlnode import XMLNode
+
+
+class LegacyXMLNode:
+    """Rappresentazione storica: __dict__ per istanza, dict e list propri anche se vuoti."""
+
+    class NodeContent:
+        def __init__(self, text="", is_cdata=False, is_text=False):
+            self.text = text
+            self.is_cdata = is_cdata
+            self.is_text = is_text
+
+    def __init__(self, tag, attributes=None):
+        self.tag = tag
+        self.attributes = attributes if attributes else {}
+        self.children = []
+        self.content = self.NodeContent()
+
+    def add_child(self, child):
+        self.children.append(child)
+
+    def set_text(self, text):
+        self.content.text = text
+        self.content.is_text = True
+        self.content.is_cdata = False
+
+
+def build_fs_tree(node_class, names, text, tuple_attributes=False):
+    """FileSystem -> Folder -> File con testo; restituisce (radice, numero di nodi)."""
+    make_attributes = (lambda name: (("Name", name),)) if tuple_attributes else (lambda name: {"Name": name})
+    root = node_class("FileSystem")
+    count = 1
+    for folder_name, file_names in names:
+        folder = node_class("Folder", make_attributes(folder_name))
+        for file_name in file_names:
+            node_file = node_class("File", make_attributes(file_name))
+            node_file.set_text(text)
+            folder.add_child(node_file)
+        root.add_child(folder)
+        count += 1 + len(file_names)
+    return root, count
+
+
+def build_csproj_tree(node_class, names, tuple_attributes=False):
+    """SolutionProjects -> Project -> References -> ProjectReference senza contenuto."""
+    make_attributes = (lambda path: (("Path", path),)) if tuple_attributes else (lambda path: {"Path": path})
+    root = node_class("SolutionProjects", {"SolutionPath": "solution"})
+    count = 1
+    for project, references in names:
+        project_node = node_class("Project", make_attributes(project))
+        refs_node = node_class("References")
+        for reference in references:
+            refs_node.add_child(node_class("ProjectReference", make_attributes(reference)))
+        project_node.add_child(refs_node)
+        root.add_child(project_node)
+        count += 2 + len(references)
+    return root, count
+
+
+def measure(build, *args, **kwargs):
+    """Byte allocati per nodo durante la costruzione dell'albero."""
+    tracemalloc.start()
+    tree, count = build(*args, **kwargs)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return current / count, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria per nodo: XMLNode storico vs compatto")
+    parser.add_argument("--folders", type=int, default=5000, help="Cartelle (o progetti)")
+    parser.add_argument("--files-per-folder", type=int, default=40, help="File per cartella (o riferimenti per progetto)")
+    args = parser.parse_args()
+
+    names = [(f"folder{i}", [f"file{i}_{j}.cs" for j in range(args.files_per_folder)]) for i in range(args.folders)]
+    text = "class C { }\n" * 10
+
+    rows = [
+        ("FS2DAD storico", measure(build_fs_tree, LegacyXMLNode, names, text)),
+        ("FS2DAD compatto (dict)", measure(build_fs_tree, XMLNode, names, text)),
+        ("FS2DAD compatto (tuple)", measure(build_fs_tree, XMLNode, names, text, tuple_attributes=True)),
+        ("Csproj storico", measure(build_csproj_tree, LegacyXMLNode, names)),
+        ("Csproj compatto (dict)", measure(build_csproj_tree, XMLNode, names)),
+        ("Csproj compatto (tuple)", measure(build_csproj_tree, XMLNode, names, tuple_attributes=True)),
+    ]
+    print(f"nodi per albero: {rows[0][1][1]} (FS2DAD), {rows[3][1][1]} (Csproj)")
+    for label, (per_node, _) in rows:
+        print(f"{label:<28}{per_node:>10.1f} byte/nodo")
+
+
+if __name__ == "__main__":
+    main()
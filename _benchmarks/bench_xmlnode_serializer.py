@@ -0,0 +1,109 @@
+"""
+Benchmark: serializzazione di un albero XMLNode profondo, to_xml ricorsivo storico
+(stringa restituita e unita a ogni livello) contro write_to iterativo su stream.
+
+Il volume copiato è la somma delle lunghezze delle stringhe prodotte: nel percorso
+storico ogni contenuto viene ricopiato una volta per ogni antenato (O(profondità x
+dimensione)), con write_to ogni byte arriva allo stream una sola volta (O(dimensione)).
+
+Uso:
+    python _benchmarks/bench_xmlnode_serializer.py [--depth D] [--files F] [--content-size S]
+"""
+import io
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from _modules.xmlnode import XMLNode
+
+
+def legacy_to_xml(node, indent_chars="", indent_level=0, counter=None):
+    """to_xml ricorsivo storico; counter[0] accumula i caratteri delle stringhe prodotte."""
+    if not node.children and not node.content.text:
+        result = node.opening_tag(indent_chars, indent_level, self_closing=True)
+        counter[0] += len(result)
+        return result
+
+    xml_content = [node.opening_tag(indent_chars, indent_level)]
+    if node.content.text:
+        content = node.content.text
+        indent_str_content = indent_chars * (indent_level + 1)
+        if indent_chars:
+            _text = "\n".join(f"{indent_str_content}{line}" for line in content.splitlines())
+            counter[0] += len(_text)
+            xml_content.append(_text)
+        else:
+            xml_content.append(f"{indent_str_content}{content}")
+    for child in node.children:
+        xml_content.append(legacy_to_xml(child, indent_chars, indent_level + 1, counter))
+    xml_content.append(node.closing_tag(indent_chars, indent_level))
+
+    separator = "" if not indent_chars else "\n"
+    result = separator.join(xml_content)
+    counter[0] += len(result)
+    return result
+
+
+class CountingStream(io.StringIO):
+    """StringIO che conta i caratteri ricevuti da write."""
+
+    def __init__(self):
+        super().__init__()
+        self.written = 0
+
+    def write(self, text):
+        self.written += len(text)
+        return super().write(text)
+
+
+def build_deep_tree(depth, files, content_size):
+    """Catena di Folder profonda depth, con files File di content_size caratteri per livello."""
+    line = "public int Value { get; set; }\n"
+    content = (line * (content_size // len(line) + 1))[:content_size]
+    root = XMLNode("FileSystem")
+    parent = root
+    for level in range(depth):
+        folder = XMLNode("Folder", (("Name", f"level{level}"),))
+        for number in range(files):
+            node_file = XMLNode("File", (("Name", f"File{number}.cs"),))
+            node_file.set_text(content)
+            folder.add_child(node_file)
+        parent.add_child(folder)
+        parent = folder
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="to_xml ricorsivo vs write_to iterativo")
+    parser.add_argument("--depth", type=int, default=400, help="Profondità della catena di cartelle")
+    parser.add_argument("--files", type=int, default=5, help="File per livello")
+    parser.add_argument("--content-size", type=int, default=2000, help="Caratteri per file")
+    args = parser.parse_args()
+
+    # lo storico usa un frame per livello
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.depth * 2 + 100))
+    root = build_deep_tree(args.depth, args.files, args.content_size)
+
+    for indent_chars in ("", "  "):
+        counter = [0]
+        start = time.perf_counter()
+        legacy = legacy_to_xml(root, indent_chars, 0, counter)
+        legacy_time = time.perf_counter() - start
+
+        stream = CountingStream()
+        start = time.perf_counter()
+        root.write_to(stream, indent_chars=indent_chars)
+        new_time = time.perf_counter() - start
+
+        assert stream.getvalue() == legacy, "write_to differisce dal to_xml storico"
+        label = "indentato" if indent_chars else "compatto"
+        print(f"[{label}] profondità {args.depth}, output {len(legacy) / 1e6:.1f} M caratteri")
+        print(f"  {'to_xml ricorsivo':<20}{counter[0] / 1e6:>10.1f} M copiati {legacy_time * 1000:>10.1f} ms")
+        print(f"  {'write_to iterativo':<20}{stream.written / 1e6:>10.1f} M copiati {new_time * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,4 @@
 from .file_handler import FileHandler
-__all__ = ["FileHandler"]
\ No newline at end of file
+from .compressed_output import open_output, open_input, compression_suffix, compress_level_error
+from .detection_cache import DetectionCache
+__all__ = ["FileHandler", "open_output", "open_input", "compression_suffix", "compress_level_error", "DetectionCache"]
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Apertura dei file di output (e rilettura) con compressione scelta dall'estensione.
+
+    nome.xml      -> file normale
+    nome.xml.gz   -> gzip
+    nome.xml.xz   -> xz (lzma)
+    nome.xml.bz2  -> bzip2
+
+Il file restituito è binario e comprime i dati man mano che vengono scritti,
+quindi il documento non compresso non esiste mai per intero né su disco né in memoria.
+open_input riapre il file in lettura binaria: sui file compressi seek è ammesso ma
+decomprime i dati fino alla posizione richiesta.
+"""
+import os
+import bz2
+import gzip
+import lzma
+
+# estensione -> (modulo, nome del parametro del livello, livello minimo, livello massimo)
+COMPRESSORS = {
+    ".gz": (gzip, "compresslevel", 0, 9),
+    ".xz": (lzma, "preset", 0, 9),
+    ".bz2": (bz2, "compresslevel", 1, 9),
+}
+
+
+def compression_suffix(file_name: str):
+    """Restituisce l'estensione di compressione del file (".gz", ".xz", ".bz2") oppure None."""
+    ext = os.path.splitext(file_name)[1].lower()
+    return ext if ext in COMPRESSORS else None
+
+
+def compress_level_error(file_name: str, compress_level: int = None):
+    """
+    Verifica il livello di compressione per il compressore scelto dall'estensione (bzip2 ammette 1-9).
+
+    :return: Messaggio di errore, None se il livello è valido o non si applica
+    """
+    suffix = compression_suffix(file_name)
+    if suffix is None or compress_level is None:
+        return None
+    _, _, minimum, maximum = COMPRESSORS[suffix]
+    if not minimum <= compress_level <= maximum:
+        return f"compress_level non valido per {suffix}: {compress_level} (ammessi: {minimum}-{maximum})"
+    return None
+
+
+def open_output(file_name: str, compress_level: int = None):
+    """
+    Apre il file di output in scrittura binaria, compresso se l'estensione lo richiede.
+
+    :param file_name: Percorso del file (.gz, .xz, .bz2 = compresso)
+    :param compress_level: Livello di compressione 0-9, 1-9 per bzip2 (None = default del compressore; ignorato senza compressione)
+    :return: Oggetto file binario scrivibile
+    :raises ValueError: Livello non ammesso dal compressore (vedi compress_level_error)
+    """
+    suffix = compression_suffix(file_name)
+    if suffix is None:
+        return open(file_name, "wb")
+    error = compress_level_error(file_name, compress_level)
+    if error:
+        raise ValueError(error)
+    module, level_name, _, _ = COMPRESSORS[suffix]
+    kwargs = {} if compress_level is None else {level_name: compress_level}
+    return module.open(file_name, "wb", **kwargs)
+
+
+def open_input(file_name: str):
+    """
+    Apre in lettura binaria un file scritto da open_output, decomprimendolo se l'estensione lo richiede.
+
+    :param file_name: Percorso del file (.gz, .xz, .bz2 = compresso)
+    :return: Oggetto file binario leggibile (seek sui dati non compressi)
+    """
+    suffix = compression_suffix(file_name)
+    if suffix is None:
+        return open(file_name, "rb")
+    module = COMPRESSORS[suffix][0]
+    return module.open(file_name, "rb")
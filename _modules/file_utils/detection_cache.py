@@ -0,0 +1,192 @@
+"""
+Cache persistente dei risultati del rilevamento encoding di FileHandler.
+
+Il database SQLite (di default _artifacts/detection_cache.sqlite nella radice del repository)
+ha una riga per file, indicizzata per (device, inode, size, mtime_ns) e per la parte del file
+esaminata (0 = file intero, altrimenti i byte iniziali di un file troncato): encoding, BOM,
+MIME e is_text. Vale tra run diverse e tra configurazioni diverse sullo stesso albero.
+
+FileHandler consulta la cache solo quando i controlli economici (BOM, firme binarie, ASCII,
+UTF-8) non bastano e servirebbe charset_normalizer: i file ASCII e UTF-8 non costano
+una query. Un risultato vale solo se il MIME (che dipende dal nome) è ancora lo stesso.
+
+Scritture e aggiornamenti di "used" sono accumulati in memoria e salvati da flush; il
+timestamp di un file riusato viene aggiornato al più una volta ogni TOUCH_INTERVAL secondi.
+Oltre max_entries righe flush elimina le meno usate di recente (LRU), quindi anche la
+dimensione del database resta limitata.
+
+I file modificati negli ultimi RACY_INTERVAL_NS non vengono salvati: una nuova modifica con
+la stessa dimensione nello stesso intervallo di mtime lascerebbe la chiave invariata.
+
+Ogni processo usa una sola istanza per database (DetectionCache.shared), anche i processi
+worker di fs_to_dad; più processi possono scrivere sullo stesso database (WAL).
+"""
+from _modules.logging.logging import create_logger
+logger = create_logger(__name__)
+
+import os
+import time
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "_artifacts", "detection_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 200_000
+# scritture accumulate prima di un salvataggio automatico
+FLUSH_SIZE = 512
+# secondi tra due aggiornamenti del timestamp LRU dello stesso file
+TOUCH_INTERVAL = 3600
+# file modificati da meno di 2 secondi: risultato non salvato
+RACY_INTERVAL_NS = 2_000_000_000
+# ms di attesa se un altro processo sta scrivendo
+BUSY_TIMEOUT = 5000
+CACHE_VERSION = 1
+
+
+class DetectionCache:
+    """Cache di encoding, BOM, MIME e is_text per (device, inode, size, mtime_ns)."""
+
+    # istanze condivise per percorso del database (vedi shared)
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        :param cache_path: Percorso del database (la cartella viene creata se manca)
+        :param max_entries: Righe massime: oltre questo numero flush elimina le meno usate
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._touched = []
+        self._entries = 0
+
+    @classmethod
+    def shared(cls, cache_path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES) -> "DetectionCache":
+        """Cache condivisa dalle run dello stesso processo (modalità batch e watch, processi worker)."""
+        with cls._shared_lock:
+            cache = cls._shared.get(cache_path)
+            if cache is None:
+                cache = cls._shared[cache_path] = cls(cache_path, max_entries)
+            return cache
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        conn = sqlite3.connect(self.cache_path, timeout=BUSY_TIMEOUT / 1000, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            conn.execute("DROP TABLE IF EXISTS detection")
+            conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS detection ("
+            "dev INTEGER, inode INTEGER, sample INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "encoding TEXT, bom INTEGER, mime TEXT, is_text INTEGER, used INTEGER, "
+            "PRIMARY KEY (dev, inode, sample)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS detection_used ON detection (used)")
+        conn.commit()
+        self._entries = conn.execute("SELECT COUNT(*) FROM detection").fetchone()[0]
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def file_key(file_path: str, stat_result=None, sample: int = 0):
+        """
+        Chiave del file: (device, inode, parte esaminata, size, mtime_ns).
+
+        :param stat_result: os.stat_result già noto; senza inode (DirEntry.stat() su Windows) il file viene riletto con os.stat
+        :param sample: 0 per il file intero, altrimenti i byte iniziali esaminati
+        :return: Tupla, None se il file non ha un inode
+        """
+        if stat_result is None or not stat_result.st_ino:
+            stat_result = os.stat(file_path)
+        if not stat_result.st_ino:
+            return None
+        return stat_result.st_dev, stat_result.st_ino, sample, stat_result.st_size, stat_result.st_mtime_ns
+
+    def lookup(self, key: tuple, mime: str):
+        """
+        :param key: Chiave restituita da file_key
+        :param mime: MIME attuale del file (un file rinominato può cambiarlo)
+        :return: Tupla (encoding, bom, is_text) oppure None se il file non è in cache o è cambiato
+        """
+        with self._lock:
+            pending = self._pending.get(key[:3])
+            if pending is not None:
+                row = pending[:6] + (None,)
+            else:
+                try:
+                    row = self._connect().execute(
+                        "SELECT size, mtime_ns, encoding, bom, mime, is_text, used FROM detection "
+                        "WHERE dev = ? AND inode = ? AND sample = ?", key[:3]).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Errore [{e}] - lettura cache: {self.cache_path}")
+                    row = None
+            if row is None or row[0] != key[3] or row[1] != key[4] or row[4] != mime:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = int(time.time())
+            if row[6] is not None and now - row[6] > TOUCH_INTERVAL:
+                self._touched.append((now,) + key[:3])
+            return row[2], None if row[3] is None else bool(row[3]), bool(row[5])
+
+    def store(self, key: tuple, encoding: str, bom, mime: str, is_text: bool):
+        """Accoda il risultato del rilevamento; salvato da flush (automatico ogni FLUSH_SIZE file)."""
+        if key[4] >= time.time_ns() - RACY_INTERVAL_NS:
+            return
+        with self._lock:
+            self._pending[key[:3]] = (key[3], key[4], encoding, None if bom is None else int(bom), mime,
+                                      int(is_text), int(time.time()))
+            if len(self._pending) < FLUSH_SIZE:
+                return
+        self.flush()
+
+    def flush(self):
+        """Salva le scritture accodate e, oltre max_entries righe, elimina le meno usate di recente."""
+        with self._lock:
+            if not self._pending and not self._touched:
+                return
+            rows = [key + value for key, value in self._pending.items()]
+            touched = self._touched
+            self._pending = {}
+            self._touched = []
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO detection VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    conn.executemany("UPDATE detection SET used = ? WHERE dev = ? AND inode = ? AND sample = ?", touched)
+                self._entries += len(rows)
+                if self._entries > self.max_entries:
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                logger.warning(f"Errore [{e}] - scrittura cache: {self.cache_path}")
+
+    def _evict(self, conn):
+        with conn:
+            # il conteggio locale è approssimato (righe sostituite, altri processi): ricontato qui
+            self._entries = conn.execute("SELECT COUNT(*) FROM detection").fetchone()[0]
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                conn.execute("DELETE FROM detection WHERE (dev, inode, sample) IN "
+                             "(SELECT dev, inode, sample FROM detection ORDER BY used LIMIT ?)", (excess,))
+                self._entries -= excess
+                logger.debug(f"Cache {self.cache_path}: eliminate {excess} righe meno usate")
+
+    def close(self):
+        """Salva le scritture accodate e chiude il database."""
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        logger.debug(f"Cache {self.cache_path}: riusati {self.hits}, rilevati {self.misses}")
@@ -5,18 +5,66 @@ logger = create_logger(__name__)
 
 
 import os
+import mmap
+import time
+import base64
+import codecs
+import hashlib
 import mimetypes
-from charset_normalizer import from_path
+from charset_normalizer import from_bytes
 class FileHandler:
     """Classe per gestire file, determinare tipo, encoding e leggere contenuto."""
 
-    def __init__(self, file_path):
+    # BOM riconosciuti direttamente (UTF-32 prima di UTF-16: condividono il prefisso FF FE)
+    BOMS = [
+        (codecs.BOM_UTF8, "utf_8"),
+        (codecs.BOM_UTF32_LE, "utf_32"),
+        (codecs.BOM_UTF32_BE, "utf_32"),
+        (codecs.BOM_UTF16_LE, "utf_16"),
+        (codecs.BOM_UTF16_BE, "utf_16"),
+    ]
+
+    # Firme di formati binari comuni
+    BINARY_SIGNATURES = [
+        b"\x89PNG\r\n\x1a\n",   # PNG
+        b"GIF87a", b"GIF89a",     # GIF
+        b"\xff\xd8\xff",         # JPEG
+        b"%PDF-",                 # PDF
+        b"PK\x03\x04",            # ZIP, nupkg, docx, jar
+        b"\x1f\x8b",              # gzip
+        b"7z\xbc\xaf\x27\x1c",    # 7z
+        b"Rar!\x1a\x07",          # RAR
+    ]
+
+    # Marcatore inserito tra le parti lette di un file troncato
+    TRUNCATION_MARKER = "\n[... {omitted} byte omessi ...]\n"
+
+    # Byte esaminati per la ricerca del NUL (eseguibili, ico, database... lo contengono nell'header)
+    SNIFF_SIZE = 8192
+
+    # Encoding (con sostituzione dei byte non validi) dei file text/* il cui encoding non è riconosciuto
+    FALLBACK_ENCODING = "utf_8"
+
+    # Byte letti per blocco nella codifica base64 (multiplo di 57: righe complete da 76 caratteri)
+    BASE64_CHUNK = 57 * 1024
+
+    def __init__(self, file_path, compute_hash=False, stat_result=None, sniff_binary=False, detection_cache=None):
         """
         Inizializza l'istanza con il percorso del file.
 
         :param file_path: Il percorso completo del file da gestire
+        :param compute_hash: Se True get_info calcola l'hash del contenuto (blake2b) durante la lettura
+        :param stat_result: os.stat_result già noto (es. da DirEntry.stat()): exists() e la lettura
+                            lo riusano invece di interrogare di nuovo il filesystem
+        :param sniff_binary: Se True get_info legge prima SNIFF_SIZE byte e, se bastano a classificare
+                             il file come binario, non legge il resto (self.sniffed_binary = True)
+        :param detection_cache: DetectionCache opzionale: l'encoding dei file che richiederebbero
+                                charset_normalizer viene riusato dalle run precedenti se il file non è cambiato
         """
         self.file_path = os.path.normpath(file_path)
+        self.compute_hash = compute_hash
+        self.stat_result = stat_result
+        self.hash = None
         self.has_info_been_read = False
         self.name = None
         self.size = None
@@ -25,25 +73,62 @@ class FileHandler:
         self.bom = None
         self.mime = None
         # self.type = None
+        self.truncated = False
+        self.sniff_binary = sniff_binary
+        self.sniffed_binary = False
+        self.detection_cache = detection_cache
+        # True se l'encoding viene dalla cache invece che da charset_normalizer
+        self.detection_cached = False
+        # byte effettivamente letti dal disco e durata del rilevamento encoding (wall, CPU)
+        self.bytes_read = 0
+        self.detect_time = (0.0, 0.0)
+        # esito dell'ultima is_text (None finché non viene chiamata)
+        self.text = None
+        self._head_bytes = 0
+        self._tail_bytes = 0
+        self._data = None
+        self._tail = b""
 
-    def get_info(self):
+    def get_info(self, head_bytes=0, tail_bytes=0):
         """
         Ottiene le informazioni del file, tra cui nome, dimensione, encoding, MIME, ecc.
 
-        :return: Dizionario con le informazioni del file
-        """
-        # Ottieni nome e dimensione del file
-        self.name = os.path.basename(self.file_path)
-        self.size = os.path.getsize(self.file_path)
+        Con head_bytes > 0 un file più grande di head_bytes + tail_bytes viene letto
+        tramite mmap: solo i primi head_bytes e gli ultimi tail_bytes arrivano in memoria
+        (self.truncated = True) e il rilevamento dell'encoding usa la parte iniziale.
 
-        # Determina tipo di file (testo o binario)
-        result = from_path(self.file_path).best()
-        if result:
-            self.encoding = result.encoding
-            self.bom = result.bom
+        Con sniff_binary un file binario già riconoscibile dai primi SNIFF_SIZE byte costa una sola
+        read: encoding None, nessun hash; read lo segnala come file non testuale, come gli altri binari.
 
+        :param head_bytes: Byte iniziali da leggere (0 = file intero)
+        :param tail_bytes: Byte finali da leggere oltre a quelli iniziali
+        """
+        # Il file viene letto una sola volta: rilevamento e decodifica usano lo stesso buffer
+        self.name = os.path.basename(self.file_path)
+        self._head_bytes = head_bytes
+        self._tail_bytes = tail_bytes
+        # il MIME serve già al prefiltro dei binari
         mime, _ = mimetypes.guess_type(self.file_path)
         self.mime = mime
+        self._load()
+        if self.sniffed_binary:
+            self.encoding, self.bom = None, None
+            self.has_info_been_read = True
+            return
+        if self.compute_hash:
+            hasher = hashlib.blake2b(self._data, digest_size=16)
+            if self.truncated:
+                # l'estratto è identificato anche dalla dimensione del file
+                hasher.update(self._tail)
+                hasher.update(str(self.size).encode())
+            self.hash = hasher.hexdigest()
+
+        # Determina tipo di file (testo o binario)
+        started = time.perf_counter(), time.process_time()
+        detector = self._detect_charset_cached if self.detection_cache is not None else None
+        self.encoding, self.bom = self.detect_encoding(self._data, partial=self.truncated, detector=detector,
+                                                       text_mime=self._is_text_mime())
+        self.detect_time = (time.perf_counter() - started[0], time.process_time() - started[1])
 
         self.has_info_been_read = True
 
@@ -64,17 +149,209 @@ class FileHandler:
         if msg_err:
             msg_err = f"Errore is_text su file {self.file_path}: {msg_err}"
         else:
-            mode = "r"  
-            if not is_text:
-                mode = "rb"
+            if self._data is None:
+                self._load()
             try:
-                with open(self.file_path, mode, encoding=self.encoding) as f:
-                    content = f.read()
+                if not is_text:
+                    content = self._data + self._tail
+                elif self.truncated:
+                    content = self._decode_excerpt(self.encoding or self.FALLBACK_ENCODING)
+                elif self.encoding is None:
+                    # text/* senza encoding riconosciuto: testo con caratteri sostituiti invece di un errore
+                    content = self.decode_text(self._data, self.FALLBACK_ENCODING, errors="replace")
+                else:
+                    content = self.decode_text(self._data, self.encoding)
             except Exception as e:
                 msg_err = f"Errore lettura file {self.file_path}: {str(e)}"
 
+        # il buffer non serve più: la memoria resta al solo contenuto
+        self._data = None
+        self._tail = b""
         return content, msg_err
 
+    def _load(self):
+        """Legge il file intero o, se troppo grande, solo gli estratti iniziale e finale via mmap."""
+        # senza buffer: niente isatty/lseek di BufferedReader, la lettura va diretta su FileIO
+        with open(self.file_path, "rb", buffering=0) as f:
+            size = self.stat_result.st_size if self.stat_result is not None else None
+            prefix = b""
+            if self.sniff_binary and (size is None or size > self.SNIFF_SIZE) and not self._is_text_mime():
+                # i file piccoli si leggono interi con una read: il prefiltro servirebbe solo a raddoppiarle
+                prefix = f.read(self.SNIFF_SIZE)
+                if self.is_binary_prefix(prefix):
+                    self._data = prefix
+                    self.bytes_read += len(prefix)
+                    self.size = size if size is not None else os.fstat(f.fileno()).st_size
+                    self.sniffed_binary = True
+                    self.truncated = False
+                    return
+            if self._head_bytes:
+                if size is None:
+                    size = os.fstat(f.fileno()).st_size
+                if size > self._head_bytes + self._tail_bytes:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        self.size = len(mm)
+                        self._data = mm[:self._head_bytes]
+                        self._tail = mm[self.size - self._tail_bytes:] if self._tail_bytes else b""
+                    self.bytes_read += len(self._data) + len(self._tail)
+                    self.truncated = True
+                    return
+            if size is None:
+                self._data = prefix + f.readall()
+            else:
+                # dimensione nota: una sola read, un byte in più rivela se il file è cresciuto
+                self._data = prefix + f.read(size + 1 - len(prefix))
+                if len(self._data) != size:
+                    self._data += f.readall()
+        self.size = len(self._data)
+        self.bytes_read += self.size
+        self.truncated = False
+
+    def _decode_excerpt(self, encoding: str) -> str:
+        """
+        Decodifica gli estratti di un file troncato, scartando i caratteri spezzati ai bordi,
+        e li unisce con TRUNCATION_MARKER.
+        """
+        encoding = codecs.lookup(encoding).name
+        # la parte iniziale si ferma all'ultimo carattere completo
+        head = codecs.getincrementaldecoder(encoding)(errors="replace").decode(self._data, final=False)
+        tail = self._tail
+        if tail:
+            if encoding in ("utf-8", "ascii"):
+                # salta i byte di continuazione di un carattere spezzato
+                start = 0
+                while start < min(len(tail), 4) and 0x80 <= tail[start] <= 0xBF:
+                    start += 1
+                tail = tail[start:]
+            elif encoding in ("utf-16", "utf-32"):
+                # allinea alla dimensione dell'unità e usa l'ordine di byte del BOM iniziale
+                unit = 2 if encoding == "utf-16" else 4
+                tail = tail[(self.size - len(tail)) % unit:]
+                little_endian = self._data.startswith(codecs.BOM_UTF16_LE)
+                encoding = f"{encoding.replace('-', '_')}_{'le' if little_endian else 'be'}"
+            tail = tail.decode(encoding, errors="replace")
+        else:
+            tail = ""
+        omitted = self.size - len(self._data) - len(self._tail)
+        text = head + self.TRUNCATION_MARKER.format(omitted=omitted) + tail
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def _is_text_mime(self) -> bool:
+        """True se il MIME è text/*: is_text considera il file testo qualunque sia l'encoding."""
+        return bool(self.mime) and self.mime.split("/")[0] == "text"
+
+    @classmethod
+    def is_binary_prefix(cls, prefix: bytes) -> bool:
+        """
+        True se i primi byte bastano a stabilire che detect_encoding non restituirà un encoding
+        testuale (ascii / utf_8): nessun BOM e firma binaria, byte NUL oppure byte non ASCII
+        che non formano UTF-8 valido (il file intero non potrà essere utf_8).
+        """
+        for bom, _ in cls.BOMS:
+            if prefix.startswith(bom):
+                return False
+        if b"\x00" in prefix or any(prefix.startswith(signature) for signature in cls.BINARY_SIGNATURES):
+            return True
+        if prefix.isascii():
+            return False
+        try:
+            codecs.getincrementaldecoder("utf_8")().decode(prefix, final=False)
+        except UnicodeDecodeError:
+            return True
+        return False
+
+    def read_base64(self) -> str:
+        """
+        Contenuto del file in base64 (righe da 76 caratteri), letto e codificato a blocchi:
+        il file non è mai in memoria per intero, solo il testo codificato. Con compute_hash
+        aggiorna self.hash sugli stessi byte.
+
+        :return: Testo base64
+        """
+        hasher = hashlib.blake2b(digest_size=16) if self.compute_hash else None
+        lines = []
+        with open(self.file_path, "rb") as f:
+            while chunk := f.read(self.BASE64_CHUNK):
+                self.bytes_read += len(chunk)
+                if hasher:
+                    hasher.update(chunk)
+                lines.append(base64.encodebytes(chunk).decode("ascii"))
+        if hasher:
+            self.hash = hasher.hexdigest()
+        return "".join(lines).rstrip("\n")
+
+    @classmethod
+    def detect_encoding(cls, data: bytes, partial: bool = False, detector=None, text_mime: bool = False) -> tuple:
+        """
+        Rileva l'encoding del buffer a livelli, dal controllo più economico al più costoso:
+        BOM, firma binaria / byte NUL, ASCII, UTF-8 stretto e solo per i casi ambigui charset_normalizer.
+
+        :param data: Contenuto del file
+        :param partial: True se data è solo l'inizio del file (un carattere può essere spezzato in fondo)
+        :param detector: Sostituisce detect_charset per i casi ambigui (es. con una cache)
+        :param text_mime: Il MIME è text/*: NUL e firme binarie non bastano a scartare il file
+                          (es. UTF-16 senza BOM), decide charset_normalizer
+        :return: Tupla (encoding, bom) - encoding None per i file binari
+        """
+        for bom, encoding in cls.BOMS:
+            if data.startswith(bom):
+                return encoding, True
+
+        prefix = data[:cls.SNIFF_SIZE]
+        if b"\x00" in prefix or any(data.startswith(signature) for signature in cls.BINARY_SIGNATURES):
+            if text_mime:
+                return (detector or cls.detect_charset)(data)
+            return None, None
+
+        if data.isascii():
+            # come charset_normalizer: il file vuoto è utf_8
+            return ("ascii" if data else "utf_8"), False
+
+        try:
+            if partial:
+                codecs.getincrementaldecoder("utf_8")().decode(data, final=False)
+            else:
+                data.decode("utf_8")
+            return "utf_8", False
+        except UnicodeDecodeError:
+            pass
+
+        return (detector or cls.detect_charset)(data)
+
+    @staticmethod
+    def detect_charset(data: bytes) -> tuple:
+        """Ultimo livello di detect_encoding: charset_normalizer, il più costoso."""
+        result = from_bytes(data).best()
+        if result:
+            return result.encoding, result.bom
+        return None, None
+
+    def _detect_charset_cached(self, data: bytes) -> tuple:
+        """detect_charset con la cache persistente, indicizzata sul file e sulla parte esaminata."""
+        key = self.detection_cache.file_key(self.file_path, self.stat_result, self._head_bytes if self.truncated else 0)
+        if key is None:
+            return self.detect_charset(data)
+        cached = self.detection_cache.lookup(key, self.mime)
+        if cached is not None:
+            self.detection_cached = True
+            return cached[:2]
+        encoding, bom = self.detect_charset(data)
+        is_text = self._is_text_mime() or encoding in ("ascii", "utf_8")
+        self.detection_cache.store(key, encoding, bom, self.mime, is_text)
+        return encoding, bom
+
+    @staticmethod
+    def decode_text(data: bytes, encoding: str, errors: str = "strict") -> str:
+        """
+        Decodifica il buffer come farebbe open(..., "r"), newline universali compresi.
+        """
+        text = data.decode(encoding, errors)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
     def exists(self):
         """
         Verifica se il file esiste.
@@ -84,7 +361,7 @@ class FileHandler:
         value = True
         msg_err = None
         
-        if not os.path.exists(self.file_path):
+        if self.stat_result is None and not os.path.exists(self.file_path):
             msg_err = f"Il file {self.file_path} non esiste."
             logger.warning(msg_err)
             value = False
@@ -125,4 +402,5 @@ class FileHandler:
             msg_err = f"file {self.name} mime: {self.mime} encoding: {self.encoding}"
             logger.warning(msg_err)
 
+        self.text = value
         return value, msg_err
\ No newline at end of file
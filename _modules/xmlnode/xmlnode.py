@@ -1,81 +1,194 @@
 from _modules.logging.logging import create_logger
 logger = create_logger(__name__)
 
+import io
+import types
 import xml.sax.saxutils as saxutils
 import re
+from _modules.file_utils.compressed_output import open_output
 
 class XMLNode:
-    """Classe per rappresentare un nodo XML."""
+    """
+    Classe per rappresentare un nodo XML.
+
+    Rappresentazione compatta per alberi da centinaia di migliaia di nodi: __slots__ e
+    valori vuoti condivisi (in sola lettura) per attributi, figli e contenuto, sostituiti
+    alla prima modifica. Gli attributi possono essere un dizionario oppure una tupla di
+    coppie (nome, valore), più leggera per i nodi che non vengono modificati.
+    I valori degli attributi sono sempre escapati (vedi opening_tag).
+    """
+
+    __slots__ = ("tag", "attributes", "children", "content")
+
+    HEADER = '<?xml version="1.0" encoding="utf-8"?>'
+
+    # sentinelle condivise dai nodi senza attributi / figli
+    EMPTY_ATTRIBUTES = types.MappingProxyType({})
+    EMPTY_CHILDREN = ()
+
+    # entità aggiuntive per i valori degli attributi (racchiusi tra ")
+    ATTRIBUTE_ENTITIES = {'"': "&quot;"}
 
     class NodeContent:
         """Classe per gestire il contenuto di un nodo XML."""
-        
-        def __init__(self, text="", is_cdata=False, is_text=False):
+
+        __slots__ = ("text", "is_cdata", "is_text", "indent_content")
+
+        def __init__(self, text="", is_cdata=False, is_text=False, indent_content=False):
             self.text = text
             self.is_cdata = is_cdata
-            self.is_text = is_text        
+            self.is_text = is_text
+            self.indent_content = indent_content
         def __str__(self):
             return self.text
+
+    class _EmptyNodeContent(NodeContent):
+        """Contenuto vuoto condiviso: set_text/set_cdata lo sostituiscono, non va modificato."""
+
+        __slots__ = ()
+
+        def __init__(self):
+            for name in ("text", "is_cdata", "is_text", "indent_content"):
+                object.__setattr__(self, name, "" if name == "text" else False)
+
+        def __setattr__(self, name, value):
+            raise AttributeError("Contenuto vuoto condiviso: usare set_text o set_cdata")
+
+    EMPTY_CONTENT = _EmptyNodeContent()
     
     def __init__(self, tag, attributes=None):
         """
         Inizializza un nodo XML.
         :param tag: Nome del tag
-        :param attributes: Dizionario degli attributi
+        :param attributes: Dizionario degli attributi oppure tupla di coppie (nome, valore)
         """
         self.tag = tag
-        self.attributes = attributes if attributes else {}
-        self.children = []
-        self.content = self.NodeContent()
+        if not attributes:
+            self.attributes = self.EMPTY_ATTRIBUTES
+        elif isinstance(attributes, dict):
+            self.attributes = attributes
+        else:
+            self.attributes = tuple(attributes)
+        self.children = self.EMPTY_CHILDREN
+        self.content = self.EMPTY_CONTENT
 
     def add_child(self, child):
         """Aggiunge un nodo figlio."""
-        self.children.append(child)
+        if self.children is self.EMPTY_CHILDREN:
+            self.children = [child]
+        else:
+            self.children.append(child)
+
+    def attribute_items(self):
+        """Coppie (nome, valore) degli attributi, qualunque sia la rappresentazione."""
+        if isinstance(self.attributes, tuple):
+            return self.attributes
+        return self.attributes.items()
+
+    def get_attribute(self, name, default=None):
+        """Valore dell'attributo name oppure default."""
+        for key, value in self.attribute_items():
+            if key == name:
+                return value
+        return default
+
+    def set_attribute(self, name, value):
+        """Imposta un attributo; gli attributi condivisi o in tupla diventano un dizionario proprio."""
+        if not isinstance(self.attributes, dict):
+            self.attributes = dict(self.attribute_items())
+        self.attributes[name] = value
 
     def set_cdata(self, content, is_text=True, indent_content=False):
-        self.content.text = content
-        self.content.is_cdata = True
-        self.content.is_text = is_text
-        self.content.indent_content = indent_content
+        self.content = self.NodeContent(content, is_cdata=True, is_text=is_text, indent_content=indent_content)
 
     def set_text(self, text):
-        self.content.text = text
-        self.content.is_text = True
-        self.content.is_cdata = False
+        self.content = self.NodeContent(text, is_text=True)
+
+    def opening_tag(self, indent_chars="", indent_level=0, self_closing=False):
+        """
+        Restituisce il tag di apertura (o il tag vuoto se self_closing) indentato.
+        I valori degli attributi sono sempre escapati (&, <, >, "), anche senza sanitize:
+        un nome di file o cartella con & o " non rende il documento non valido.
+        """
+        indent_str = indent_chars * indent_level
+        attrs = " ".join([f'{k}="{saxutils.escape(str(v), self.ATTRIBUTE_ENTITIES)}"' for k, v in self.attribute_items()])
+        return f"{indent_str}<{self.tag}{' ' + attrs if attrs else ''}{'/' if self_closing else ''}>"
+
+    def closing_tag(self, indent_chars="", indent_level=0):
+        """Restituisce il tag di chiusura indentato."""
+        return f"{indent_chars * indent_level}</{self.tag}>"
 
     def to_xml(self, indent_chars="", indent_level=0, sanitize=False, remove_xml_comments=False):
         """Converte il nodo in stringa XML."""
-        indent_str = indent_chars * indent_level
-        attrs = " ".join([f'{k}="{v}"' for k, v in self.attributes.items()])
+        buffer = io.StringIO()
+        self.write_to(buffer, indent_chars=indent_chars, indent_level=indent_level, sanitize=sanitize, remove_xml_comments=remove_xml_comments)
+        return buffer.getvalue()
+
+    def write_to(self, stream, indent_chars="", indent_level=0, sanitize=False, remove_xml_comments=False):
+        """
+        Scrive il nodo come XML in uno stream di testo (file, io.StringIO, TextIOWrapper su un compressore...).
 
-        if not self.children and not self.content.text:
-            return f"{indent_str}<{self.tag}{' ' + attrs if attrs else ''}/>"
+        La visita è iterativa con stack esplicito: nessun limite di profondità e ogni contenuto
+        viene copiato una sola volta nello stream, invece di una volta per livello di antenati.
+        L'output coincide con la versione ricorsiva: i token (tag, contenuto) sono uniti dal
+        separatore "\n" se indent_chars è valorizzato, altrimenti concatenati.
 
-        opening_tag = f"{indent_str}<{self.tag}{' ' + attrs if attrs else ''}>"
-        closing_tag = f"{indent_str}</{self.tag}>"
+        :param stream: Oggetto con metodo write(str)
+        """
+        separator = "" if not indent_chars else "\n"
+        write = stream.write
+        first = True
+        # elementi (nodo, livello, chiusura): la chiusura è accodata prima dei figli, in ordine inverso
+        stack = [(self, indent_level, False)]
+        while stack:
+            node, level, closing = stack.pop()
+            if first:
+                first = False
+            elif separator:
+                write(separator)
+
+            if closing:
+                write(node.closing_tag(indent_chars, level))
+                continue
+            if not node.children and not node.content.text:
+                write(node.opening_tag(indent_chars, level, self_closing=True))
+                continue
 
-        xml_content = [opening_tag]
-        if self.content.text:
+            write(node.opening_tag(indent_chars, level))
+            if node.content.text:
+                if separator:
+                    write(separator)
+                write(node._content_xml(indent_chars, level, sanitize, remove_xml_comments))
+            stack.append((node, level, True))
+            for child in reversed(node.children):
+                if child:
+                    stack.append((child, level + 1, False))
+
+    def _content_xml(self, indent_chars, indent_level, sanitize, remove_xml_comments):
+        """
+        Testo del nodo pronto per la scrittura (sanificato, senza commenti ///, indentato).
+
+        Con is_cdata il testo non viene escapato ma racchiuso in <![CDATA[...]]>, spezzato solo
+        sulle sequenze "]]>"; le righe vengono indentate solo se set_cdata ha indent_content.
+        """
+        if self.content.is_cdata:
+            content = self.content.text
+            if remove_xml_comments:
+                content = self.remove_xml_doc_comments(content)
+            content = f"<![CDATA[{self.sanitize_cdata(content)}]]>"
+            indent_lines = self.content.indent_content
+        else:
             content = self.content.text if not sanitize else self.sanitize_xml(self.content.text)
             """Rimuove i commenti XML ///"""
             if remove_xml_comments:
                 content = self.remove_xml_doc_comments(content)
-            indent_str_content = indent_chars * (indent_level + 1)
-            if indent_chars:
-                lines = content.splitlines()
-                _text = "\n".join(f"{indent_str_content}{line}" for line in lines)
-                xml_content.append(f"{_text}")
-            else:
-                _text = content
-                xml_content.append(f"{indent_str_content}{_text}")
-
-        for child in self.children:
-            if child:
-                xml_content.append(child.to_xml(indent_chars=indent_chars, indent_level=indent_level + 1, sanitize=sanitize, remove_xml_comments=remove_xml_comments))
-        xml_content.append(closing_tag)
-
-        separator = "" if not indent_chars else "\n"
-        return separator.join(xml_content)
+            indent_lines = True
+        indent_str_content = indent_chars * (indent_level + 1)
+        if indent_chars:
+            if not indent_lines:
+                return f"{indent_str_content}{content}"
+            return "\n".join(f"{indent_str_content}{line}" for line in content.splitlines())
+        return content
     
     def write_file(self, file_name, 
                    indent_chars="", 
@@ -83,14 +196,20 @@ class XMLNode:
                    encoding="utf-8", 
                    sanitize=False, 
                    split_size=0,
-                   remove_xml_comments=False
+                   remove_xml_comments=False,
+                   compress_level=None
         ):
+        """
+        Scrive il documento su file; con estensione .gz, .xz o .bz2 l'output è compresso.
+        I nodi vengono scritti direttamente nel file (write_to), senza costruire la stringa completa.
+
+        :param compress_level: Livello di compressione 0-9 (None = default del compressore)
+        """
         separator = "" if not indent_chars else "\n"
-        header = '<?xml version="1.0" encoding="utf-8"?>'
-        to_xml_content = self.to_xml(indent_chars=indent_chars, indent_level=indent_level, sanitize=sanitize, remove_xml_comments=remove_xml_comments)
-        content_xml = f'{header}{separator}{to_xml_content}'
-        with open(file_name, "w", encoding=encoding) as f:
-            f.write(content_xml)
+        # newline=None: stessa traduzione dei newline di open(file_name, "w")
+        with io.TextIOWrapper(open_output(file_name, compress_level), encoding=encoding, newline=None) as f:
+            f.write(f"{self.HEADER}{separator}")
+            self.write_to(f, indent_chars=indent_chars, indent_level=indent_level, sanitize=sanitize, remove_xml_comments=remove_xml_comments)
  
 
     def sanitize_xml(self, text: str) -> str:
@@ -109,8 +228,8 @@ class XMLNode:
     def sanitize_cdata(self, text: str) -> str:
         """
         Sanifica il testo per essere sicuro in un blocco CDATA XML.
-        Sostituisce ']]>' con ']]]]><![CDATA[' per evitare la chiusura prematura del CDATA
-        e scappa i caratteri speciali.
+        Spezza ogni ']]>' in ']]' + '>' chiudendo e riaprendo il CDATA (']]]]><![CDATA[>'),
+        senza escapare: dentro un CDATA i caratteri speciali restano letterali.
         
         Args:
             text (str): Il testo da sanificare.
@@ -118,12 +237,11 @@ class XMLNode:
         Returns:
             str: Il testo sanificato, pronto per l'uso in un blocco CDATA.
         """
-        # Sostituisce la sequenza "]]>" con "]]]]><![CDATA["
-        sanitized_text = text.replace("]]>", "]]]]><![CDATA[")
-        # Escapa i caratteri speciali per evitare conflitti con la sintassi XML
-        return self.sanitize_xml(sanitized_text)
+        # Sostituisce la sequenza "]]>" con "]]]]><![CDATA[>"
+        return text.replace("]]>", "]]]]><![CDATA[>")
     
-    def remove_xml_doc_comments(self, code: str) -> str:
+    @staticmethod
+    def remove_xml_doc_comments(code: str) -> str:
         """
         Rimuove le righe di commento C# che iniziano con '///', inclusi i newline di apertura e chiusura.
 
@@ -134,4 +252,6 @@ class XMLNode:
             str: Codice senza righe di commento ///.
         """
         # Rimuove tutte le righe che iniziano con '///' (incluso il \n)
-        return re.sub(r'\n[ \t]*///.*', '', code)
+        code = re.sub(r'\n[ \t]*///.*', '', code)
+        # la prima riga non ha un \n prima: si rimuove con il \n che la segue
+        return re.sub(r'\A[ \t]*///.*\n?', '', code)